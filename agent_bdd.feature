@@ -12,10 +12,12 @@
 
 Feature: Common Rules orchestration server
 
-  The server exposes five tools. get_context maps everything available in one
-  call, get_resource reads one resource in full, create_resource adds a
-  project-scoped resource, setup_config configures the project and its
-  surroundings, and get_bdd_scenario walks this file one scenario at a time.
+  get_context maps everything available in one call, get_resource reads one
+  resource in full, plan_context chooses what to read for a task within a token
+  budget, create_resource adds a project-scoped resource, setup_config
+  configures the project and its surroundings, get_bdd_scenario walks this file
+  one scenario at a time, sync_to_ide exports the kit into native editor
+  files, and get_server_stats reports how the server has been performing.
 
   Background:
     Given the common-rules MCP server is connected and its tools are listed
@@ -49,7 +51,8 @@ Feature: Common Rules orchestration server
     Given get_context is the first call of a session
     When I call get_context()
     And I inspect every element of "resources"
-    Then each element has the keys "kind", "name", "description", "relationships", "env" and "source"
+    Then each element has the keys "kind", "name", "description", "relationships", "env", "source" and "sections"
+    And each entry of "sections" has a "title" and its size in "bytes"
     And no element has a key named "body"
     And no element has a key named "template"
     And "usage" equals "Call get_resource(kind, name) for full instructions. Resources reference each other as /name in their relationship tables."
@@ -123,6 +126,20 @@ Feature: Common Rules orchestration server
     And "template_ref" equals "templates/tdd.md"
     And "template" is a non-empty string beginning with "# TDD Cycle"
 
+  @get_resource @sections
+  Scenario: get_resource narrows the instructions to the sections asked for
+    When I call get_resource(kind="skill", name="tdd", sections=["instructions"])
+    Then "sections" equals ["Instructions"]
+    And "body" begins with "## Instructions"
+    And "body" does not contain "## Relationships"
+    And "template" is a non-empty string beginning with "# TDD Cycle"
+
+  @get_resource @sections
+  Scenario: a section that does not exist is reported with the ones that do
+    When I call get_resource(kind="skill", name="tdd", sections=["Rationale"])
+    Then "missing_sections" equals ["Rationale"]
+    And "available_sections" equals ["Relationships", "Instructions"]
+
   @get_resource @placeholders
   Scenario: configured placeholders are substituted into the instructions
     Given README_PATH is "README.md" and WIKI_DIR is ".docs" in the resolved configuration
@@ -163,6 +180,31 @@ Feature: Common Rules orchestration server
     And "available" contains "verify"
     And the response has a key "hint" equal to "Call get_context() to list every resource."
 
+  # ---------------------------------------------------------------- plan_context
+
+  @plan_context @budget
+  Scenario: plan_context chooses what to read for a task within a token budget
+    Given the built-in kit is loaded
+    When I call plan_context(task="fix a failing test", budget_tokens=2000)
+    Then "budget_tokens" equals 2000
+    And "used_tokens" is no greater than 2000
+    And "plan" is a non-empty list
+    And every element of "plan" has the keys "step", "kind", "name", "tokens", "reason" and "call"
+    And no element of "plan" contains a "body" key
+
+  @plan_context @required_edges
+  Scenario: a planned resource brings its required edges with it
+    When I call plan_context(task="drive the change from failing tests", budget_tokens=4000)
+    And I select the element of "plan" where "name" is "tdd"
+    Then the plan also contains an element where "name" is "verify"
+    And that element's "reason" equals "required by /tdd"
+
+  @plan_context @validation
+  Scenario: a budget of zero is rejected rather than returning an empty plan
+    When I call plan_context(task="anything", budget_tokens=0)
+    Then the response has a key "error"
+    And the response has a key "hint"
+
   # ------------------------------------------------------------ create_resource
 
   @create_resource @happy_path
@@ -272,6 +314,14 @@ Feature: Common Rules orchestration server
     And "env_status.unknown_keys" contains "MY_CUSTOM_KEY"
     And the file contains the comment line "# Not recognised by this server; preserved so you do not lose them."
 
+  @setup_config @timings
+  Scenario: setup reports where its time went
+    When I call setup_config()
+    Then "timings.stages" has an entry for each of config, ide_rules, detected, git_hooks, editor_hooks, companions and sync
+    And each entry has "started_ms", "duration_ms" and the stages it ran "after"
+    And "timings.stages.sync.started_ms" is no earlier than the end of "timings.stages.editor_hooks"
+    And "timings.total_ms" is less than the sum of every stage's "duration_ms" when independent stages overlapped
+
   # ------------------------------------------------------- commit authorship
 
   @setup_config @git_hook @authorship
@@ -647,12 +697,30 @@ Feature: Common Rules orchestration server
     And .cursor/skills/tdd/SKILL.md no longer exists
     And "removed" lists the generated files
 
+  @sync @timings
+  Scenario: a traced sync says where its time went
+    When I call sync_to_ide(ides=["cursor"], trace=true)
+    Then "timings.spans.name" equals "sync_to_ide"
+    And "timings.spans" has a child span for each of clean, load_catalogue and target
+    And every span has "started_ms" and "duration_ms"
+
   @sync @gating
   Scenario: a gated resource is not exported either
     Given ENABLE_NOTEBOOKS is "false"
     When I call sync_to_ide(ides=["cursor"])
     Then .cursor/skills/notebook/SKILL.md does not exist
 
+  # ------------------------------------------------------------------ stats
+
+  @stats
+  Scenario: the server reports latency, size and cache hits per tool
+    Given I called get_context() twice
+    When I call get_server_stats()
+    Then "tools.get_context.calls" is at least 2
+    And "tools.get_context.latency_ms" has "p50", "p95" and "p99"
+    And "tools.get_context.response_bytes.total" is greater than 0
+    And "hit_ratios.catalogue" is greater than 0
+
   # ------------------------------------------------------------- orchestration
 
   @orchestrator @composition
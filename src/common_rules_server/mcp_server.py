@@ -1,39 +1,57 @@
 """MCP entry point.
 
-Five tools, shaped around how an agent actually works rather than around the
+Eight tools, shaped around how an agent actually works rather than around the
 storage underneath:
 
 * ``get_context``      — one call, the whole map, no instruction bodies
 * ``get_resource``     — the full instructions for one resource, on demand
+* ``plan_context``     — which resources to read for a task, within a budget
 * ``create_resource``  — add a project-scoped resource
 * ``setup_config``     — configure the project and its surroundings
 * ``get_bdd_scenario`` — walk the acceptance scenarios one at a time
 * ``sync_to_ide``       — export the whole kit into native editor files
+* ``get_server_stats`` — latency, response size and cache-hit figures
 
 Services are constructed per call rather than at import. The working directory
 and the project's configuration can both change while the server is running, and
 a service captured at import time would keep answering with the state that
-existed when the process started.
+existed when the process started. The one exception is each project's resource
+catalogue, which is expensive to parse and checks its own freshness on every
+read — see ``catalogue_registry``.
+
+Services are synchronous, so each tool resolves its project on the event loop —
+that can mean asking the client — and hands the rest to the worker pool in
+``util.workers``. Tools that write hold the project's lock while they do.
+
+Only what reading needs is imported at start-up. Editors launch this server on
+every window open and give up on a slow handshake, while most sessions never
+plan, set up, sync or walk the scenarios — so those services are imported by the
+worker that first needs one, never on the event loop.
 """
 
+import asyncio
+import functools
 import json
 import logging
 import os
+import stat
 import sys
+import time
+import weakref
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Awaitable, Callable, Optional
 from urllib.parse import unquote, urlparse
 
+from mcp import types
 from mcp.server.fastmcp import Context, FastMCP
 
-from common_rules_server.service.bdd_service import BddService
+from common_rules_server.service.catalogue_registry import WARMUP_ENV, CatalogueRegistry
 from common_rules_server.service.config_service import ConfigService
-from common_rules_server.service.git_hook_service import GitHookService
-from common_rules_server.service.hook_service import HookService
 from common_rules_server.service.ide_service import IdeService
-from common_rules_server.service.mcp_installer_service import McpInstallerService
 from common_rules_server.service.resource_service import ResourceService
-from common_rules_server.service.sync_service import SyncService
+from common_rules_server.util import profiling, tracing
+from common_rules_server.util.metrics import METRICS_INTERVAL_ENV, metrics
+from common_rules_server.util.workers import max_workers, run_blocking
 
 logging.basicConfig(
     level=logging.INFO,
@@ -78,6 +96,18 @@ PROJECT_MARKERS = (
 )
 
 
+# Marker probes, by directory: the directory's mtime when probed, and the answer.
+# Adding or removing an entry changes a directory's mtime, so an unchanged mtime
+# means the answer still holds and one stat replaces a probe per marker.
+_project_probes: dict[str, tuple[int, bool]] = {}
+
+# Filesystems stamp mtimes at a coarse granularity, so a marker created moments
+# after a probe can leave the mtime unchanged. Probes of a directory modified
+# this recently are therefore not remembered — the rule git applies to its own
+# index for the same reason.
+_RACY_WINDOW_NS = 2_000_000_000
+
+
 def _looks_like_a_project(path: str) -> bool:
     """Whether this directory is plausibly the root of a codebase.
 
@@ -85,8 +115,21 @@ def _looks_like_a_project(path: str) -> bool:
     projects has none of these markers. Writing configuration into one of those
     is always a mistake, so the guess that produced it must not be trusted.
     """
-    base = Path(path)
-    return base.is_dir() and any((base / marker).exists() for marker in PROJECT_MARKERS)
+    try:
+        info = os.stat(path)
+    except OSError:
+        return False
+    if not stat.S_ISDIR(info.st_mode):
+        return False
+
+    cached = _project_probes.get(path)
+    if cached and cached[0] == info.st_mtime_ns:
+        return cached[1]
+
+    found = any(os.path.exists(os.path.join(path, marker)) for marker in PROJECT_MARKERS)
+    if time.time_ns() - info.st_mtime_ns > _RACY_WINDOW_NS:
+        _project_probes[path] = (info.st_mtime_ns, found)
+    return found
 
 
 def _nearest_project_above(path: str) -> Optional[str]:
@@ -98,6 +141,13 @@ def _nearest_project_above(path: str) -> Optional[str]:
     return None
 
 
+# The roots each connected session's client advertised. Asking is a round trip
+# to the client, and the answer only changes when the client says so, so it is
+# asked once per session. Keyed weakly so a closed session takes its entry with
+# it.
+_session_roots: "weakref.WeakKeyDictionary[Any, list[str]]" = weakref.WeakKeyDictionary()
+
+
 async def _roots_from_client(ctx: Context) -> list[str]:
     """Every filesystem root the client advertises, in the order it sent them.
 
@@ -105,19 +155,40 @@ async def _roots_from_client(ctx: Context) -> list[str]:
     first root is not necessarily the project being worked on — Claude Desktop
     advertises the folder that *contains* the user's projects. So this returns
     all of them and lets the caller choose.
+
+    A client that cannot answer is remembered as having no roots: support for
+    roots is negotiated when the session starts and does not appear later.
     """
+    session = ctx.session
+    cached = _session_roots.get(session)
+    if cached is not None:
+        return list(cached)
+
+    paths: list[str] = []
     try:
-        result = await ctx.session.list_roots()
+        result = await session.list_roots()
     except Exception as exc:  # noqa: BLE001 - the client may not support roots
         logger.info("client did not answer roots/list (%s)", exc)
-        return []
+    else:
+        for root in result.roots:
+            parsed = urlparse(str(root.uri))
+            if parsed.scheme == "file":
+                paths.append(unquote(parsed.path))
+
+    _session_roots[session] = paths
+    return list(paths)
+
+
+async def _on_roots_list_changed(_: types.RootsListChangedNotification) -> None:
+    """Forgets advertised roots when a client says they changed.
+
+    The notification does not say which session sent it, so every session's
+    roots are asked for again. That costs one round trip per session, once.
+    """
+    _session_roots.clear()
 
-    paths: list[str] = []
-    for root in result.roots:
-        parsed = urlparse(str(root.uri))
-        if parsed.scheme == "file":
-            paths.append(unquote(parsed.path))
-    return paths
+
+mcp._mcp_server.notification_handlers[types.RootsListChangedNotification] = _on_roots_list_changed
 
 
 async def _resolve_root(ctx: Context, project_root: Optional[str] = None) -> dict:
@@ -162,7 +233,7 @@ async def _resolve_root(ctx: Context, project_root: Optional[str] = None) -> dic
             }
 
     cwd = os.getcwd()
-    nearest = _nearest_project_above(cwd)
+    nearest = None if _serving_many_clients else _nearest_project_above(cwd)
     if nearest:
         return {
             "root": nearest,
@@ -180,6 +251,12 @@ async def _resolve_root(ctx: Context, project_root: Optional[str] = None) -> dic
     }
 
 
+# Set when one process serves many clients over HTTP. Its working directory is
+# then wherever the server was started, which says nothing about any client's
+# project, so it is never taken as evidence of one.
+_serving_many_clients = False
+
+
 def _untrusted_root_error(resolution: dict) -> dict:
     """The refusal returned instead of writing into a directory we guessed."""
     return {
@@ -255,11 +332,108 @@ def _active_ide_from_env() -> Optional[str]:
     return None
 
 
+_catalogues = CatalogueRegistry()
+
+#: Environment override for how many calls one session may have in flight.
+SESSION_CONCURRENCY_ENV = "COMMON_RULES_SESSION_CONCURRENCY"
+DEFAULT_SESSION_CONCURRENCY = 4
+
+_session_slots: "weakref.WeakKeyDictionary[Any, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _tool_call(handler: Callable[..., Awaitable[dict]]) -> Callable[..., Awaitable[dict]]:
+    """What every tool call passes through on its way to the handler.
+
+    Caps the calls one session can have in flight. The worker pool is shared by
+    every client the process serves, so without a cap one agent firing twenty
+    calls at once would hold every worker while the others queued behind it.
+    Calls over the cap wait their turn; none is refused.
+
+    Records each call's latency for ``get_server_stats``, and the response size
+    of a sample of calls — measured on a worker, since it means serialising the
+    answer again. The latency includes any wait for a slot, since that is what
+    the client sees.
+
+    With ``COMMON_RULES_PROFILE`` set, each call is profiled into that directory.
+
+    The wrapper keeps the handler's name, signature and docstring, which is
+    what the server reads to describe the tool to clients.
+    """
+
+    @functools.wraps(handler)
+    async def call(*args: Any, **kwargs: Any) -> dict:
+        started = time.perf_counter()
+        try:
+            with profiling.capture(handler.__name__):
+                result = await _within_session_limit(handler, args, kwargs)
+        except BaseException:
+            metrics.observe(handler.__name__, _elapsed_ms(started), failed=True)
+            raise
+        elapsed = _elapsed_ms(started)
+        size = (
+            await run_blocking(_response_bytes, result)
+            if metrics.wants_size(handler.__name__)
+            else None
+        )
+        metrics.observe(handler.__name__, elapsed, size)
+
+        root = result.get("project_root") if isinstance(result, dict) else None
+        if root and os.environ.get(METRICS_INTERVAL_ENV):
+            await run_blocking(metrics.write_if_due, root, {"catalogues": _catalogues.stats()})
+        return result
+
+    return call
+
+
+async def _within_session_limit(handler: Callable[..., Awaitable[dict]], args, kwargs) -> dict:
+    try:
+        session = kwargs["ctx"].session
+    except Exception:  # noqa: BLE001 - no context outside a request
+        return await handler(*args, **kwargs)
+
+    slots = _session_slots.get(session)
+    if slots is None:
+        configured = os.environ.get(SESSION_CONCURRENCY_ENV, "").strip()
+        limit = int(configured) if configured.isdigit() and int(configured) > 0 else (
+            DEFAULT_SESSION_CONCURRENCY
+        )
+        slots = _session_slots[session] = asyncio.Semaphore(limit)
+    async with slots:
+        return await handler(*args, **kwargs)
+
+
+def _response_bytes(result: Any) -> int:
+    return len(json.dumps(result, default=str).encode("utf-8"))
+
+
+def _elapsed_ms(started: float) -> float:
+    return (time.perf_counter() - started) * 1000
+
+
 def _resources(root: Optional[str] = None) -> ResourceService:
-    return ResourceService(ConfigService(root or _project_root()))
+    return _catalogues.resources(root or _project_root())
+
+
+async def _on_initialized(_: types.InitializedNotification) -> None:
+    """Starts loading the catalogue the moment the handshake completes, if asked to.
+
+    Only a root the host stated is warmed. Client roots would need a round trip
+    this notification cannot make, and a guessed root may be the wrong project.
+    """
+    if os.environ.get(WARMUP_ENV, "").strip().lower() not in ("true", "1", "yes", "on"):
+        return
+    for var in ("COMMON_RULES_PROJECT_ROOT", "CLAUDE_PROJECT_DIR"):
+        value = os.environ.get(var)
+        if value:
+            _catalogues.start_warm_up(str(Path(value).expanduser().resolve()))
+            return
+
+
+mcp._mcp_server.notification_handlers[types.InitializedNotification] = _on_initialized
 
 
 @mcp.tool()
+@_tool_call
 async def get_context(ctx: Context, project_root: Optional[str] = None) -> dict:
     """Map every available rule, skill, agent, workflow and loop in one call.
 
@@ -277,7 +451,7 @@ async def get_context(ctx: Context, project_root: Optional[str] = None) -> dict:
     env_status.needs_input — if it is non-empty, setup_config should run first.
     """
     resolution = await _resolve_root(ctx, project_root)
-    result = _resources(resolution["root"]).get_context()
+    result = await run_blocking(lambda: _resources(resolution["root"]).get_context())
     result["project_root"] = resolution["root"]
     result["project_root_source"] = resolution["source"]
     if not resolution["trusted"]:
@@ -286,8 +460,13 @@ async def get_context(ctx: Context, project_root: Optional[str] = None) -> dict:
 
 
 @mcp.tool()
+@_tool_call
 async def get_resource(
-    kind: str, name: str, ctx: Context, project_root: Optional[str] = None
+    kind: str,
+    name: str,
+    ctx: Context,
+    sections: Optional[list[str]] = None,
+    project_root: Optional[str] = None,
 ) -> dict:
     """Read one resource in full.
 
@@ -297,12 +476,49 @@ async def get_resource(
     Returns the instructions with project configuration substituted in, the
     output template the resulting report should follow, and which configuration
     keys were resolved or are still missing.
+
+    sections optionally narrows the instructions to the named ## sections —
+    get_context lists each resource's section titles and sizes. Ask for
+    ["Instructions"] when you need the procedure and not the reasoning behind it.
     """
     resolution = await _resolve_root(ctx, project_root)
-    return _resources(resolution["root"]).get_resource(kind, name)
+    return await run_blocking(
+        lambda: _resources(resolution["root"]).get_resource(kind, name, sections)
+    )
 
 
 @mcp.tool()
+@_tool_call
+async def plan_context(
+    task: str,
+    budget_tokens: int,
+    ctx: Context,
+    inline: bool = False,
+    project_root: Optional[str] = None,
+) -> dict:
+    """Choose which resources to read for a task, within a token budget.
+
+    Call this at the start of a task instead of guessing from get_context.
+    task is a sentence describing the work; budget_tokens is how much context
+    you can spend on instructions. Returns an ordered plan: the most relevant
+    resources that fit, each followed by the resources it marks as required —
+    those are never dropped to make room.
+
+    inline returns each step's instructions and template in the plan itself, so
+    the whole plan costs one call instead of one per step.
+    """
+    resolution = await _resolve_root(ctx, project_root)
+    return await run_blocking(_plan, resolution["root"], task, budget_tokens, inline)
+
+
+def _plan(root: str, task: str, budget_tokens: int, inline: bool) -> dict:
+    from common_rules_server.service.planner_service import PlannerService
+
+    return PlannerService(_resources(root)).plan(task, budget_tokens, inline)
+
+
+@mcp.tool()
+@_tool_call
 async def create_resource(
     kind: str,
     name: str,
@@ -324,16 +540,20 @@ async def create_resource(
     resolution = await _resolve_root(ctx, project_root)
     if not resolution["trusted"]:
         return _untrusted_root_error(resolution)
-    return _resources(resolution["root"]).create_resource(
-        kind, name, description, body, extra_fields
+    root = resolution["root"]
+    return await run_blocking(
+        lambda: _resources(root).create_resource(kind, name, description, body, extra_fields),
+        lock=root,
     )
 
 
 @mcp.tool()
+@_tool_call
 async def setup_config(
     ctx: Context,
     ide: Optional[str] = None,
     install_companions: bool = False,
+    trace: bool = False,
     project_root: Optional[str] = None,
 ) -> dict:
     """Configure this project and the surroundings the agent works in.
@@ -357,87 +577,30 @@ async def setup_config(
     reported on.
 
     Read next_steps in the response — it lists what still needs a human answer.
+    timings says how long each part of setup took; trace adds the phases inside
+    each part to it.
     """
     resolution = await _resolve_root(ctx, project_root)
     if not resolution["trusted"]:
         return _untrusted_root_error(resolution)
 
     root = resolution["root"]
-    config_service = ConfigService(root)
-
-    resolved = config_service.write_config()
-    config = resolved["config"]
-
-    git_hooks = GitHookService(root).setup_hooks(config)
-
-    ide_service = IdeService(root)
     active_ide = ide or _active_ide_from_env() or _active_ide_from_client(ctx)
-    ide_rules = ide_service.setup_ide_rules([active_ide] if active_ide else None)
+    work = (_setup, root, active_ide, install_companions)
+    if trace:
+        work = (_traced, "setup_config", *work)
+    result = await run_blocking(*work, lock=root)
+    return {"project_root": root, "project_root_source": resolution["source"], **result}
 
-    detected = [active_ide] if active_ide else [t.key for t in ide_service.detect()]
-    resources = ResourceService(config_service)
-    editor_hooks = (
-        HookService(root).install(resources.hooks(), detected) if detected else None
-    )
-
-    installer = McpInstallerService(root)
-    auto_install = str(config.get("AUTO_INSTALL_MCPS", "false")).strip().lower() in (
-        "true",
-        "1",
-        "yes",
-        "on",
-    )
-    companions = installer.install_missing(apply=install_companions or auto_install)
 
-    next_steps: list[str] = []
-    for key in resolved["env_status"]["needs_input"]:
-        next_steps.append(
-            f"Ask the user for {key}, then write it into {resolved['env_status']['file_path']}."
-        )
-    if ide_rules.get("action_required"):
-        next_steps.append(ide_rules["action_required"])
-    for missing in companions["proposals"]:
-        next_steps.append(
-            f"Companion MCP server '{missing['server']}' is not configured. {missing['purpose']}"
-        )
+def _setup(root: str, active_ide: Optional[str], install_companions: bool) -> dict:
+    from common_rules_server.service.setup_service import SetupService
 
-    if editor_hooks is None:
-        next_steps.append(
-            "No editor detected, so no lifecycle hooks were installed. Name the "
-            "editor to setup_config to install them."
-        )
-    else:
-        for gap in editor_hooks["unsupported"]:
-            next_steps.append(
-                f"Hook '{gap['hook']}' has no equivalent in {gap['ide']}; "
-                f"that automation is unavailable there."
-            )
-
-    sync_result = SyncService(resources, root).sync(detected)
-
-    return {
-        "project_root": root,
-        "project_root_source": resolution["source"],
-        "config": config,
-        "env_status": resolved["env_status"],
-        "git_hooks": git_hooks,
-        "editor_hooks": editor_hooks,
-        "ide_rules": ide_rules,
-        "companions": companions,
-        "sync": sync_result,
-        "next_steps": next_steps,
-        "message": (
-            "Project configured. "
-            + (
-                f"{len(next_steps)} item(s) need attention — see next_steps."
-                if next_steps
-                else "Nothing further is needed."
-            )
-        ),
-    }
+    return SetupService(root).setup(active_ide, install_companions)
 
 
 @mcp.tool()
+@_tool_call
 async def get_bdd_scenario(
     ctx: Context, page: int = 1, project_root: Optional[str] = None
 ) -> dict:
@@ -453,18 +616,30 @@ async def get_bdd_scenario(
     """
     resolution = await _resolve_root(ctx, project_root)
     root = resolution["root"]
+    return await run_blocking(_bdd_scenario, root, page)
+
+
+def _bdd_scenario(root: str, page: int) -> dict:
+    from common_rules_server.service.bdd_service import BddService
+
     config = ConfigService(root).get_config()["config"]
     return BddService(root, config.get("BDD_FILE_PATH")).get_scenario(page)
 
 
 @mcp.tool()
+@_tool_call
 async def sync_to_ide(
     ctx: Context,
     ides: Optional[list] = None,
     include_hooks: bool = True,
     clean: bool = False,
     offline: bool = False,
+    plan: bool = False,
+    diff: bool = False,
+    trace: bool = False,
     project_root: Optional[str] = None,
+    inline_tokens: Optional[int] = None,
+    always_budget: Optional[int] = None,
 ) -> dict:
     """Export every resource into the editor's own native files.
 
@@ -478,7 +653,20 @@ async def sync_to_ide(
 
     The export is mechanical, so it is cheap to re-run — and it must be re-run
     after changing a resource, since generated files are overwritten rather than
-    merged.
+    merged. Only files whose content changes are written.
+
+    plan writes nothing and instead returns what sync would do: the paths it
+    would create, modify and delete, with counts. diff adds a unified diff for
+    each of them.
+
+    trace returns timings: how long each phase took — cleaning, loading, each
+    editor's files, hooks — as a tree.
+
+    inline_tokens and always_budget make the export hybrid. A resource whose
+    body is at most inline_tokens (estimated) is copied in; a larger one becomes
+    a stub that fetches it from this server. Always-rules, loaded into every
+    session, are copied in only while their total stays within always_budget.
+    Each editor's always_on says how many tokens it now loads every session.
 
     project_root is the absolute path of the project to sync into. This server
     usually runs outside that project and cannot see your working directory, so
@@ -490,12 +678,57 @@ async def sync_to_ide(
         return _untrusted_root_error(resolution)
 
     root = resolution["root"]
+    active_ide = _active_ide_from_env() or _active_ide_from_client(ctx)
+    work = (
+        _sync_project, root, ides, active_ide, include_hooks, clean, offline, plan, diff,
+        inline_tokens, always_budget,
+    )
+    if trace:
+        work = (_traced, "sync_to_ide", *work)
+    return await run_blocking(*work, lock=root)
+
+
+def _traced(name: str, work: Callable[..., dict], root: str, *args: Any) -> dict:
+    """``work(root, *args)`` with its phases timed, added to the result's timings.
+
+    The trace is also written as Trace Event JSON under the project's
+    ``.common-rules-server/cache/traces/``, to open in chrome://tracing or
+    Perfetto, when the project has been set up; ``trace_file`` says where.
+    """
+    with tracing.trace(name) as recorded:
+        result = work(root, *args)
+
+    config_dir = Path(root) / ".common-rules-server"
+    trace_file = None
+    if config_dir.is_dir():
+        try:
+            trace_file = str(recorded.export(config_dir / "cache" / "traces"))
+        except OSError as exc:
+            logger.warning("could not write the trace for %s: %s", name, exc)
+    timings = {**(result.get("timings") or {}), "spans": recorded.tree(), "trace_file": trace_file}
+    return {**result, "timings": timings}
+
+
+def _sync_project(
+    root: str,
+    ides: Optional[list],
+    active_ide: Optional[str],
+    include_hooks: bool,
+    clean: bool,
+    offline: bool,
+    plan: bool = False,
+    diff: bool = False,
+    inline_tokens: Optional[int] = None,
+    always_budget: Optional[int] = None,
+) -> dict:
+    """Everything sync_to_ide writes, run on a worker with the project locked."""
+    from common_rules_server.service.sync_service import SyncService
+
     service = SyncService(_resources(root), root)
 
     if clean:
         return service.clean(ides)
 
-    active_ide = _active_ide_from_env() or _active_ide_from_client(ctx)
     targets = ides or ([active_ide] if active_ide else None)
     targets = targets or [t.key for t in IdeService(root).detect()]
     if not targets:
@@ -506,28 +739,390 @@ async def sync_to_ide(
                 "antigravity — or run setup_config first."
             ),
         }
-    return service.sync(targets, include_hooks=include_hooks, offline=offline)
+    options = _hybrid_options(inline_tokens, always_budget)
+    if plan or diff:
+        return service.sync(
+            targets, include_hooks=include_hooks, offline=offline, plan=True, diffs=diff, **options
+        )
+    return service.sync(targets, include_hooks=include_hooks, offline=offline, **options)
+
+
+def _hybrid_options(inline_tokens: Optional[int], always_budget: Optional[int]) -> dict:
+    """The hybrid limits that were set, as keyword arguments for ``SyncService.sync``."""
+    options = {"inline_tokens": inline_tokens, "always_budget": always_budget}
+    return {name: value for name, value in options.items() if value is not None}
+
+
+@mcp.tool()
+@_tool_call
+async def get_server_stats(ctx: Context) -> dict:
+    """How this server has been performing since it started.
+
+    Per tool: calls, failures, latency percentiles (p50, p95, p99, max) and
+    response sizes in bytes, measured on a sample of calls with the total
+    estimated from it. Counters for catalogue loads, reparses and cache
+    hits, with hit ratios, and what the catalogue registry currently holds.
+
+    For diagnosing a slow or expensive session; an agent doing ordinary work
+    never needs it.
+    """
+    return {
+        **metrics.snapshot(),
+        "catalogues": _catalogues.stats(),
+        "workers": max_workers(),
+    }
+
+
+#: The shared secret every request must carry when ``serve`` binds beyond loopback.
+SERVE_TOKEN_ENV = "COMMON_RULES_SERVE_TOKEN"
+_LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+_WILDCARD_HOSTS = ("0.0.0.0", "::", "")
+
+
+def _serve(args: list[str]) -> None:
+    """Serves many clients from one long-lived process over HTTP.
+
+    ``serve [--sse] [--host HOST] [--port PORT] [--allow-host NAME,...]``.
+    Streamable HTTP unless ``--sse`` is given. Each client names its project
+    through MCP roots or the ``project_root`` argument; the catalogue registry
+    keeps the projects in use warm between calls, and each session's in-flight
+    calls are capped so no one client holds the worker pool.
+
+    The tools write into whatever project a caller names, so the server only
+    listens beyond loopback when ``COMMON_RULES_SERVE_TOKEN`` is set, and then
+    every request must send it as a bearer token. Host and Origin headers are
+    checked against the bind address plus ``--allow-host``, the names clients
+    reach the server by; a wildcard bind needs those named.
+    """
+    global _serving_many_clients
+
+    transport = "sse" if "--sse" in args else "streamable-http"
+    host = _option(args, "--host") or mcp.settings.host
+    port = _option(args, "--port")
+    names = [name for name in (_option(args, "--allow-host") or "").split(",") if name]
+    token = os.environ.get(SERVE_TOKEN_ENV, "").strip() or None
+
+    refusal = None
+    if port is not None and not (port.isdigit() and 0 < int(port) < 65536):
+        refusal = {
+            "error": f"--port takes a port number from 1 to 65535, not {port!r}.",
+            "hint": "e.g. common-rules serve --port 8000",
+        }
+    elif host not in _LOOPBACK_HOSTS and not token:
+        refusal = {
+            "error": f"Refusing to serve on {host} without {SERVE_TOKEN_ENV}.",
+            "hint": (
+                "Any caller that reaches the port could write files into any project. "
+                f"Set {SERVE_TOKEN_ENV} to a long random secret and have clients send "
+                "it as 'Authorization: Bearer <token>', or serve on 127.0.0.1."
+            ),
+        }
+    elif host in _WILDCARD_HOSTS and not names:
+        refusal = {
+            "error": f"Serving on {host or 'every address'} needs --allow-host.",
+            "hint": "Name the hosts clients reach this server by, e.g. --allow-host rules.internal,10.0.0.5.",
+        }
+    if refusal:
+        print(json.dumps(refusal, indent=2))
+        sys.exit(1)
+
+    mcp.settings.host = host
+    if port:
+        mcp.settings.port = int(port)
+    mcp.settings.transport_security = _transport_security(host, names)
+    _serving_many_clients = True
+
+    app = mcp.sse_app() if transport == "sse" else mcp.streamable_http_app()
+    if token:
+        from common_rules_server.util.bearer_token import BearerToken
+
+        app = BearerToken(app, token)
+    logger.info(
+        "common-rules orchestration server serving %s on %s:%s%s",
+        transport,
+        mcp.settings.host,
+        mcp.settings.port,
+        " (bearer token required)" if token else "",
+    )
+    _run_http(app)
+
+
+def _transport_security(host: str, names: list[str]) -> Any:
+    """DNS-rebinding protection admitting loopback, the bind address and ``names``."""
+    from mcp.server.transport_security import TransportSecuritySettings
+
+    hosts = list(_LOOPBACK_HOSTS)
+    for name in [host, *names]:
+        if name not in _WILDCARD_HOSTS and name not in hosts:
+            hosts.append(name)
+    # Host headers bracket an IPv6 address and may carry any port.
+    netlocs = [f"[{name}]" if ":" in name else name for name in hosts]
+    return TransportSecuritySettings(
+        enable_dns_rebinding_protection=True,
+        allowed_hosts=[*netlocs, *(f"{netloc}:*" for netloc in netlocs)],
+        allowed_origins=[
+            f"{scheme}://{netloc}{port}"
+            for netloc in netlocs
+            for scheme in ("http", "https")
+            for port in ("", ":*")
+        ],
+    )
+
+
+def _run_http(app: Any) -> None:
+    import anyio
+    import uvicorn
+
+    config = uvicorn.Config(
+        app,
+        host=mcp.settings.host,
+        port=mcp.settings.port,
+        log_level=mcp.settings.log_level.lower(),
+    )
+    anyio.run(uvicorn.Server(config).serve)
+
+
+def _sync_fleet(args: list[str]) -> dict:
+    """Syncs many projects in one run. See ``service.fleet_service``.
+
+    ``sync-fleet [ROOT|GLOB ...] [--from FILE] [--ides cursor,claude] [--jobs N]
+    [--offline] [--no-hooks]``. Without ``--ides`` each project gets the
+    editors it shows evidence of using.
+    """
+    from common_rules_server.service.fleet_service import FleetService, expand_roots
+
+    valued = {"--from", "--ides", "--jobs"}
+    patterns = [
+        arg for i, arg in enumerate(args)
+        if not arg.startswith("--") and (i == 0 or args[i - 1] not in valued)
+    ]
+    listing = _option(args, "--from")
+    try:
+        roots = expand_roots(patterns, listing)
+    except OSError as exc:
+        return {"projects": [], "error": f"Cannot read {listing}: {exc}"}
+    ides = [ide for ide in (_option(args, "--ides") or "").split(",") if ide]
+    jobs = _option(args, "--jobs")
+    return FleetService(int(jobs) if jobs and jobs.isdigit() else None).sync(
+        roots,
+        ides or None,
+        include_hooks="--no-hooks" not in args,
+        offline="--offline" in args,
+    )
+
+
+def _synthetic_kit(args: list[str]) -> dict:
+    """Writes a synthetic resource tree, for scale measurements.
+
+    ``synth-kit DIRECTORY [--size N] [--seed N] [--kinds skill=0.5,rule=0.2,...]
+    [--edge-density F] [--chain-depth N] [--gated F] [--placeholders-per-kb F]
+    [--body-bytes N] [--override-ratio F]``. Overrides take the names of the
+    project's built-in resources. See ``util.synthetic_kit``.
+    """
+    from common_rules_server.util.synthetic_kit import KitSpec, generate_kit
+
+    if not args or args[0].startswith("--"):
+        return {
+            "error": "No directory given.",
+            "hint": "common-rules synth-kit DIRECTORY [--size N] [--seed N] ...",
+        }
+
+    defaults = KitSpec()
+    try:
+        spec = KitSpec(
+            size=_number(args, "--size", int, defaults.size, low=0),
+            seed=_number(args, "--seed", int, defaults.seed),
+            kinds=_kind_shares(_option(args, "--kinds")) or defaults.kinds,
+            edge_density=_number(args, "--edge-density", float, defaults.edge_density, low=0),
+            chain_depth=_number(args, "--chain-depth", int, defaults.chain_depth, low=0),
+            gated_fraction=_number(args, "--gated", float, defaults.gated_fraction, low=0, high=1),
+            placeholders_per_kb=_number(
+                args, "--placeholders-per-kb", float, defaults.placeholders_per_kb, low=0
+            ),
+            body_bytes=_number(args, "--body-bytes", int, defaults.body_bytes, low=0),
+            override_ratio=_number(
+                args, "--override-ratio", float, defaults.override_ratio, low=0, high=1
+            ),
+        )
+    except ValueError as exc:
+        return {
+            "error": str(exc),
+            "hint": "common-rules synth-kit DIRECTORY [--size N] [--seed N] [--kinds skill=0.5,rule=0.2] ...",
+        }
+    built_in = sorted(
+        (record["kind"], record["name"])
+        for record in _resources().load()["resources"].values()
+        if record["source"] == "built-in"
+    )
+    return generate_kit(Path(args[0]).expanduser(), spec, built_in)
+
+
+def _number(
+    args: list[str],
+    name: str,
+    kind: type,
+    default: Any,
+    low: Optional[float] = None,
+    high: Optional[float] = None,
+) -> Any:
+    """``name``'s value as ``kind``, or ``default``. Raises ValueError naming the option."""
+    raw = _option(args, name)
+    if raw is None:
+        return default
+    try:
+        value = kind(raw)
+    except ValueError:
+        raise ValueError(f"{name} takes {'a whole number' if kind is int else 'a number'}, not {raw!r}.") from None
+    if (low is not None and value < low) or (high is not None and value > high):
+        bounds = f"between {low} and {high}" if high is not None else f"at least {low}"
+        raise ValueError(f"{name} must be {bounds}, not {raw}.")
+    return value
+
+
+def _kind_shares(raw: Optional[str]) -> Optional[dict[str, float]]:
+    """``--kinds skill=0.5,rule=0.2`` as shares by kind. Raises ValueError when malformed."""
+    if not raw:
+        return None
+    from common_rules_server.util.synthetic_kit import DEFAULT_KINDS
+
+    shares: dict[str, float] = {}
+    for pair in raw.split(","):
+        kind, _, share = pair.partition("=")
+        if kind not in DEFAULT_KINDS:
+            raise ValueError(f"--kinds names {kind!r}; kinds are {', '.join(DEFAULT_KINDS)}.")
+        try:
+            shares[kind] = float(share)
+        except ValueError:
+            raise ValueError(f"--kinds gives {kind} the share {share!r}; shares are numbers.") from None
+        if not 0 <= shares[kind] <= 1:
+            raise ValueError(f"--kinds gives {kind} the share {share}; shares are between 0 and 1.")
+    if not any(shares.values()):
+        raise ValueError("--kinds must give at least one kind a share above 0.")
+    return shares
+
+
+def _option(args: list[str], name: str) -> Optional[str]:
+    """The value following ``name`` on the command line, if it is there."""
+    if name in args and args.index(name) + 1 < len(args):
+        return args[args.index(name) + 1]
+    return None
+
+
+def _watch(service: Any, ides: Optional[list[str]], offline: bool, **options: Any) -> None:
+    """``sync --watch``: the first sync in full, then one line per edit, until interrupted."""
+    rounds = service.watch(ides, include_hooks=True, offline=offline, **options)
+    try:
+        print(json.dumps(next(rounds), indent=2), flush=True)
+        print("Watching for changes. Ctrl-C to stop.", file=sys.stderr, flush=True)
+        for result in rounds:
+            synced = result.get("synced", [])
+            print(
+                json.dumps(
+                    {
+                        "affected": result.get("affected", []),
+                        "changed": [path for target in synced for path in target["changed"]],
+                        "removed": [path for target in synced for path in target["removed"]],
+                        "duration_ms": result.get("duration_ms"),
+                    }
+                ),
+                flush=True,
+            )
+    except KeyboardInterrupt:
+        pass
 
 
 def main() -> None:
     if len(sys.argv) > 1 and sys.argv[1] == "sync":
+        from common_rules_server.service.sync_service import SyncService
+
         clean = "--clean" in sys.argv
         offline = "--offline" in sys.argv
-        ides = [a for a in sys.argv[2:] if not a.startswith("-")]
+        # --check is --plan for CI: it fails when generated files are stale.
+        check = "--check" in sys.argv
+        diff = "--diff" in sys.argv
+        plan = check or diff or "--plan" in sys.argv
+        valued = {"--snapshot", "--inline-tokens", "--always-budget"}
+        ides = [
+            a for i, a in enumerate(sys.argv[2:], 2)
+            if not a.startswith("-") and sys.argv[i - 1] not in valued
+        ]
+        limits = [_option(sys.argv, "--inline-tokens"), _option(sys.argv, "--always-budget")]
+        if any(limit is not None and not limit.isdigit() for limit in limits):
+            print(
+                json.dumps(
+                    {"error": "--inline-tokens and --always-budget take a number of tokens."},
+                    indent=2,
+                )
+            )
+            sys.exit(1)
+        options = _hybrid_options(*(None if limit is None else int(limit) for limit in limits))
         root = _project_root()
-        service = SyncService(_resources(), root)
-        if clean:
-            result = service.clean(ides or None)
-        else:
-            result = service.sync(ides or None, include_hooks=True, offline=offline)
+        # This process exits as soon as it has printed; the graph build must not.
+        service = SyncService(_resources(), root, graph="detached")
+        if "--snapshot" in sys.argv:
+            # A third export: the resolved catalogue as one file, not editor files.
+            path = _option(sys.argv, "--snapshot")
+            result = service.export_snapshot(None if not path or path.startswith("-") else path)
+            print(json.dumps(result, indent=2))
+            if not result["written"]:
+                sys.exit(1)
+            return
+        if "--watch" in sys.argv:
+            clashing = [flag for flag in ("--clean", "--plan", "--check", "--diff") if flag in sys.argv]
+            if clashing:
+                print(
+                    json.dumps(
+                        {
+                            "error": f"--watch cannot be combined with {', '.join(clashing)}.",
+                            "hint": "Watching writes on every edit; plan, check or clean in a separate run.",
+                        },
+                        indent=2,
+                    )
+                )
+                sys.exit(1)
+            _watch(service, ides or None, offline, **options)
+            return
+        with profiling.capture("cli-clean" if clean else "cli-sync"):
+            if clean:
+                result = profiling.profiled(service.clean, ides or None)
+            else:
+                result = profiling.profiled(
+                    service.sync,
+                    ides or None,
+                    include_hooks=True,
+                    offline=offline,
+                    plan=plan,
+                    diffs=diff,
+                    **options,
+                )
+        print(json.dumps(result, indent=2))
+        if check and not result.get("plan", {}).get("up_to_date", False):
+            sys.exit(1)
+        return
+
+    if len(sys.argv) > 1 and sys.argv[1] == "sync-fleet":
+        result = _sync_fleet(sys.argv[2:])
         print(json.dumps(result, indent=2))
+        if result.get("error") or result["total"]["failed"]:
+            sys.exit(1)
+        return
+
+    if len(sys.argv) > 1 and sys.argv[1] == "synth-kit":
+        result = _synthetic_kit(sys.argv[2:])
+        print(json.dumps(result, indent=2))
+        if result.get("error"):
+            sys.exit(1)
+        return
+
+    if len(sys.argv) > 1 and sys.argv[1] == "serve":
+        _serve(sys.argv[2:])
         return
 
     logger.info("common-rules orchestration server starting")
     logger.info("project root: %s", _project_root())
     logger.info(
-        "tools: get_context, get_resource, create_resource, setup_config, "
-        "get_bdd_scenario, sync_to_ide"
+        "tools: get_context, get_resource, plan_context, create_resource, "
+        "setup_config, get_bdd_scenario, sync_to_ide, get_server_stats"
     )
     mcp.run()
 
@@ -0,0 +1,162 @@
+"""One long-lived catalogue per project, and loading it before it is asked for.
+
+A ``ResourceService`` keeps its parsed catalogue, and every index derived from
+it, for as long as the files and configuration behind it are unchanged — but
+only while the service itself lives. Built fresh for every call, it parsed the
+whole kit on every call. This registry keeps one per project root, so the parse
+is paid once and every later call costs a signature check.
+
+Keeping it is safe because the signature check runs on every load: an edited
+resource, template or config value invalidates the catalogue the next time
+anything reads it, whether or not the registry was involved.
+
+A process serving many projects cannot keep every one of them. The registry
+holds the most recently used, within a count and an estimated memory ceiling,
+and drops the least recently used first. An evicted project costs one parse the
+next time it is used, nothing more.
+
+Warm-up moves the first parse off the first call. When the server is told which
+project it serves, it can load that catalogue — and its integrity report and
+planning index — while the agent is still reading the tool list. A call that
+arrives while the warm-up is running waits for it rather than parsing the same
+files a second time beside it.
+"""
+
+import contextvars
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, wait
+from typing import Any, Optional
+
+from common_rules_server.service.config_service import ConfigService
+from common_rules_server.service.resource_service import ResourceService
+from common_rules_server.util.workers import executor
+
+logger = logging.getLogger(__name__)
+
+#: Environment flag that turns warm-up on. Off by default: it spends start-up
+#: CPU on a catalogue the session may never read.
+WARMUP_ENV = "COMMON_RULES_WARMUP"
+
+#: Environment overrides for the registry's ceilings.
+MAX_PROJECTS_ENV = "COMMON_RULES_MAX_PROJECTS"
+CACHE_MB_ENV = "COMMON_RULES_CACHE_MB"
+
+DEFAULT_MAX_PROJECTS = 32
+DEFAULT_CACHE_MB = 256
+
+
+class CatalogueRegistry:
+    def __init__(self, max_projects: Optional[int] = None, max_bytes: Optional[int] = None) -> None:
+        self.max_projects = max_projects or _positive_int(MAX_PROJECTS_ENV, DEFAULT_MAX_PROJECTS)
+        self.max_bytes = max_bytes or _positive_int(CACHE_MB_ENV, DEFAULT_CACHE_MB) * 1024 * 1024
+        self._services: OrderedDict[str, ResourceService] = OrderedDict()
+        self._warm_ups: dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def resources(self, project_root: str) -> ResourceService:
+        """The project's long-lived service, once any running warm-up of it is done.
+
+        Only a warm-up that is already running is waited for. One still queued
+        behind this call may be waiting for the very thread this call holds, so
+        the call loads for itself and the warm-up later finds the work done.
+        """
+        service = self._service(project_root)
+        warm_up = self._warm_ups.get(str(project_root))
+        if warm_up is not None and warm_up.running():
+            wait([warm_up])
+        return service
+
+    def start_warm_up(self, project_root: str) -> Future:
+        """Schedules a warm-up of ``project_root`` on the worker pool.
+
+        Returns the warm-up already in flight for that project when there is
+        one, so a second request for the same work is not a second parse.
+        """
+        key = str(project_root)
+        with self._lock:
+            current = self._warm_ups.get(key)
+            if current is not None and not current.done():
+                return current
+            context = contextvars.copy_context()
+            future = executor().submit(context.run, self.warm, key)
+            self._warm_ups[key] = future
+            return future
+
+    def warm(self, project_root: str) -> dict[str, Any]:
+        """Loads the catalogue and builds what the first calls will ask for.
+
+        Best effort: a failure is logged and left for the first real call to
+        meet and report, rather than raised into a task nobody is waiting on.
+        """
+        started = time.perf_counter()
+        try:
+            resources = self._service(project_root)
+            catalogue = resources.load()
+            resources.check_integrity()
+
+            from common_rules_server.service.planner_service import PlannerService
+
+            PlannerService(resources).index()
+        except Exception:  # noqa: BLE001 - warm-up must never take the server down
+            logger.exception("warm-up of %s failed", project_root)
+            return {"project_root": project_root, "warmed": False}
+
+        elapsed = round((time.perf_counter() - started) * 1000, 1)
+        logger.info(
+            "catalogue for %s warmed in %.0f ms (%d resources)",
+            project_root,
+            elapsed,
+            len(catalogue["resources"]),
+        )
+        return {
+            "project_root": project_root,
+            "warmed": True,
+            "resources": len(catalogue["resources"]),
+            "elapsed_ms": elapsed,
+        }
+
+    def stats(self) -> dict[str, Any]:
+        """What the registry holds right now, against its ceilings."""
+        with self._lock:
+            services = list(self._services.items())
+        return {
+            "projects": len(services),
+            "max_projects": self.max_projects,
+            "catalogue_bytes": sum(service.footprint() for _, service in services),
+            "max_bytes": self.max_bytes,
+            "loaded": [root for root, service in services if service.footprint()],
+        }
+
+    def _service(self, project_root: str) -> ResourceService:
+        key = str(project_root)
+        with self._lock:
+            service = self._services.get(key)
+            if service is None:
+                service = self._services[key] = ResourceService(ConfigService(key))
+            self._services.move_to_end(key)
+            self._evict()
+            return service
+
+    def _evict(self) -> None:
+        """Drops least recently used projects until both ceilings hold.
+
+        The project just asked for is never dropped, however large. A catalogue
+        is only measured once loaded, so a new one counts from its next use.
+        """
+        while len(self._services) > 1:
+            over_count = len(self._services) > self.max_projects
+            over_size = sum(s.footprint() for s in self._services.values()) > self.max_bytes
+            if not (over_count or over_size):
+                return
+            evicted, _ = self._services.popitem(last=False)
+            self._warm_ups.pop(evicted, None)
+            logger.info("dropped cached catalogue for %s", evicted)
+
+
+def _positive_int(variable: str, default: int) -> int:
+    configured = os.environ.get(variable, "").strip()
+    return int(configured) if configured.isdigit() and int(configured) > 0 else default
@@ -413,8 +413,8 @@ class ConfigService:
 
         extra = {k: v for k, v in file_values.items() if k not in SCHEMA_BY_NAME}
 
-        _atomic_write(self.env_file, self.render_config_file(to_write, extra))
-        _ensure_gitignore(self.config_dir)
+        atomic_write(self.env_file, self.render_config_file(to_write, extra))
+        ensure_gitignore(self.config_dir)
 
         return self.get_config()
 
@@ -434,7 +434,7 @@ def _wrap(text: str, width: int) -> list[str]:
     return lines or [""]
 
 
-def _atomic_write(path: Path, content: str) -> None:
+def atomic_write(path: Path, content: str) -> None:
     """Writes via a temp file in the same directory, then renames.
 
     A partial write here would leave the project without usable configuration,
@@ -451,7 +451,7 @@ def _atomic_write(path: Path, content: str) -> None:
         raise
 
 
-def _ensure_gitignore(config_dir: Path) -> None:
+def ensure_gitignore(config_dir: Path) -> None:
     """Keeps generated state out of git while keeping config itself in it.
 
     The config file is worth committing — it describes the project. Anything the
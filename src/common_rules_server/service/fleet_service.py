@@ -0,0 +1,155 @@
+"""Exporting the kit into many repositories in one run.
+
+Keeping dozens of service repositories in step meant running ``common-rules
+sync`` in each of them: a process per repository, each one starting Python and
+parsing the whole built-in kit before writing anything. The built-in kit is
+the same for all of them; only each project's own resources and configuration
+differ.
+
+A fleet sync hands the projects to a pool of worker processes, and each worker
+parses the built-in layer once, as it starts, so a project costs its own
+overlay and its writes. Processes rather than threads, because rendering is
+Python string work that a thread pool would serialise on the GIL.
+
+Workers come from a fork server where the platform has one, and are spawned
+otherwise — never forked from this process. The caller is usually threaded (the
+server's worker pool, a graph build), and a fork copies whatever lock another
+thread held at that instant into a child that can never release it.
+
+A project that fails is reported and counted; it does not stop the others.
+Nor does a worker that dies — killed, out of memory — partway through: its
+project, and any the broken pool could no longer run, are reported as failed
+and the summary is still returned.
+Workers start no code-review-graph build: one per repository at once would
+swamp the machine, and a worker's builds would end with its pool.
+"""
+
+import glob
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Optional
+
+from common_rules_server.service.config_service import ConfigService
+from common_rules_server.service.resource_service import ResourceService, parse_built_in
+from common_rules_server.service.sync_service import SyncService
+
+
+class FleetService:
+    def __init__(self, jobs: Optional[int] = None):
+        self.jobs = jobs
+
+    def sync(
+        self,
+        roots: list[str],
+        ides: Optional[list[str]] = None,
+        include_hooks: bool = True,
+        offline: bool = False,
+    ) -> dict[str, Any]:
+        """Syncs every project in ``roots``; a summary per project and a total."""
+        if not roots:
+            return {
+                "projects": [],
+                "error": "No project given.",
+                "hint": "Name project roots, a glob such as 'services/*', or --from FILE.",
+            }
+
+        started = time.perf_counter()
+        jobs = max(1, min(self.jobs or os.cpu_count() or 1, len(roots)))
+        args = [(root, ides, include_hooks, offline) for root in roots]
+        if jobs == 1:
+            parse_built_in()
+            projects = [_sync_project(*arg) for arg in args]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=jobs, mp_context=_context(), initializer=parse_built_in
+            ) as pool:
+                futures = [pool.submit(_sync_project, *arg) for arg in args]
+                projects = [_outcome(future, arg[0]) for future, arg in zip(futures, args)]
+
+        failed = [p for p in projects if not p["ok"]]
+        return {
+            "projects": projects,
+            "total": {
+                "projects": len(projects),
+                "failed": len(failed),
+                "changed": sum(p.get("changed", 0) for p in projects),
+                "removed": sum(p.get("removed", 0) for p in projects),
+                "jobs": jobs,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            },
+        }
+
+
+def expand_roots(patterns: list[str], listing: Optional[str] = None) -> list[str]:
+    """Project roots from paths, globs and a file listing one per line.
+
+    Blank lines and ``#`` comments in the listing are skipped. A glob keeps only
+    the directories it matches. Each root appears once, in the order given.
+    """
+    entries = list(patterns)
+    if listing:
+        for line in Path(listing).read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if line and not line.startswith("#"):
+                entries.append(line)
+
+    roots: list[str] = []
+    for entry in entries:
+        expanded = os.path.expanduser(entry)
+        if glob.has_magic(expanded):
+            matches = [m for m in sorted(glob.glob(expanded)) if os.path.isdir(m)]
+        else:
+            matches = [expanded]
+        for match in matches:
+            root = str(Path(match).resolve())
+            if root not in roots:
+                roots.append(root)
+    return roots
+
+
+def _sync_project(
+    root: str, ides: Optional[list[str]], include_hooks: bool, offline: bool
+) -> dict[str, Any]:
+    """One project's sync, reduced to what a fleet summary needs. Runs in a worker."""
+    started = time.perf_counter()
+    summary: dict[str, Any] = {"project": root}
+    try:
+        if not Path(root).is_dir():
+            raise FileNotFoundError(f"no such directory: {root}")
+        resources = ResourceService(ConfigService(root))
+        # A graph build per repository, all at once, would swamp the machine;
+        # and a worker exits when the pool does, taking its builds with it.
+        service = SyncService(resources, root, graph="skip")
+        result = service.sync(ides, include_hooks=include_hooks, offline=offline)
+    except Exception as exc:  # one broken repository must not end the run
+        summary.update(ok=False, error=f"{type(exc).__name__}: {exc}")
+    else:
+        synced = result.get("synced", [])
+        summary.update(
+            ok=not result.get("error"),
+            editors=[target["ide"] for target in synced],
+            changed=sum(len(target["changed"]) for target in synced),
+            removed=sum(len(target["removed"]) for target in synced),
+        )
+        if result.get("error"):
+            summary["error"] = result["error"]
+    summary["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    return summary
+
+
+def _outcome(future: Future, root: str) -> dict[str, Any]:
+    """The worker's summary, or a failed one when the worker never returned it."""
+    try:
+        return future.result()
+    except Exception as exc:  # a dead worker breaks the pool, not the run
+        return {"project": root, "ok": False, "error": f"worker failed: {type(exc).__name__}: {exc}"}
+
+
+def _context() -> Any:
+    """A fork server where the platform has one; the platform's default otherwise."""
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context()
@@ -45,6 +45,9 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any, Optional
 
+from common_rules_server.util.change_plan import ChangePlan
+from common_rules_server.util.tracing import span
+
 MANAGED_MARKER = "common-rules:managed-hook"
 
 CANONICAL_EVENTS = (
@@ -246,14 +249,18 @@ TARGETS_BY_KEY = {target.key: target for target in HOOK_TARGETS}
 class HookService:
     """Generates native hook configuration and scripts from hook resources."""
 
-    def __init__(self, project_root: Optional[str] = None):
+    def __init__(self, project_root: Optional[str] = None, plan: Optional[ChangePlan] = None):
         self.project_root = Path(project_root) if project_root else Path(os.getcwd())
+        #: When set, changes are recorded here instead of made.
+        self.plan = plan
 
     def install(self, hooks: list[dict], ides: Optional[list[str]] = None) -> dict[str, Any]:
         """Writes hooks for each requested editor.
 
         ``hooks`` are parsed hook resources, each carrying its canonical event
-        and a script body.
+        and a script body. Files already holding what would be written are left
+        untouched, and generated scripts for hooks no longer in ``hooks`` are
+        removed, so installing over an earlier install needs no uninstall first.
         """
         selected = [TARGETS_BY_KEY[k] for k in ides if k in TARGETS_BY_KEY] if ides else list(HOOK_TARGETS)
 
@@ -272,7 +279,8 @@ class HookService:
                         }
                     )
             try:
-                written = self._install_for(target, supported)
+                with span("hooks", ide=target.key):
+                    written = self._install_for(target, supported)
                 result["installed"].append(written)
             except OSError as exc:
                 result["failed"].append({"ide": target.key, "error": str(exc)})
@@ -281,9 +289,8 @@ class HookService:
 
     def _install_for(self, target: IdeHookTarget, hooks: list[dict]) -> dict[str, Any]:
         scripts_dir = self.project_root / target.scripts_dir
-        scripts_dir.mkdir(parents=True, exist_ok=True)
-
         scripts = []
+        changed = []
         for hook in hooks:
             mapping = target.events[hook["event"]]
             if hook.get("raw_command"):
@@ -298,30 +305,39 @@ class HookService:
                 claude_event=mapping.native,
             )
             path = scripts_dir / f"{hook['name']}.sh"
-            path.write_text(script, encoding="utf-8")
-            _make_executable(path)
-            scripts.append(str(path.relative_to(self.project_root)))
+            relative = str(path.relative_to(self.project_root))
+            if self._put(path, script):
+                changed.append(relative)
+            if self.plan is None:
+                _make_executable(path)
+            scripts.append(relative)
+
+        for stale in sorted(scripts_dir.glob("*.sh")):
+            if str(stale.relative_to(self.project_root)) not in scripts and self._remove_managed(stale):
+                changed.append(str(stale.relative_to(self.project_root)))
 
         config_path = self.project_root / target.config_path
-        config_path.parent.mkdir(parents=True, exist_ok=True)
 
         if target.key == "cursor":
-            self._write_cursor(config_path, target, hooks)
+            config_changed = self._write_cursor(config_path, target, hooks)
         elif target.key == "claude":
-            self._write_claude(config_path, target, hooks)
+            config_changed = self._write_claude(config_path, target, hooks)
         else:
-            self._write_antigravity(config_path, target, hooks)
+            config_changed = self._write_antigravity(config_path, target, hooks)
+        if config_changed:
+            changed.append(target.config_path)
 
         return {
             "ide": target.key,
             "config": target.config_path,
             "scripts": scripts,
             "hook_count": len(hooks),
+            "changed": changed,
         }
 
     # ------------------------------------------------------------- writers
 
-    def _write_cursor(self, path: Path, target: IdeHookTarget, hooks: list[dict]) -> None:
+    def _write_cursor(self, path: Path, target: IdeHookTarget, hooks: list[dict]) -> bool:
         existing = _read_json(path) or {}
         events: dict[str, list] = {}
 
@@ -350,9 +366,9 @@ class HookService:
 
         existing["version"] = 1
         existing["hooks"] = events
-        _write_json(path, existing)
+        return self._put_json(path, existing)
 
-    def _write_claude(self, path: Path, target: IdeHookTarget, hooks: list[dict]) -> None:
+    def _write_claude(self, path: Path, target: IdeHookTarget, hooks: list[dict]) -> bool:
         """Claude keeps hooks inside settings.json, which holds unrelated keys.
 
         Only the hooks this server generated are replaced; every other setting
@@ -389,9 +405,9 @@ class HookService:
             events.setdefault(mapping.native, []).append(group)
 
         settings["hooks"] = events
-        _write_json(path, settings)
+        return self._put_json(path, settings)
 
-    def _write_antigravity(self, path: Path, target: IdeHookTarget, hooks: list[dict]) -> None:
+    def _write_antigravity(self, path: Path, target: IdeHookTarget, hooks: list[dict]) -> bool:
         """Antigravity names hooks at the top level, one key per hook."""
         existing = _read_json(path) or {}
         preserved = {
@@ -422,7 +438,7 @@ class HookService:
                 ]
             }
 
-        _write_json(path, preserved)
+        return self._put_json(path, preserved)
 
     # ------------------------------------------------------------- removal
 
@@ -441,14 +457,51 @@ class HookService:
                     self._write_antigravity(config_path, target, [])
             scripts_dir = self.project_root / target.scripts_dir
             if scripts_dir.is_dir():
-                for script in scripts_dir.glob("*.sh"):
-                    if MANAGED_MARKER in script.read_text(encoding="utf-8", errors="replace"):
-                        script.unlink()
+                for script in sorted(scripts_dir.glob("*.sh")):
+                    if self._remove_managed(script):
                         removed.append(str(script.relative_to(self.project_root)))
-                if not any(scripts_dir.iterdir()):
+                if self.plan is None and not any(scripts_dir.iterdir()):
                     scripts_dir.rmdir()
         return {"removed": removed}
 
+    # -------------------------------------------------------------- output
+
+    def _put(self, path: Path, content: str) -> bool:
+        """Writes ``content`` unless the file already holds it; whether it differed."""
+        try:
+            before: Optional[str] = path.read_text(encoding="utf-8")
+        except OSError:
+            before = None
+        if self.plan is not None:
+            return self.plan.note(str(path.relative_to(self.project_root)), before, content)
+        if before == content:
+            return False
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+        return True
+
+    def _put_json(self, path: Path, data: dict) -> bool:
+        """Writes ``data`` unless the file already holds it; whether it differed.
+
+        Compared as data, not text, so a hand-formatted file that already says
+        the same thing is not reformatted.
+        """
+        if path.exists() and _read_json(path) == data:
+            if self.plan is not None:
+                self.plan.note(str(path.relative_to(self.project_root)), "", "")
+            return False
+        return self._put(path, json.dumps(data, indent=2) + "\n")
+
+    def _remove_managed(self, script: Path) -> bool:
+        """Deletes a script if this server generated it; whether it did."""
+        text = script.read_text(encoding="utf-8", errors="replace")
+        if MANAGED_MARKER not in text:
+            return False
+        if self.plan is not None:
+            return self.plan.note(str(script.relative_to(self.project_root)), text, None)
+        script.unlink()
+        return True
+
 
 _MANAGED_COMMANDS = ("context-mode", "code-review-graph")
 
@@ -485,10 +538,8 @@ def _read_json(path: Path) -> Optional[dict]:
     return data if isinstance(data, dict) else None
 
 
-def _write_json(path: Path, data: dict) -> None:
-    path.write_text(json.dumps(data, indent=2) + "\n", encoding="utf-8")
-
-
 def _make_executable(path: Path) -> None:
     mode = os.stat(path).st_mode
-    os.chmod(path, mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    wanted = mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH
+    if wanted != mode:
+        os.chmod(path, wanted)
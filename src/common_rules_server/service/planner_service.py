@@ -0,0 +1,266 @@
+"""Choosing which resources to read for a task, within a token budget.
+
+``get_context`` tells an agent what exists; it does not tell it what to read.
+Left to itself an agent either reads too little and misses the skill that
+applies, or reads everything that looks plausible and spends its context on
+instructions it never uses. This service makes the choice explicitly: it ranks
+resources against the task, prices each one in tokens, and picks the most useful
+set that fits.
+
+Three things decide the plan:
+
+* **Relevance.** BM25 over name, description and body — see
+  ``util.relevance``. A resource linked to a relevant one inherits a share of
+  its score, because the process lives in the edges: a task about testing is
+  also a task about whatever the testing skill hands over to.
+* **Cost.** What ``get_resource`` would return — instructions plus output
+  template — estimated in tokens.
+* **Required edges.** An edge marked required is not optional, so selecting a
+  resource selects everything it requires, transitively, and the whole group is
+  priced together. A resource whose requirements do not fit is not offered on
+  its own; a plan that silently drops a required step is worse than a shorter
+  plan.
+
+Everything the planner needs is indexed once per catalogue version, so planning
+is a handful of dictionary lookups and cheap enough to run at the start of every
+task. Selection keeps the candidates in a heap by value per token; a pick
+re-prices only the groups that shared a resource with it, so a plan costs
+``O(n log n)`` in the candidates rather than a rescan of all of them per pick.
+"""
+
+import heapq
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from common_rules_server.service.resource_service import ResourceService
+from common_rules_server.util.relevance import RelevanceIndex, estimate_tokens
+
+#: Share of a neighbour's relevance a resource inherits.
+GRAPH_WEIGHT = 0.3
+
+#: Hooks are enforced by the editor, not read by the agent, so they never belong
+#: in a reading plan.
+UNPLANNED_KINDS = ("hook",)
+
+#: How many candidates that did not fit are reported back.
+OMITTED_LIMIT = 10
+
+
+@dataclass(frozen=True)
+class PlanIndex:
+    """Everything planning needs, precomputed from one catalogue version."""
+
+    relevance: RelevanceIndex
+    #: Estimated tokens of what ``get_resource`` returns for each resource.
+    tokens: dict[str, int]
+    #: Undirected neighbours, for score propagation.
+    neighbours: dict[str, frozenset[str]]
+    #: Each resource's required closure, itself first, in breadth-first order.
+    required: dict[str, tuple[str, ...]]
+    #: The resources whose required closure contains each resource.
+    required_by: dict[str, frozenset[str]]
+
+
+class PlannerService:
+    def __init__(self, resources: ResourceService):
+        self.resources = resources
+
+    # ----------------------------------------------------------------- index
+
+    def index(self) -> PlanIndex:
+        return self.resources.derived("plan_index", self._build_index)
+
+    def _build_index(self, catalogue: dict) -> PlanIndex:
+        records = {
+            key: record
+            for key, record in catalogue["resources"].items()
+            if record["kind"] not in UNPLANNED_KINDS
+        }
+        by_name: dict[str, list[str]] = {}
+        for key, record in records.items():
+            by_name.setdefault(record["name"], []).append(key)
+
+        templates = self.resources.templates()
+        documents: dict[str, dict[str, str]] = {}
+        tokens: dict[str, int] = {}
+        edges: dict[str, list[tuple[str, bool]]] = {}
+        for key, record in records.items():
+            documents[key] = {
+                "name": record["name"].replace("-", " "),
+                "description": record.get("description", ""),
+                "body": record.get("body", ""),
+            }
+            output = (record.get("relationships") or {}).get("output")
+            template = templates.get(Path(str(output)).name) if output else None
+            tokens[key] = estimate_tokens(record.get("body", "")) + estimate_tokens(template or "")
+            edges[key] = [
+                (target, edge.required)
+                for edge in record.edges
+                for target in _resolve(edge.target, record.kind, by_name, records)
+            ]
+
+        neighbours: dict[str, set[str]] = {key: set() for key in records}
+        for key, targets in edges.items():
+            for target, _ in targets:
+                if target != key:
+                    neighbours[key].add(target)
+                    neighbours[target].add(key)
+
+        required: dict[str, tuple[str, ...]] = {}
+        for key in records:
+            closure, queue = [key], [key]
+            while queue:
+                for target, is_required in edges[queue.pop(0)]:
+                    if is_required and target not in closure:
+                        closure.append(target)
+                        queue.append(target)
+            required[key] = tuple(closure)
+        required_by: dict[str, set[str]] = {key: set() for key in records}
+        for key, closure in required.items():
+            for member in closure:
+                required_by[member].add(key)
+
+        return PlanIndex(
+            relevance=RelevanceIndex(documents),
+            tokens=tokens,
+            neighbours={key: frozenset(value) for key, value in neighbours.items()},
+            required=required,
+            required_by={key: frozenset(value) for key, value in required_by.items()},
+        )
+
+    # ------------------------------------------------------------------ plan
+
+    def plan(self, task: str, budget_tokens: int, inline: bool = False) -> dict[str, Any]:
+        """The most useful set of resources for ``task`` that fits the budget."""
+        if not str(task or "").strip():
+            return {
+                "error": "A task description is required.",
+                "hint": "Describe the work in a sentence; the plan is ranked against it.",
+            }
+        try:
+            budget = int(budget_tokens)
+        except (TypeError, ValueError):
+            budget = 0
+        if budget <= 0:
+            return {
+                "error": f"budget_tokens must be a positive whole number, received {budget_tokens!r}.",
+                "hint": "Pass the number of tokens you can spend on instructions for this task.",
+            }
+
+        index = self.index()
+        relevance = index.relevance.score(task)
+        value = {
+            key: relevance.get(key, 0.0)
+            + GRAPH_WEIGHT * max((relevance.get(n, 0.0) for n in index.neighbours[key]), default=0.0)
+            for key in index.tokens
+        }
+        candidates = {key for key, score in value.items() if score > 0}
+
+        groups: list[tuple[str, tuple[str, ...]]] = []
+        reasons: dict[str, str] = {}
+        remaining = budget
+        # Best value per token first, ties by key. An entry is stale once its
+        # group has been re-priced; ``version`` says which entry is current.
+        heap: list[tuple[float, str, int, tuple[str, ...], int]] = []
+        version: dict[str, int] = {}
+
+        def price(key: str) -> None:
+            group = tuple(k for k in index.required[key] if k not in reasons)
+            cost = sum(index.tokens[k] for k in group)
+            ratio = sum(value[k] for k in group) / max(cost, 1)
+            version[key] = version.get(key, 0) + 1
+            heapq.heappush(heap, (-ratio, key, version[key], group, cost))
+
+        for key in candidates:
+            price(key)
+        while heap:
+            _, best, seen, best_group, cost = heapq.heappop(heap)
+            if best not in candidates or seen != version[best]:
+                continue
+            if cost > remaining:
+                # The budget only shrinks, so this fits again only if a later
+                # pick takes part of its group — which prices it afresh.
+                continue
+            for key in best_group:
+                if key != best:
+                    reasons[key] = f"required by {_ref(best)}"
+                elif relevance.get(key):
+                    reasons[key] = "matched the task"
+                else:
+                    reasons[key] = "linked to a resource that matched the task"
+                remaining -= index.tokens[key]
+                candidates.discard(key)
+            groups.append((best, best_group))
+            for key in {k for picked in best_group for k in index.required_by[picked]} & candidates:
+                price(key)
+
+        # Selection runs by value per token, which is the right way to fill a
+        # budget and the wrong order to read in. The plan reads most relevant
+        # first, each resource followed by what it requires.
+        groups.sort(key=lambda group: (-value[group[0]], group[0]))
+        selected = [key for _, group in groups for key in group]
+
+        catalogue = self.resources.load()
+        steps = []
+        for position, key in enumerate(selected, start=1):
+            record = catalogue["resources"][key]
+            step = {
+                "step": position,
+                "kind": record["kind"],
+                "name": record["name"],
+                "tokens": index.tokens[key],
+                "score": round(value[key], 3),
+                "reason": reasons[key],
+                "call": f'get_resource(kind="{record["kind"]}", name="{record["name"]}")',
+            }
+            if inline:
+                full = self.resources.get_resource(record["kind"], record["name"])
+                step["body"] = full.get("body")
+                step["template"] = full.get("template")
+            steps.append(step)
+
+        omitted = sorted(candidates, key=lambda k: (-value[k], k))[:OMITTED_LIMIT]
+        return {
+            "task": task,
+            "budget_tokens": budget,
+            "used_tokens": budget - remaining,
+            "remaining_tokens": remaining,
+            "plan": steps,
+            "omitted": [
+                {
+                    "kind": catalogue["resources"][key]["kind"],
+                    "name": catalogue["resources"][key]["name"],
+                    "tokens": sum(
+                        index.tokens[k] for k in index.required[key] if k not in reasons
+                    ),
+                    "score": round(value[key], 3),
+                    "reason": "does not fit the remaining budget with its required edges",
+                }
+                for key in omitted
+            ],
+            "usage": (
+                "Read the plan in order. Each step is one get_resource call unless the "
+                "plan was inlined. Steps marked 'required by' belong to the step that "
+                "pulled them in and are not optional."
+            ),
+        }
+
+
+def _resolve(target: str, kind: str, by_name: dict[str, list[str]], records: dict) -> list[str]:
+    """The resources an edge's ``/name`` points at.
+
+    Names are unique per kind, not across kinds — ``/orchestrator`` is both a
+    rule and an agent. A resource of the referring kind wins when there is one;
+    otherwise every resource of that name is meant, since the edge cannot say
+    which.
+    """
+    if not target.startswith("/"):
+        return []
+    keys = by_name.get(target[1:], [])
+    same_kind = [key for key in keys if records[key]["kind"] == kind]
+    return same_kind or keys
+
+
+def _ref(key: str) -> str:
+    return "/" + key.split(":", 1)[1]
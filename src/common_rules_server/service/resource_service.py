@@ -13,39 +13,71 @@ Two behaviours here are worth calling out because getting them wrong is silent:
 * **Optional resources** declare a ``gate`` naming a config flag. They stay out
   of the catalogue until that flag is on, so a project that does not use
   notebooks never sees notebook instructions.
+
+With ``COMMON_RULES_SNAPSHOT`` set, the catalogue comes from that snapshot file
+instead (see ``util.catalogue_snapshot``): already resolved, with no Markdown
+read. It is reloaded when the file changes.
 """
 
 import logging
+import os
 import re
 from pathlib import Path
-from typing import Any, Optional
+from collections.abc import Mapping
+from typing import Any, Callable, Optional
 
 from common_rules_server.service.config_service import ConfigService
-from common_rules_server.util import placeholders
+from common_rules_server.util import catalogue_snapshot, placeholders
+from common_rules_server.util.metrics import metrics
+from common_rules_server.util.resource_record import ResourceRecord
 from common_rules_server.util.resource_parsing import (
     VALID_KINDS,
+    ParsedResource,
     extract_script,
+    index_sections,
     parse_resource,
 )
+from common_rules_server.util.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
 TEMPLATES_DIRNAME = "templates"
+#: A catalogue snapshot to serve instead of loading the kit.
+SNAPSHOT_ENV = "COMMON_RULES_SNAPSHOT"
 SAFE_NAME = re.compile(r"\A[a-z0-9]+(-[a-z0-9]+)*\Z")
 
+# Catalogue and index builds in progress, shared by every instance: two services
+# over the same project at the same signature build identical results, so the
+# second waits for the first instead of parsing beside it.
+_builds = SingleFlight()
+
+# Parsed built-in files by path, with the (mtime, size) they were parsed at.
+# Every project in the process reads the same built-in kit, and parsing is what
+# a load costs; only resolution against each project's configuration differs.
+_built_in_parses: dict[str, tuple[tuple[int, int], ParsedResource]] = {}
+
+#: The kit that ships with the package.
+BUILT_IN_DIR = Path(__file__).resolve().parent.parent / "resources"
+
+#: Allowance for everything in a record besides its text, in the footprint
+#: estimate: the record's slots, header dicts, section index.
+RECORD_OVERHEAD_BYTES = 1536
+
 
 class ResourceService:
     def __init__(
         self,
         config_service: ConfigService,
         built_in_dir: Optional[str] = None,
+        snapshot: Optional[str] = None,
     ):
         self.config_service = config_service
-        self.built_in_dir = (
-            Path(built_in_dir) if built_in_dir else Path(__file__).resolve().parent.parent / "resources"
-        )
-        self._cache: Optional[dict] = None
-        self._cache_signature: Optional[tuple] = None
+        self.built_in_dir = Path(built_in_dir) if built_in_dir else BUILT_IN_DIR
+        snapshot = snapshot or os.environ.get(SNAPSHOT_ENV, "").strip()
+        self.snapshot_path = Path(snapshot) if snapshot else None
+        self._cache: Optional[tuple[tuple, dict]] = None
+        self._derived: dict[str, tuple[dict, Any]] = {}
+        self._footprint: Optional[tuple[dict, int]] = None
 
     # ---------------------------------------------------------------- paths
 
@@ -75,26 +107,86 @@ class ResourceService:
     # --------------------------------------------------------------- loading
 
     def _signature(self, config: dict) -> tuple:
-        """Cheap fingerprint of everything that can change the catalogue."""
+        """Cheap fingerprint of everything that can change the catalogue.
+
+        Templates are included although they are not resources: the integrity
+        report, derived from the catalogue, says which ones are missing.
+
+        Served from a snapshot, the snapshot file is the only input.
+        """
+        if self.snapshot_path is not None:
+            try:
+                stamp = self.snapshot_path.stat().st_mtime_ns
+            except OSError:
+                stamp = 0
+            return (((str(self.snapshot_path), stamp),), ())
+        paths = [
+            *self._resource_files(self.built_in_dir),
+            *self._resource_files(self._resources_dir(config)),
+            *(sorted(self.templates_dir.glob("*")) if self.templates_dir.is_dir() else []),
+        ]
         stamps = []
-        for root in (self.built_in_dir, self._resources_dir(config)):
-            for path in self._resource_files(root):
-                try:
-                    stamps.append((str(path), path.stat().st_mtime_ns))
-                except OSError:
-                    continue
+        for path in paths:
+            try:
+                stamps.append((str(path), path.stat().st_mtime_ns))
+            except OSError:
+                continue
         return (tuple(stamps), tuple(sorted(config.items())))
 
     def load(self, force: bool = False) -> dict[str, Any]:
-        """Loads the resource catalogue, reusing the cache when nothing changed."""
+        """Loads the resource catalogue, reusing the cache when nothing changed.
+
+        Freshness is checked on every call, so a call never sees a catalogue
+        older than the files it started with. Only the parse is shared: callers
+        that find the same change at the same time parse it once between them.
+        """
+        return self._load(force)[1]
+
+    def load_signed(self) -> tuple[tuple, dict[str, Any]]:
+        """The catalogue, with the signature it was built at.
+
+        The signature changes whenever the catalogue would — any resource or
+        template file, or the configuration — so it can stand in for the
+        catalogue when deciding whether output rendered from it is current.
+        """
+        return self._load()
+
+    def signature(self) -> tuple:
+        """What ``load_signed`` would be signed with now, without loading anything.
+
+        Only files are stat'ed, so polling this is how a watcher notices an edit.
+        """
+        return self._signature(self.config_service.get_config()["config"])
+
+    def _load(self, force: bool = False) -> tuple[tuple, dict]:
+        """The catalogue together with the signature it was built at."""
         resolved = self.config_service.get_config()
-        config = resolved["config"]
-        signature = self._signature(config)
+        signature = self._signature(resolved["config"])
+
+        cached = self._cache
+        if not force and cached is not None and cached[0] == signature:
+            metrics.count("catalogue.hits")
+            return cached
+
+        metrics.count("catalogue.misses")
+        if force:
+            catalogue = self._build(resolved)
+        else:
+            catalogue = _builds.do(
+                self._build_key("catalogue", signature), lambda: self._build(resolved)
+            )
+        self._cache = (signature, catalogue)
+        return self._cache
 
-        if not force and self._cache is not None and signature == self._cache_signature:
-            return self._cache
+    def _build_key(self, *parts: Any) -> tuple:
+        return (str(self.project_root), str(self.built_in_dir), *parts)
 
-        resources: dict[str, dict] = {}
+    def _build(self, resolved: dict) -> dict[str, Any]:
+        metrics.count("catalogue.reparses" if self._cache is not None else "catalogue.loads")
+        if self.snapshot_path is not None:
+            return self._build_from_snapshot(resolved)
+        config = resolved["config"]
+        resources: dict[str, ResourceRecord] = {}
         problems: list[dict] = []
         skipped_gated: list[dict] = []
 
@@ -103,67 +195,101 @@ class ResourceService:
             ("project", self._resources_dir(config)),
         ):
             for path in self._resource_files(root):
-                record = self._load_file(path, source, config)
-                if record is None:
-                    continue
-                if "error" in record:
+                record = self._load_file(path, source)
+                if not isinstance(record, ResourceRecord):
                     problems.append(record)
                     continue
-                if record.pop("_gated_out", False):
+                if record.get("gate") and not self.config_service.is_enabled(record.gate):
                     skipped_gated.append(
-                        {"kind": record["kind"], "name": record["name"], "gate": record["gate"]}
+                        {"kind": record.kind, "name": record.name, "gate": record.gate}
                     )
                     continue
+                _resolve(record, config)
 
-                key = f"{record['kind']}:{record['name']}"
+                key = f"{record.kind}:{record.name}"
                 if key in resources and source == "project":
-                    record["overrides"] = resources[key]["file"]
+                    record.overrides = resources[key].file
                 resources[key] = record
 
-        catalogue = {
+        return {
             "config": config,
             "env_status": resolved["env_status"],
             "resources": resources,
             "problems": problems,
             "gated_out": skipped_gated,
         }
-        self._cache = catalogue
-        self._cache_signature = signature
-        return catalogue
 
-    def _load_file(self, path: Path, source: str, config: dict) -> Optional[dict]:
+    def _build_from_snapshot(self, resolved: dict) -> dict[str, Any]:
+        """The snapshot's catalogue; an empty one with the reason when it is unusable."""
         try:
-            text = path.read_text(encoding="utf-8")
+            return catalogue_snapshot.Snapshot.open(self.snapshot_path).catalogue()
+        except (OSError, ValueError) as exc:
+            return {
+                "config": resolved["config"],
+                "env_status": resolved["env_status"],
+                "resources": {},
+                "problems": [{"file": str(self.snapshot_path), "error": f"unusable snapshot: {exc}"}],
+                "gated_out": [],
+                "templates": {},
+            }
+
+    def derived(self, name: str, build: Callable[[dict], Any]) -> Any:
+        """A value computed from the catalogue, rebuilt only when the catalogue is.
+
+        Indexes over the catalogue cost far more to build than to query, and the
+        catalogue changes rarely. Tying each one to the catalogue object it was
+        built from means a reload invalidates every index at once, with no
+        separate bookkeeping to forget. Like the catalogue, a build that is
+        already running for this project and signature is joined, not repeated.
+        """
+        signature, catalogue = self._load()
+        cached = self._derived.get(name)
+        if cached is not None and cached[0] is catalogue:
+            metrics.count("derived.hits")
+            return cached[1]
+        metrics.count("derived.misses")
+        value = _builds.do(self._build_key(name, signature), lambda: build(catalogue))
+        self._derived[name] = (catalogue, value)
+        return value
+
+    def footprint(self) -> int:
+        """Rough bytes the cached catalogue holds; 0 when nothing is loaded.
+
+        Counts the text, which dominates, plus a fixed allowance per record. It
+        errs high, since built-in text shared between projects is counted once
+        for each of them.
+        """
+        cached = self._cache
+        if cached is None:
+            return 0
+        catalogue = cached[1]
+        known = self._footprint
+        if known is not None and known[0] is catalogue:
+            return known[1]
+        size = sum(
+            len(record.raw_body) + len(record.get("body", "")) + RECORD_OVERHEAD_BYTES
+            for record in catalogue["resources"].values()
+        )
+        self._footprint = (catalogue, size)
+        return size
+
+    def _load_file(self, path: Path, source: str) -> ResourceRecord | dict:
+        """The file's record, unresolved, or a problem saying why there is none."""
+        try:
+            if source == "built-in":
+                parsed = _parse_file(path)
+            else:
+                parsed = parse_resource(path.read_text(encoding="utf-8"))
         except OSError as exc:
             return {"file": str(path), "error": f"unreadable: {exc}"}
 
-        parsed = parse_resource(text)
         if not parsed.ok:
             return {"file": str(path), "error": "; ".join(parsed.errors)}
 
-        header = parsed.header
-        record = dict(header)
-        record["source"] = source
-        record["file"] = str(path)
-        record["raw_body"] = parsed.body
-
-        gate = str(header.get("gate", "")).strip()
+        record = ResourceRecord(parsed.header, source, str(path), parsed.body)
+        gate = str(parsed.header.get("gate", "")).strip()
         if gate:
-            record["gate"] = gate
-            if not self.config_service.is_enabled(gate):
-                record["_gated_out"] = True
-                return record
-
-        body, used, unresolved = placeholders.resolve(parsed.body, config)
-        record["body"] = body
-        record["resolved_env"] = used
-        record["unresolved_env"] = unresolved
-
-        # A hook's script is the executable part of the resource, so it is
-        # lifted out of the prose and resolved like any other instruction.
-        if record["kind"] == "hook":
-            record["script"] = extract_script(body)
-
+            record.gate = gate
         return record
 
     # ------------------------------------------------------------------ API
@@ -173,39 +299,21 @@ class ResourceService:
 
         Bodies are deliberately excluded. The agent reads names, descriptions and
         relationships here, then calls ``get_resource`` for the one it needs.
+        The entries are built once per catalogue, not once per call.
         """
         catalogue = self.load()
         resources = catalogue["resources"]
-
-        entries = []
+        entries = self.derived("context_entries", _context_entries)
         counts = {kind: 0 for kind in VALID_KINDS}
-        for record in sorted(resources.values(), key=lambda r: (r["kind"], r["name"])):
-            counts[record["kind"]] = counts.get(record["kind"], 0) + 1
-            entry = {
-                "kind": record["kind"],
-                "name": record["name"],
-                "description": record["description"],
-                "relationships": record.get("relationships", {}),
-                "env": record.get("env", {"requires": [], "optional": []}),
-                "source": record["source"],
-            }
-            if record.get("self_check"):
-                entry["self_check"] = record["self_check"]
-            for optional_field in (
-                "type", "trigger", "schedule", "wraps", "phases", "gate", "event", "blocking",
-            ):
-                if optional_field in record:
-                    entry[optional_field] = record[optional_field]
-            if record.get("unresolved_env"):
-                entry["unresolved_env"] = record["unresolved_env"]
-            entries.append(entry)
-
-        overrides = [r["name"] for r in resources.values() if r["source"] == "project"]
+        for record in resources.values():
+            counts[record.kind] = counts.get(record.kind, 0) + 1
+
+        overrides = [r.name for r in resources.values() if r.source == "project"]
 
         return {
             "config": catalogue["config"],
             "env_status": catalogue["env_status"],
-            "resources": entries,
+            "resources": list(entries),
             "resource_counts": counts,
             "total_resources": len(entries),
             "project_overrides": sorted(overrides),
@@ -218,16 +326,24 @@ class ResourceService:
             ),
         }
 
-    def hooks(self) -> list[dict]:
+    def hooks(self) -> list[ResourceRecord]:
         """Every loaded hook that carries a usable script."""
         return [
             record
             for record in self.load()["resources"].values()
-            if record["kind"] == "hook" and record.get("script")
+            if record.kind == "hook" and record.get("script")
         ]
 
-    def get_resource(self, kind: str, name: str) -> dict[str, Any]:
-        """Full content of one resource, with its output template attached."""
+    def get_resource(
+        self, kind: str, name: str, sections: Optional[list[str]] = None
+    ) -> dict[str, Any]:
+        """Full content of one resource, with its output template attached.
+
+        ``sections`` narrows the body to the named ``##`` sections, in the order
+        the resource has them. Titles match case-insensitively. A title that
+        does not exist is reported with the ones that do, rather than silently
+        returning less than was asked for.
+        """
         catalogue = self.load()
         record = catalogue["resources"].get(f"{kind}:{name}")
 
@@ -262,16 +378,32 @@ class ResourceService:
                 "hint": "Call get_context() to list every resource.",
             }
 
-        result = {
-            key: value
-            for key, value in record.items()
-            if key not in ("raw_body", "_gated_out")
-        }
+        result = record.to_dict(exclude=("raw_body", "section_index"))
+        if sections:
+            result.update(_select_sections(record, sections))
         template_ref = (record.get("relationships") or {}).get("output")
         result["template_ref"] = template_ref
         result["template"] = self._read_template(template_ref, catalogue["config"])
         return result
 
+    def _has_template(self, catalogue: dict, name: str) -> bool:
+        if "templates" in catalogue:
+            return name in catalogue["templates"]
+        return (self.templates_dir / name).is_file()
+
+    def templates(self) -> dict[str, str]:
+        """Every output template by file name."""
+        catalogue = self.load()
+        if "templates" in catalogue:
+            return dict(catalogue["templates"])
+        if not self.templates_dir.is_dir():
+            return {}
+        return {
+            path.name: path.read_text(encoding="utf-8")
+            for path in sorted(self.templates_dir.iterdir())
+            if path.is_file()
+        }
+
     def read_template(self, ref: Optional[str]) -> Optional[str]:
         """Public accessor for an output template's content."""
         return self._read_template(ref, self.config_service.get_config()["config"])
@@ -285,6 +417,8 @@ class ResourceService:
         if not ref:
             return None
         name = Path(str(ref)).name
+        if self.snapshot_path is not None:
+            return self.load()["templates"].get(name)
         path = self.templates_dir / name
         if not path.is_file():
             return None
@@ -408,31 +542,33 @@ class ResourceService:
         A resource can parse perfectly and still be broken — by pointing at a
         skill that does not exist, or naming an output template that was never
         written. Those only show up when the whole set is examined together.
+
+        The report is derived from the catalogue, so it is computed once per
+        catalogue version rather than on every ``get_context``.
         """
-        catalogue = self.load()
+        return self.derived("integrity", self._check_integrity)
+
+    def _check_integrity(self, catalogue: dict) -> dict[str, Any]:
         resources = catalogue["resources"]
-        known = {f"/{record['name']}" for record in resources.values()}
+        known = {f"/{record.name}" for record in resources.values()}
 
         dangling: list[dict] = []
         missing_templates: list[dict] = []
 
         for record in resources.values():
-            relationships = record.get("relationships") or {}
-            for relation in ("comes_from", "goes_to", "can_invoke", "uses"):
-                for edge in relationships.get(relation, []):
-                    target = edge.get("target", "")
-                    if target.startswith("/") and target not in known:
-                        dangling.append(
-                            {
-                                "from": f"{record['kind']}:{record['name']}",
-                                "relation": relation,
-                                "target": target,
-                            }
-                        )
-            output = relationships.get("output")
-            if output and not (self.templates_dir / Path(str(output)).name).is_file():
+            for edge in record.edges:
+                if edge.target.startswith("/") and edge.target not in known:
+                    dangling.append(
+                        {
+                            "from": f"{record.kind}:{record.name}",
+                            "relation": edge.relation,
+                            "target": edge.target,
+                        }
+                    )
+            output = (record.get("relationships") or {}).get("output")
+            if output and not self._has_template(catalogue, Path(str(output)).name):
                 missing_templates.append(
-                    {"resource": f"{record['kind']}:{record['name']}", "template": output}
+                    {"resource": f"{record.kind}:{record.name}", "template": output}
                 )
 
         for phase in _all_phases(resources.values()):
@@ -450,6 +586,111 @@ class ResourceService:
         }
 
 
+def parse_built_in(built_in_dir: Optional[Path] = None) -> int:
+    """Parses every built-in file into the process-wide cache; how many there are.
+
+    Loading does this lazily. A caller about to load many projects calls it
+    first, so the parse is paid once before the work is divided up — and, in
+    processes forked afterwards, not again.
+    """
+    root = built_in_dir or BUILT_IN_DIR
+    count = 0
+    for path in sorted(root.rglob("*.md")):
+        if TEMPLATES_DIRNAME in path.relative_to(root).parts:
+            continue
+        try:
+            _parse_file(path)
+        except OSError:
+            continue
+        count += 1
+    return count
+
+
+def _parse_file(path: Path) -> ParsedResource:
+    """A built-in file's parse, shared across projects until the file changes."""
+    info = path.stat()
+    stamp = (info.st_mtime_ns, info.st_size)
+    cached = _built_in_parses.get(str(path))
+    if cached is not None and cached[0] == stamp:
+        metrics.count("built_in_parse.hits")
+        return cached[1]
+    metrics.count("built_in_parse.misses")
+    parsed = parse_resource(path.read_text(encoding="utf-8"))
+    _built_in_parses[str(path)] = (stamp, parsed)
+    return parsed
+
+
+def _resolve(record: ResourceRecord, config: dict) -> None:
+    """Fills in what a record needs the project's configuration for."""
+    body, used, unresolved = placeholders.resolve(record.raw_body, config)
+    record.body = body
+    record.resolved_env = used
+    record.unresolved_env = unresolved
+    # Indexed after resolution, because substitution moves every offset
+    # behind the first placeholder it replaces.
+    record.section_index = index_sections(body)
+
+    # A hook's script is the executable part of the resource, so it is
+    # lifted out of the prose and resolved like any other instruction.
+    if record.kind == "hook":
+        record.script = extract_script(body)
+
+
+def _context_entries(catalogue: dict) -> tuple[dict, ...]:
+    """The ``get_context`` entry for every resource, by kind and then name."""
+    entries = []
+    for record in sorted(catalogue["resources"].values(), key=lambda r: (r.kind, r.name)):
+        entry = {
+            "kind": record.kind,
+            "name": record.name,
+            "description": record["description"],
+            "relationships": record.get("relationships", {}),
+            "env": record.get("env", {"requires": [], "optional": []}),
+            "source": record.source,
+        }
+        if record.get("self_check"):
+            entry["self_check"] = record["self_check"]
+        for optional_field in (
+            "type", "trigger", "schedule", "wraps", "phases", "gate", "event", "blocking",
+        ):
+            if optional_field in record:
+                entry[optional_field] = record[optional_field]
+        if record.get("unresolved_env"):
+            entry["unresolved_env"] = record["unresolved_env"]
+        entry["sections"] = [
+            {"title": section.title, "bytes": section.size}
+            for section in record.get("section_index", ())
+        ]
+        entries.append(entry)
+    return tuple(entries)
+
+
+def _select_sections(record: Mapping, wanted: list[str]) -> dict[str, Any]:
+    """The body cut down to the requested sections, plus what could not be found."""
+    index = record.get("section_index", ())
+    requested = {_title_key(title): str(title) for title in wanted}
+    chosen = [section for section in index if _title_key(section.title) in requested]
+    found = {_title_key(section.title) for section in chosen}
+
+    encoded = record.get("body", "").encode("utf-8")
+    body = "\n\n".join(
+        encoded[section.start:section.end].decode("utf-8").strip() for section in chosen
+    )
+    result: dict[str, Any] = {
+        "body": body + "\n" if body else "",
+        "sections": [section.title for section in chosen],
+    }
+    missing = [title for key, title in requested.items() if key not in found]
+    if missing:
+        result["missing_sections"] = missing
+        result["available_sections"] = [section.title for section in index]
+    return result
+
+
+def _title_key(title: str) -> str:
+    return " ".join(str(title).split()).lower()
+
+
 def _all_phases(records) -> list[dict]:
     phases = []
     for record in records:
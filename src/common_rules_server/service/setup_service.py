@@ -0,0 +1,143 @@
+"""Project setup, as a graph of stages rather than a sequence.
+
+Setup is the first thing every project does, and most of its wall time is
+waiting: git answering, editor-wide JSON files being parsed, the export being
+written. Run one after another, those waits add up even though most stages
+never touch each other's files.
+
+The dependencies are the files the stages share:
+
+* ``config`` writes config.env, which every stage that loads resources or reads
+  a setting needs first.
+* ``ide_rules`` writes the editor guidance block. It needs nothing, but the
+  files it creates are evidence editor detection reads, so detection — and
+  everything that acts on its answer — comes after it.
+* ``git_hooks``, ``editor_hooks`` and ``companions`` write disjoint files and
+  run together.
+* ``sync`` cleans and rewrites the editor rules files and hook configs that
+  ``ide_rules`` and ``editor_hooks`` just wrote, so it runs last.
+
+Every stage's duration comes back in the response, so a slow setup says where
+its time went.
+"""
+
+from typing import Any, Optional
+
+from common_rules_server.service.config_service import ConfigService
+from common_rules_server.service.git_hook_service import GitHookService
+from common_rules_server.service.hook_service import HookService
+from common_rules_server.service.ide_service import IdeService
+from common_rules_server.service.mcp_installer_service import McpInstallerService
+from common_rules_server.service.resource_service import ResourceService
+from common_rules_server.service.sync_service import SyncService
+from common_rules_server.util.pipeline import Stage, run_pipeline
+
+
+class SetupService:
+    def __init__(self, project_root: str):
+        self.project_root = project_root
+
+    def setup(self, active_ide: Optional[str] = None, install_companions: bool = False) -> dict[str, Any]:
+        """Configures the project and everything around it, and reports on each part.
+
+        ``active_ide`` limits editor guidance, hooks and export to that editor;
+        without it they go to every editor detected in the project.
+        """
+        root = self.project_root
+        config_service = ConfigService(root)
+        resources = ResourceService(config_service)
+        ide_service = IdeService(root)
+
+        def config(_: dict) -> dict:
+            return config_service.write_config()
+
+        def ide_rules(_: dict) -> dict:
+            return ide_service.setup_ide_rules([active_ide] if active_ide else None)
+
+        def detected(_: dict) -> list[str]:
+            return [active_ide] if active_ide else [t.key for t in ide_service.detect()]
+
+        def git_hooks(done: dict) -> dict:
+            return GitHookService(root).setup_hooks(done["config"]["config"])
+
+        def editor_hooks(done: dict) -> Optional[dict]:
+            if not done["detected"]:
+                return None
+            return HookService(root).install(resources.hooks(), done["detected"])
+
+        def companions(done: dict) -> dict:
+            auto_install = str(
+                done["config"]["config"].get("AUTO_INSTALL_MCPS", "false")
+            ).strip().lower() in ("true", "1", "yes", "on")
+            return McpInstallerService(root).install_missing(
+                apply=install_companions or auto_install
+            )
+
+        def sync(done: dict) -> dict:
+            return SyncService(resources, root).sync(done["detected"])
+
+        results, timings = run_pipeline(
+            [
+                Stage("config", config),
+                Stage("ide_rules", ide_rules),
+                Stage("detected", detected, after=("ide_rules",)),
+                Stage("git_hooks", git_hooks, after=("config",)),
+                Stage("editor_hooks", editor_hooks, after=("config", "detected")),
+                Stage("companions", companions, after=("config",)),
+                Stage("sync", sync, after=("config", "ide_rules", "detected", "editor_hooks")),
+            ]
+        )
+
+        resolved = results["config"]
+        next_steps = _next_steps(
+            resolved, results["ide_rules"], results["companions"], results["editor_hooks"]
+        )
+        return {
+            "config": resolved["config"],
+            "env_status": resolved["env_status"],
+            "git_hooks": results["git_hooks"],
+            "editor_hooks": results["editor_hooks"],
+            "ide_rules": results["ide_rules"],
+            "companions": results["companions"],
+            "sync": results["sync"],
+            "next_steps": next_steps,
+            "timings": timings,
+            "message": (
+                "Project configured. "
+                + (
+                    f"{len(next_steps)} item(s) need attention — see next_steps."
+                    if next_steps
+                    else "Nothing further is needed."
+                )
+            ),
+        }
+
+
+def _next_steps(
+    resolved: dict, ide_rules: dict, companions: dict, editor_hooks: Optional[dict]
+) -> list[str]:
+    """What still needs a human, in the order a human would deal with it."""
+    next_steps: list[str] = []
+    for key in resolved["env_status"]["needs_input"]:
+        next_steps.append(
+            f"Ask the user for {key}, then write it into {resolved['env_status']['file_path']}."
+        )
+    if ide_rules.get("action_required"):
+        next_steps.append(ide_rules["action_required"])
+    for missing in companions["proposals"]:
+        next_steps.append(
+            f"Companion MCP server '{missing['server']}' is not configured. {missing['purpose']}"
+        )
+
+    if editor_hooks is None:
+        next_steps.append(
+            "No editor detected, so no lifecycle hooks were installed. Name the "
+            "editor to setup_config to install them."
+        )
+    else:
+        for gap in editor_hooks["unsupported"]:
+            next_steps.append(
+                f"Hook '{gap['hook']}' has no equivalent in {gap['ide']}; "
+                f"that automation is unavailable there."
+            )
+    return next_steps
@@ -29,24 +29,97 @@ the nearest native one rather than invented:
 Workflows and loops become skills because no editor models them separately, and
 a workflow is in practice an invocable procedure. Antigravity has no documented
 subagent concept, so agents there become skills whose body states the persona.
+
+## Incremental output
+
+Editors re-index whatever is touched in the directories they watch, so sync
+writes only what changed. ``.common-rules-server/cache/sync-manifest.json``
+records each generated path (see ``util.sync_manifest``); a re-sync over an
+unchanged kit writes nothing, and an output whose resource is gone is deleted. Only the
+selected editors' output is touched. When nothing an editor's output is rendered
+from has changed and its files are as sync left them, that editor is not
+rendered at all.
+
+``watch`` keeps syncing as resources are edited. It polls the catalogue's
+signature, lets a burst of saves settle, and renders again only the resources
+the edit affected — found through ``util.dependency_index`` — reusing every
+other body from the round before.
+
+``export_snapshot`` is the third way out: the resolved catalogue as one file
+(see ``util.catalogue_snapshot``), for tooling, CI containers, or a server run
+with ``COMMON_RULES_SNAPSHOT``.
+
+## Hybrid output
+
+Offline output copies every body in; online output stubs every resource with a
+call to ``get_resource``. Neither suits a kit with a few large resources among
+many small ones. A hybrid sync — ``inline_tokens``, ``always_budget`` or both —
+inlines a resource whose body fits ``inline_tokens`` and stubs the rest, and
+inlines Always-rules, which every session loads, only while they fit
+``always_budget``. Each editor's result reports ``always_on``: the estimated
+tokens it loads into every session, whichever mode produced it.
+
+``plan=True`` runs the same writers against a ``ChangePlan`` instead of the
+disk: the result says what would be created, modified and deleted, and nothing
+is written.
+
+## Publishing
+
+Editors are rendered in parallel, each into its own staging directory under
+``.common-rules-server/cache/``. Nothing in the project changes until every
+editor has rendered; each staged file is then moved into place with a rename,
+which the editor sees as the old file or the new one and never as half of
+either. The always-file is rewritten the same way. A sync that fails or is
+interrupted while rendering leaves the project as it was. Publishing itself is
+a rename per file rather than one transaction: interrupted part-way, some files
+are new and the rest old, each of them whole, and the next sync completes it.
+
+Staging is per file rather than a swap of whole directories because the
+directories are shared: ``.claude/skills`` holds the user's own skills beside
+the generated ones, and replacing the directory would replace those too.
 """
 
+import contextvars
+import errno
+import functools
+import importlib.metadata
 import json
-import logging
 import os
 import re
 import shutil
-import subprocess
-from dataclasses import dataclass
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Callable, Iterator, Optional
 
+from common_rules_server.service.config_service import (
+    CONFIG_DIRNAME,
+    atomic_write,
+    ensure_gitignore,
+)
 from common_rules_server.service.hook_service import HookService
-from common_rules_server.service.resource_service import ResourceService
-from common_rules_server.util import managed_blocks
+from common_rules_server.service.resource_service import SNAPSHOT_ENV, ResourceService
+from common_rules_server.util import (
+    catalogue_snapshot,
+    dependency_index,
+    graph_build,
+    managed_blocks,
+)
+from common_rules_server.util.change_plan import ChangePlan
+from common_rules_server.util.metrics import metrics
+from common_rules_server.util.relevance import estimate_tokens
 from common_rules_server.util.resource_parsing import COMMAND_TRIGGERS
+from common_rules_server.util.single_flight import SingleFlight
+from common_rules_server.util.sync_manifest import MANIFEST_NAME, SyncManifest, digest
+from common_rules_server.util.tracing import span
 
 GENERATED_HEADER = "<!-- generated by common-rules sync — edit the resource, not this file -->"
+#: Where ``export_snapshot`` writes by default, under the config directory.
+SNAPSHOT_NAME = "catalogue-snapshot.json"
+#: How much of a file is read to look for the header.
+HEADER_PROBE_BYTES = 4096
 #: Distinct from the guidance block that setup writes into the same files.
 BLOCK_NAME = "resources"
 BLOCK_START = managed_blocks.start_marker(BLOCK_NAME)
@@ -130,11 +203,111 @@ SYNC_TARGETS: tuple[SyncTarget, ...] = (
 
 TARGETS_BY_KEY = {target.key: target for target in SYNC_TARGETS}
 
+#: Staging directories older than this were left by a sync that was killed, not
+#: by one still running, and are removed by the next.
+STALE_STAGING_SECONDS = 3600
+
+#: Seconds between checks for an edit while watching, and the quiet period an
+#: edit must be followed by before it is synced.
+WATCH_INTERVAL = 0.2
+WATCH_DEBOUNCE = 0.1
+
+
+@dataclass
+class _Output:
+    """One editor's output between rendering it and publishing it."""
+
+    target: SyncTarget
+    #: Where changed files are written first; None for a dry run.
+    staging: Optional[Path]
+    written: list[str] = field(default_factory=list)
+    changed: list[str] = field(default_factory=list)
+    #: What the manifest records for each path once it is in place.
+    entries: dict[str, tuple[str, dict]] = field(default_factory=dict)
+    #: Staged paths, relative to both the staging directory and the project.
+    staged: list[str] = field(default_factory=list)
+    #: The always-file's new text, when it changed.
+    always_text: Optional[str] = None
+    #: Set when nothing needed rendering; the result, answered from the manifest.
+    settled: Optional[dict[str, Any]] = None
+
+
+class Inlining:
+    """Which resources a hybrid sync copies in and which it leaves as stubs.
+
+    A resource is inlined when its body is estimated at no more than
+    ``inline_tokens``. Always-rules are also loaded into every session, so they
+    share ``always_budget`` besides: taken in catalogue order, each one that
+    still fits is inlined and one that does not is stubbed. The budget is
+    spent on rule bodies, so every editor makes the same choice.
+
+    Neither limit set is not a hybrid sync, and the caller's ``offline`` decides.
+    """
+
+    def __init__(self, inline_tokens: Optional[int] = None, always_budget: Optional[int] = None):
+        self.inline_tokens = inline_tokens
+        self.always_budget = always_budget
+        self.always_inlined: set[str] = set()
+
+    @property
+    def hybrid(self) -> bool:
+        return self.inline_tokens is not None or self.always_budget is not None
+
+    @property
+    def limits(self) -> tuple:
+        return (self.inline_tokens, self.always_budget)
+
+    def fit_always(self, records: list[dict], body: Callable[[dict], str]) -> None:
+        spent = 0
+        for record in records:
+            if not _is_always(record):
+                continue
+            cost = estimate_tokens(body(record))
+            if not self._fits(cost) or (
+                self.always_budget is not None and spent + cost > self.always_budget
+            ):
+                continue
+            spent += cost
+            self.always_inlined.add(_key(record))
+
+    def inline(self, record: dict, body: Callable[[dict], str]) -> bool:
+        if _is_always(record):
+            return _key(record) in self.always_inlined
+        return self.inline_tokens is None or self._fits(estimate_tokens(body(record)))
+
+    def _fits(self, cost: int) -> bool:
+        return self.inline_tokens is None or cost <= self.inline_tokens
+
 
 class SyncService:
-    def __init__(self, resources: ResourceService, project_root: Optional[str] = None):
+    def __init__(
+        self,
+        resources: ResourceService,
+        project_root: Optional[str] = None,
+        graph: str = "background",
+    ):
         self.resources = resources
         self.project_root = Path(project_root) if project_root else Path(os.getcwd())
+        #: How sync starts the code-review-graph build: ``background`` in this
+        #: process, ``detached`` to outlive it, or ``skip``.
+        self.graph = graph
+        self._manifest = self._load_manifest()
+        #: Set for a dry run: writers record what they would do here instead.
+        self._plan: Optional[ChangePlan] = None
+        #: Editor-neutral bodies by resource key, shared by every editor.
+        self._bodies: dict[str, str] = {}
+        #: Editors render concurrently and mostly want the same bodies.
+        self._rendering = SingleFlight()
+
+    @property
+    def manifest_path(self) -> Path:
+        # Under cache/: its file stamps are this machine's, and committed they
+        # would differ on every checkout.
+        return self.project_root / CONFIG_DIRNAME / "cache" / MANIFEST_NAME
+
+    @property
+    def staging_root(self) -> Path:
+        return self.project_root / CONFIG_DIRNAME / "cache" / "sync-staging"
 
     def detect(self) -> list[SyncTarget]:
         """The editors this project shows evidence of using.
@@ -148,13 +321,33 @@ class SyncService:
         detected = {t.key for t in IdeService(str(self.project_root)).detect()}
         return [target for target in SYNC_TARGETS if target.key in detected]
 
-    def sync(self, ides: Optional[list[str]] = None, include_hooks: bool = True, offline: bool = False) -> dict[str, Any]:
-        graph_dir = self.project_root / ".code-review-graph"
-        if not graph_dir.exists():
-            try:
-                subprocess.run(["code-review-graph", "build"], cwd=self.project_root, check=True, capture_output=True)
-            except (subprocess.SubprocessError, FileNotFoundError) as e:
-                logging.getLogger(__name__).warning(f"Failed to build code-review-graph: {e}")
+    def sync(
+        self,
+        ides: Optional[list[str]] = None,
+        include_hooks: bool = True,
+        offline: bool = False,
+        plan: bool = False,
+        diffs: bool = False,
+        only: Optional[set[str]] = None,
+        inline_tokens: Optional[int] = None,
+        always_budget: Optional[int] = None,
+    ) -> dict[str, Any]:
+        """Writes the selected editors' output, or with ``plan`` says what would change.
+
+        ``diffs`` adds a unified diff per changed path to the plan. ``only``
+        renders just those resource keys and keeps what the rest produced last
+        time; it is for a caller that knows exactly what an edit affected.
+
+        ``inline_tokens`` and ``always_budget`` make the sync hybrid, in place
+        of ``offline``: see the module docstring.
+        """
+        for name, value in (("inline_tokens", inline_tokens), ("always_budget", always_budget)):
+            if value is not None and value < 0:
+                return {
+                    "synced": [],
+                    "error": f"{name} must be a number of tokens, not {value}.",
+                    "hint": "Pass 0 or more; omit it for no limit.",
+                }
 
         if ides:
             selected = [TARGETS_BY_KEY[k] for k in ides if k in TARGETS_BY_KEY]
@@ -181,83 +374,338 @@ class SyncService:
                     ),
                 }
 
-        # Purge all generated files across all known editors before writing
-        self.clean()
-
-        catalogue = self.resources.load()
+        self._manifest = self._load_manifest()
+        self._plan = ChangePlan(diffs) if plan else None
+
+        with span("load_catalogue"):
+            signature, catalogue = self.resources.load_signed()
+            # Bodies outlive this sync: they are kept with the catalogue they
+            # were rendered from, so the next sync of an unchanged kit reuses them.
+            owner, bodies = self.resources.derived("sync_bodies", lambda built: (built, {}))
+            bodies = bodies if owner is catalogue else {}
+            if only is not None:
+                # Whatever the edit did not touch renders exactly as it did before.
+                for key, body in self._bodies.items():
+                    if key not in only:
+                        bodies.setdefault(key, body)
+            self._bodies = bodies
         records = sorted(
             catalogue["resources"].values(), key=lambda r: (r["kind"], r["name"])
         )
         hooks = [r for r in records if r["kind"] == "hook" and (r.get("script") or r.get("raw_command"))]
 
         result: dict[str, Any] = {"synced": [], "hooks": None, "total_resources": len(records)}
-
-        for target in selected:
-            result["synced"].append(self._sync_target(target, records, offline))
-
+        inlining = Inlining(inline_tokens, always_budget)
+        if inlining.hybrid:
+            with span("inline_budget"):
+                inlining.fit_always(records, self._body)
+            result["hybrid"] = {
+                "inline_tokens": inline_tokens,
+                "always_budget": always_budget,
+                "always_inlined": sorted(inlining.always_inlined),
+                "always_stubbed": sorted(
+                    _key(r) for r in records if _is_always(r) and _key(r) not in inlining.always_inlined
+                ),
+            }
+        if not plan and self.graph == "skip":
+            result["code_review_graph"] = {
+                "status": "skipped",
+                "hint": "Run `common-rules sync` in the project to build its graph.",
+            }
+        elif not plan:
+            # Started, not awaited: a first build on a large repository takes minutes.
+            with span("code_review_graph"):
+                result["code_review_graph"] = graph_build.ensure(
+                    self.project_root,
+                    self.project_root / CONFIG_DIRNAME / "cache" / "code-review-graph.log",
+                    detach=self.graph == "detached",
+                )
+
+        if self._plan is None:
+            self._clear_stale_staging()
+        outputs = [
+            _Output(target, None if plan else self._make_staging(target)) for target in selected
+        ]
+        try:
+            rendered = self._render_all(outputs, records, offline, signature, only, inlining)
+            for output in outputs:
+                with span("publish", ide=output.target.key):
+                    result["synced"].append(self._publish(output, rendered[output.target.key]))
+        finally:
+            for output in outputs:
+                if output.staging is not None:
+                    shutil.rmtree(output.staging, ignore_errors=True)
+        if self._plan is None:
+            self._manifest.save()
+            ensure_gitignore(self.project_root / CONFIG_DIRNAME)
+
+        hook_service = HookService(str(self.project_root), plan=self._plan)
         if include_hooks and hooks:
-            result["hooks"] = HookService(str(self.project_root)).install(
-                hooks, [t.key for t in selected]
-            )
+            result["hooks"] = hook_service.install(hooks, [t.key for t in selected])
+        else:
+            hook_service.uninstall([t.key for t in selected])
+
+        if self._plan is not None:
+            result["plan"] = self._plan.summary()
+            result["note"] = "Nothing was written. Run sync without plan to apply these changes."
+            self._plan = None
+            return result
 
         result["note"] = (
             "Resources are now readable by the editor directly. Re-run sync after "
-            "changing a resource; generated files are overwritten, so edit the "
-            "resource rather than the output."
+            "changing a resource; only outputs whose content changed are "
+            "rewritten, so edit the resource rather than the output."
         )
         return result
 
+    def watch(
+        self,
+        ides: Optional[list[str]] = None,
+        include_hooks: bool = True,
+        offline: bool = False,
+        interval: float = WATCH_INTERVAL,
+        debounce: float = WATCH_DEBOUNCE,
+        inline_tokens: Optional[int] = None,
+        always_budget: Optional[int] = None,
+    ) -> Iterator[dict[str, Any]]:
+        """Syncs, then syncs again after every edit, for as long as it is iterated.
+
+        The catalogue stays loaded between rounds, so an edit costs re-parsing
+        the files that changed and rendering the resources that depend on them
+        — not the whole kit. Each round's result also says which resources the
+        edit affected and how long the round took.
+        """
+        hybrid = {"inline_tokens": inline_tokens, "always_budget": always_budget}
+        result = self.sync(ides, include_hooks, offline, **hybrid)
+        # Taken before yielding: an edit made while the caller holds the first
+        # result is still an edit.
+        signature, catalogue = self.resources.load_signed()
+        index = dependency_index.build(catalogue)
+        yield result
+        if result.get("error"):
+            return
+
+        while True:
+            time.sleep(interval)
+            latest = self.resources.signature()
+            if latest == signature:
+                continue
+            # Editors save in bursts — a formatter runs, a rename touches two
+            # files. Wait for the burst to end rather than syncing each step.
+            while True:
+                time.sleep(debounce)
+                settled = self.resources.signature()
+                if settled == latest:
+                    break
+                latest = settled
+
+            started = time.perf_counter()
+            new_signature, catalogue = self.resources.load_signed()
+            new_index = dependency_index.build(catalogue)
+            affected = dependency_index.affected(
+                index, new_index, signature, new_signature, self.resources.templates_dir
+            )
+            result = self.sync(ides, include_hooks, offline, only=affected, **hybrid)
+            result["affected"] = sorted(affected)
+            result["duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            signature, index = new_signature, new_index
+            yield result
+
+    def export_snapshot(self, path: Optional[str] = None) -> dict[str, Any]:
+        """Writes the resolved catalogue, templates and graph to one snapshot file."""
+        target = Path(path) if path else self.project_root / CONFIG_DIRNAME / SNAPSHOT_NAME
+        if not target.is_absolute():
+            target = self.project_root / target
+        with span("load_catalogue"):
+            catalogue = self.resources.load()
+        if catalogue["problems"]:
+            return {
+                "written": False,
+                "problems": catalogue["problems"],
+                "hint": "Fix the resources that do not parse; a snapshot without them would hide that.",
+            }
+        written = catalogue_snapshot.write(
+            target, catalogue, self.resources.templates(), {"kit_version": _renderer_stamp()[0]}
+        )
+        return {
+            "written": True,
+            **written,
+            "note": f"Serve it without the kit by starting the server with {SNAPSHOT_ENV}={target}.",
+        }
+
     # ---------------------------------------------------------------- target
 
-    def _sync_target(self, target: SyncTarget, records: list[dict], offline: bool) -> dict[str, Any]:
-        written: list[str] = []
-        always_rules: list[dict] = []
-        commands: list[dict] = []
+    def _render_all(
+        self,
+        outputs: list[_Output],
+        records: list[dict],
+        offline: bool,
+        signature: tuple,
+        only: Optional[set[str]] = None,
+        inlining: Optional[Inlining] = None,
+    ) -> dict[str, dict[str, Any]]:
+        """Renders every editor's output, concurrently when there is more than one.
+
+        Like ``run_pipeline``, this uses its own short-lived pool: sync is
+        usually already running on a shared worker.
+        """
+
+        inlining = inlining or Inlining()
+
+        def render(output: _Output) -> dict[str, Any]:
+            fingerprint = digest(
+                repr((signature, output.target.key, offline, inlining.limits, _renderer_stamp()))
+            )
+            with span("target", ide=output.target.key):
+                return self._render_target(output, records, offline, fingerprint, only, inlining)
+
+        if len(outputs) == 1:
+            return {outputs[0].target.key: render(outputs[0])}
+        with ThreadPoolExecutor(
+            max_workers=len(outputs), thread_name_prefix="common-rules-sync"
+        ) as pool:
+            futures = {
+                output.target.key: pool.submit(contextvars.copy_context().run, render, output)
+                for output in outputs
+            }
+            return {key: future.result() for key, future in futures.items()}
+
+    def _render_target(
+        self,
+        output: _Output,
+        records: list[dict],
+        offline: bool,
+        fingerprint: str,
+        only: Optional[set[str]] = None,
+        inlining: Optional[Inlining] = None,
+    ) -> dict[str, Any]:
+        """Writes ``target``'s changed files into staging; the project is untouched.
+
+        The manifest is only read here. Editors render concurrently, and what
+        each one will record is kept on its ``_Output`` until it is published.
+        """
+        target = output.target
+        inlining = inlining or Inlining()
+        # In online mode, we don't want native chat commands since the files won't exist.
+        # A hybrid sync writes every file, whether as a body or a stub.
+        listed = offline or inlining.hybrid
+        commands = [r for r in records if r["kind"] != "hook" and listed and _is_command(r)]
+
+        def inline(record: dict) -> bool:
+            return inlining.inline(record, self._body) if inlining.hybrid else offline
+
+        # Cursor always copied its Always-rules in; only a budget changes that.
+        def inline_always(record: dict) -> bool:
+            return inlining.inline(record, self._body) if inlining.hybrid else True
+
+        always_rules = [r for r in records if _is_always(r)]
+        result = {
+            "ide": target.key,
+            "label": target.label,
+            "commands": [r["name"] for r in commands] if target.chat_commands else [],
+            "always_on": self._always_on(
+                target, records, always_rules, commands, inline if target.always_file else inline_always
+            ),
+        }
+
+        if self._manifest.inputs.get(target.key) == fingerprint and self._manifest.all_current(
+            target.key, self.project_root
+        ):
+            # Rendered from exactly these inputs, and untouched since.
+            written = self._manifest.paths(target.key)
+            if self._plan is not None:
+                for relative in written:
+                    self._plan.note(relative, "", "")
+            output.settled = {
+                **result, "files_written": len(written), "paths": written, "changed": [], "removed": []
+            }
+            return result
+
+        written = output.written
+        if only is not None and self._manifest.all_current(target.key, self.project_root):
+            present = {f"{r['kind']}:{r['name']}" for r in records}
+            for relative in self._manifest.paths(target.key):
+                resource = (self._manifest.entry(relative) or {}).get("resource")
+                if resource in present and resource not in only:
+                    written.append(relative)
+        else:
+            only = None  # something of the last output is missing: render it all
 
         for record in records:
             kind = record["kind"]
             if kind == "hook":
                 continue
+            always = _is_always(record)
+            if only is not None and f"{kind}:{record['name']}" not in only:
+                continue
 
-            # In online mode, we don't want native chat commands since the files won't exist
-            if offline and _is_command(record):
-                commands.append(record)
-
-            if kind == "rule" and record.get("type") == "Always":
-                always_rules.append(record)
+            if always:
                 if target.rules_dir:
-                    written.append(self._write_cursor_rule(target, record))
+                    written.append(self._write_cursor_rule(output, record, inline_always(record)))
                 continue
 
             if kind == "rule":
                 if target.rules_dir:
-                    written.append(self._write_cursor_rule(target, record, offline))
+                    written.append(self._write_cursor_rule(output, record, inline(record)))
                 else:
-                    written.append(self._write_skill(target, record, offline))
+                    written.append(self._write_skill(output, record, inline(record)))
                 continue
 
             if kind == "agent" and target.agents_dir:
-                written.append(self._write_agent(target, record, offline))
+                written.append(self._write_agent(output, record, inline(record)))
                 if target.commands_dir:
-                    written.append(self._write_agent_command(target, record))
+                    written.append(self._write_agent_command(output, record))
                 continue
 
-            written.append(self._write_skill(target, record, offline))
+            written.append(self._write_skill(output, record, inline(record)))
 
         if target.always_file and (always_rules or (target.chat_commands and commands)):
-            written.append(self._write_always_file(target, always_rules, commands, offline))
+            with span("always_file", path=target.always_file):
+                written.append(self._write_always_file(output, always_rules, commands, inline))
+
+        result["fingerprint"] = fingerprint
+        return result
+
+    def _publish(self, output: _Output, result: dict[str, Any]) -> dict[str, Any]:
+        """Moves ``output``'s staged files into place, then prunes what is no longer wanted.
+
+        Each file is renamed over its predecessor, so at no point does the
+        editor see one half-written. Publishing starts only once every editor
+        has rendered, so a failure while rendering publishes nothing; a failure
+        during publishing leaves the files moved so far in place.
+        """
+        if output.settled is not None:
+            return output.settled
+        target = output.target
+        fingerprint = result.pop("fingerprint")
+        if self._plan is None:
+            for relative in output.staged:
+                _move_into_place(output.staging / relative, self.project_root / relative)
+            if output.always_text is not None:
+                atomic_write(self.project_root / target.always_file, output.always_text)
+            for relative, (content_digest, about) in output.entries.items():
+                self._manifest.record(relative, content_digest, self.project_root / relative, **about)
+
+        with span("prune", ide=target.key):
+            removed = self._prune(target, set(output.written))
+        if self._plan is None:
+            self._manifest.inputs[target.key] = fingerprint
 
         return {
-            "ide": target.key,
-            "label": target.label,
-            "files_written": len(written),
-            "paths": written,
-            "commands": [r["name"] for r in commands] if target.chat_commands else [],
+            **result,
+            "files_written": len(output.written),
+            "paths": output.written,
+            "changed": output.changed,
+            "removed": removed,
         }
 
     # ---------------------------------------------------------------- writers
 
-    def _write_cursor_rule(self, target: SyncTarget, record: dict, offline: bool = True) -> str:
+    def _write_cursor_rule(self, output: _Output, record: dict, offline: bool = True) -> str:
+        content = self._cursor_rule(record, offline)
+        return self._write(Path(output.target.rules_dir) / f"{record['name']}.mdc", content, output, record)
+
+    def _cursor_rule(self, record: dict, offline: bool) -> str:
         always = record.get("type") == "Always"
         front = [
             "---",
@@ -272,11 +720,11 @@ class SyncService:
             uri = f"resources/rules/{record['name']}"
             body = GENERATED_HEADER + f"\n\nCall get_resource(uri=\"{uri}\") from common-rules-server MCP to read instructions before proceeding."
             
-        content = "\n".join(front) + "\n\n" + body
-        return self._write(Path(target.rules_dir) / f"{record['name']}.mdc", content)
+        return "\n".join(front) + "\n\n" + body
 
-    def _write_skill(self, target: SyncTarget, record: dict, offline: bool = True) -> str:
+    def _write_skill(self, output: _Output, record: dict, offline: bool = True) -> str:
         """Skills are a directory containing SKILL.md in all three editors."""
+        target = output.target
         front = [
             "---",
             f"name: {record['name']}",
@@ -297,9 +745,10 @@ class SyncService:
 
         content = "\n".join(front) + "\n\n" + body
         path = Path(target.skills_dir) / record["name"] / "SKILL.md"
-        return self._write(path, content)
+        return self._write(path, content, output, record)
 
-    def _write_agent(self, target: SyncTarget, record: dict, offline: bool = True) -> str:
+    def _write_agent(self, output: _Output, record: dict, offline: bool = True) -> str:
+        target = output.target
         front = [
             "---",
             f"name: {record['name']}",
@@ -328,9 +777,9 @@ class SyncService:
             body.append(f"Call get_resource(uri=\"{uri}\") from common-rules-server MCP to read instructions before proceeding.")
 
         content = "\n".join(front) + "\n\n" + "\n".join(body)
-        return self._write(Path(target.agents_dir) / f"{record['name']}.md", content)
+        return self._write(Path(target.agents_dir) / f"{record['name']}.md", content, output, record)
 
-    def _write_agent_command(self, target: SyncTarget, record: dict) -> str:
+    def _write_agent_command(self, output: _Output, record: dict) -> str:
         """A typed command that spawns the agent of the same name.
 
         Writing the agent alone leaves it spawnable by the model and unreachable
@@ -341,6 +790,7 @@ class SyncService:
         The body is a prompt, not configuration — typing the command sends it,
         so it addresses the agent that will read it.
         """
+        target = output.target
         front = [
             "---",
             f"description: {json.dumps(_one_line(record['description']))}",
@@ -362,16 +812,43 @@ class SyncService:
             "any part it could not do.",
         ]
         content = "\n".join(front) + "\n\n" + "\n".join(body) + "\n"
-        return self._write(Path(target.commands_dir) / f"{record['name']}.md", content)
+        return self._write(Path(target.commands_dir) / f"{record['name']}.md", content, output, record)
 
     def _write_always_file(
-        self, target: SyncTarget, rules: list[dict], commands: list[dict], offline: bool = True
+        self,
+        output: _Output,
+        rules: list[dict],
+        commands: list[dict],
+        inline: Callable[[dict], bool] = lambda record: True,
     ) -> str:
         """Concatenates Always-rules into the file the editor reads every session.
 
         Only the managed block is replaced, so anything the user wrote in
         CLAUDE.md or AGENTS.md around it survives a re-sync.
         """
+        target = output.target
+        block = self._always_block(target, rules, commands, inline)
+        path = self.project_root / target.always_file
+        existing = path.read_text(encoding="utf-8") if path.exists() else ""
+        merged = managed_blocks.merge(existing, block, BLOCK_NAME)
+        if self._plan is not None:
+            if self._plan.note(target.always_file, existing if path.exists() else None, merged):
+                output.changed.append(target.always_file)
+            return target.always_file
+        if merged != existing:
+            output.always_text = merged
+            output.changed.append(target.always_file)
+        # Recorded by its block: the rest of the file is the user's.
+        output.entries[target.always_file] = (digest(block), {"ide": target.key, "block": BLOCK_NAME})
+        return target.always_file
+
+    def _always_block(
+        self,
+        target: SyncTarget,
+        rules: list[dict],
+        commands: list[dict],
+        inline: Callable[[dict], bool],
+    ) -> str:
         sections = [
             "# Project orchestration",
             "",
@@ -379,15 +856,18 @@ class SyncService:
             "re-run sync; this block is regenerated.",
             "",
         ]
-        
-        if offline:
-            for record in rules:
-                sections.append(f"## {record['name']}")
-                sections.append("")
-                sections.append(self._body(record))
-                sections.append("")
-        else:
-            rule_names = [f"`resources/rules/{record['name']}`" for record in rules]
+
+        fetched = []
+        for record in rules:
+            if not inline(record):
+                fetched.append(record)
+                continue
+            sections.append(f"## {record['name']}")
+            sections.append("")
+            sections.append(self._body(record))
+            sections.append("")
+        if fetched:
+            rule_names = [f"`resources/rules/{record['name']}`" for record in fetched]
             sections.append(f"For orchestration and policies, fetch {', '.join(rule_names)} via common-rules-server MCP.")
             sections.append("")
 
@@ -395,15 +875,36 @@ class SyncService:
             sections.append(_render_commands(commands))
             sections.append("")
 
-        path = self.project_root / target.always_file
-        existing = path.read_text(encoding="utf-8") if path.exists() else ""
-
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(
-            managed_blocks.merge(existing, "\n".join(sections), BLOCK_NAME),
-            encoding="utf-8",
+        return "\n".join(sections)
+
+    def _always_on(
+        self,
+        target: SyncTarget,
+        records: list[dict],
+        rules: list[dict],
+        commands: list[dict],
+        inline: Callable[[dict], bool],
+    ) -> dict[str, int]:
+        """Estimated tokens ``target`` loads into every session from this output.
+
+        That is the Always-rules as written — the always-file block, or Cursor's
+        alwaysApply rules — plus the name and description of everything else,
+        which editors list up front so the model knows what it may open.
+        """
+        if target.always_file:
+            always = (
+                estimate_tokens(self._always_block(target, rules, commands, inline))
+                if rules or (target.chat_commands and commands)
+                else 0
+            )
+        else:
+            always = sum(estimate_tokens(self._cursor_rule(r, inline(r))) for r in rules)
+        descriptions = sum(
+            estimate_tokens(f"{r['name']}: {_one_line(r['description'])}")
+            for r in records
+            if r["kind"] != "hook" and not _is_always(r)
         )
-        return target.always_file
+        return {"tokens": always + descriptions, "always": always, "descriptions": descriptions}
 
     # ----------------------------------------------------------------- shared
 
@@ -413,7 +914,28 @@ class SyncService:
         The self-check travels with the resource into every native format. It is
         the part most easily lost in translation and the part that makes the
         difference between a resource that was followed and one that was read.
+
+        Nothing in it depends on the editor, so it is rendered once per
+        catalogue version and every editor's writer wraps the same text.
         """
+        key = f"{record['kind']}:{record['name']}"
+        body = self._bodies.get(key)
+        if body is not None:
+            metrics.count("sync_body.hits")
+            return body
+        return self._rendering.do(key, lambda: self._render_body_once(key, record))
+
+    def _render_body_once(self, key: str, record: dict) -> str:
+        # Another editor may have finished rendering it since the lookup missed.
+        body = self._bodies.get(key)
+        if body is not None:
+            metrics.count("sync_body.hits")
+            return body
+        metrics.count("sync_body.misses")
+        body = self._bodies[key] = self._render_body(record)
+        return body
+
+    def _render_body(self, record: dict) -> str:
         parts = [record.get("body", "").strip()]
 
         if record.get("phases"):
@@ -460,16 +982,131 @@ class SyncService:
 
         return "\n\n".join(p for p in parts if p).strip() + "\n"
 
-    def _write(self, relative: Path, content: str) -> str:
+    def _write(self, relative: Path, content: str, output: _Output, record: dict) -> str:
+        """Stages one output, unless the file already holds exactly ``content``."""
+        key = relative.as_posix()
         path = self.project_root / relative
-        path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(content, encoding="utf-8")
-        return str(relative)
+        content_digest = digest(content)
+        current = self._manifest.is_current(key, content_digest, path)
+        if self._plan is not None:
+            if self._plan.note(key, content if current else _read(path), content):
+                output.changed.append(key)
+            return key
+        if not current and _read(path) != content:
+            staged = output.staging / relative
+            staged.parent.mkdir(parents=True, exist_ok=True)
+            staged.write_text(content, encoding="utf-8")
+            output.staged.append(key)
+            output.changed.append(key)
+        output.entries[key] = (
+            content_digest,
+            {"ide": output.target.key, "resource": f"{record['kind']}:{record['name']}"},
+        )
+        return key
+
+    def _prune(self, target: SyncTarget, wanted: set[str]) -> list[str]:
+        """Deletes what an earlier sync wrote for ``target`` that is no longer wanted.
+
+        The manifest says what that was. Without one — output from before
+        there was a manifest — generated files are found by their header.
+        """
+        if self._manifest.existed:
+            candidates = self._manifest.paths(target.key)
+        else:
+            candidates = [
+                str(path.relative_to(self.project_root).as_posix())
+                for path in self._generated_files(target)
+            ]
+
+        removed = []
+        for relative in candidates:
+            if relative in wanted:
+                continue
+            entry = self._manifest.entry(relative) or {}
+            path = self.project_root / relative
+            if self._plan is None:
+                self._manifest.forget(relative)
+            if entry.get("block"):
+                if self._strip_block(relative):
+                    removed.append(relative)
+                continue
+            if not _is_generated(path):
+                continue  # replaced by something of the user's; not ours to delete
+            removed.append(relative)
+            if self._plan is not None:
+                self._plan.note(relative, _read(path), None)
+                continue
+            path.unlink()
+            _prune_empty(path.parent, self._output_roots(target))
+        return removed
+
+    def _strip_block(self, relative: str) -> bool:
+        """Removes the synced block from an always-file; whether there was one."""
+        path = self.project_root / relative
+        text = _read(path)
+        if text is None or BLOCK_START not in text:
+            return False
+        stripped = managed_blocks.strip(text, BLOCK_NAME)
+        # Nothing of the user's left: the file was ours alone.
+        after = stripped if stripped.strip() else None
+        if self._plan is not None:
+            return self._plan.note(relative, text, after)
+        if after is None:
+            path.unlink()
+        else:
+            atomic_write(path, after)
+        return True
+
+    def _load_manifest(self) -> SyncManifest:
+        return SyncManifest.load(self.manifest_path)
+
+    def _make_staging(self, target: SyncTarget) -> Path:
+        self.staging_root.mkdir(parents=True, exist_ok=True)
+        return Path(tempfile.mkdtemp(prefix=f"{target.key}-", dir=self.staging_root))
+
+    def _clear_stale_staging(self) -> None:
+        """Removes staging left behind by a sync that was killed before cleaning up."""
+        if not self.staging_root.is_dir():
+            return
+        cutoff = time.time() - STALE_STAGING_SECONDS
+        for directory in self.staging_root.iterdir():
+            try:
+                stale = directory.stat().st_mtime < cutoff
+            except OSError:
+                continue
+            if stale:
+                shutil.rmtree(directory, ignore_errors=True)
+
+    def _output_roots(self, target: SyncTarget) -> list[Path]:
+        return [
+            self.project_root / directory
+            for directory in (target.rules_dir, target.skills_dir, target.agents_dir, target.commands_dir)
+            if directory
+        ]
+
+    def _generated_files(self, target: SyncTarget) -> list[Path]:
+        """Files under the target's output directories carrying the generated header.
+
+        Only the fallback for output no manifest describes. Each file is probed
+        rather than read: these directories also hold the user's own files,
+        and some of them are large.
+        """
+        found = []
+        for root in self._output_roots(target):
+            if not root.is_dir():
+                continue
+            for path in sorted(root.rglob("*.md*")):
+                if _is_generated(path):
+                    found.append(path)
+        return found
 
     # ------------------------------------------------------------------ clean
 
     def clean(self, ides: Optional[list[str]] = None) -> dict[str, Any]:
-        """Removes generated files, identified by their generated header.
+        """Removes generated files: those the manifest lists, else those with the header.
+
+        Directories are only pruned where a file was removed, and only up to
+        the output root, so a tree of the user's own files is never walked.
 
         The always-file is not a generated file — the user owns it and only the
         managed block inside it is ours — so it needs removing by name rather
@@ -480,43 +1117,39 @@ class SyncService:
         selected = (
             [TARGETS_BY_KEY[k] for k in ides if k in TARGETS_BY_KEY] if ides else list(SYNC_TARGETS)
         )
+        self._plan = None
         removed = []
+        manifest = self._load_manifest()
         for target in selected:
-            for directory in (
-                target.rules_dir,
-                target.skills_dir,
-                target.agents_dir,
-                target.commands_dir,
-            ):
-                if not directory:
+            manifest.inputs.pop(target.key, None)
+            recorded = manifest.paths(target.key)
+            if recorded:
+                candidates = [
+                    self.project_root / relative
+                    for relative in recorded
+                    if not (manifest.entry(relative) or {}).get("block")
+                ]
+            else:
+                candidates = self._generated_files(target)
+            for relative in recorded:
+                manifest.forget(relative)
+
+            roots = self._output_roots(target)
+            for path in candidates:
+                # The manifest can be older than the file: one the user has
+                # since replaced with their own is not ours to delete.
+                if not _is_generated(path):
                     continue
-                root = self.project_root / directory
-                if not root.is_dir():
+                try:
+                    path.unlink()
+                except OSError:
                     continue
-                for path in sorted(root.rglob("*.md*")):
-                    try:
-                        if GENERATED_HEADER in path.read_text(encoding="utf-8", errors="replace"):
-                            path.unlink()
-                            removed.append(str(path.relative_to(self.project_root)))
-                    except OSError:
-                        continue
-                for dirpath in sorted(root.rglob("*"), reverse=True):
-                    if dirpath.is_dir() and not any(dirpath.iterdir()):
-                        dirpath.rmdir()
-                if root.is_dir() and not any(root.iterdir()):
-                    root.rmdir()
-            if target.always_file:
-                path = self.project_root / target.always_file
-                if path.exists():
-                    text = path.read_text(encoding="utf-8", errors="replace")
-                    if managed_blocks.start_marker(BLOCK_NAME) in text:
-                        stripped = managed_blocks.strip(text, BLOCK_NAME)
-                        # Nothing of the user's left: the file was ours alone.
-                        if stripped.strip():
-                            path.write_text(stripped, encoding="utf-8")
-                        else:
-                            path.unlink()
-                        removed.append(target.always_file)
+                removed.append(str(path.relative_to(self.project_root)))
+                _prune_empty(path.parent, roots)
+            if target.always_file and self._strip_block(target.always_file):
+                removed.append(target.always_file)
+        if manifest.existed:
+            manifest.save()
 
         hook_result = HookService(str(self.project_root)).uninstall([t.key for t in selected])
         removed.extend(hook_result.get("removed", []))
@@ -613,6 +1246,73 @@ def _native_tools(tools: list) -> list[str]:
     return native
 
 
+def _read(path: Path) -> Optional[str]:
+    try:
+        return path.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def _renderer_stamp() -> tuple:
+    """Identifies this renderer, so output an older one wrote is rendered again."""
+    try:
+        version = importlib.metadata.version("common-rules-server")
+    except importlib.metadata.PackageNotFoundError:
+        version = "unknown"
+    return (version, Path(__file__).stat().st_mtime_ns)
+
+
+def _is_generated(path: Path) -> bool:
+    """Whether ``path`` carries the generated header, from its first few KB.
+
+    The header comes straight after the frontmatter, which is a few short
+    fields, so it is never further in than this.
+    """
+    try:
+        with open(path, "rb") as handle:
+            head = handle.read(HEADER_PROBE_BYTES)
+    except OSError:
+        return False
+    return GENERATED_HEADER.encode("utf-8") in head
+
+
+def _move_into_place(staged: Path, path: Path) -> None:
+    """Renames a staged file over ``path``, so it is replaced in one step.
+
+    A rename cannot cross filesystems. When an output directory is a link to
+    another one, the file is written beside its destination and renamed there
+    instead, which is as atomic for the reader.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.replace(staged, path)
+    except OSError as exc:
+        if exc.errno != errno.EXDEV:
+            raise
+        atomic_write(path, staged.read_text(encoding="utf-8"))
+
+
+def _prune_empty(directory: Path, roots: list[Path]) -> None:
+    """Removes ``directory`` and its parents while empty, up to and including a root."""
+    while any(directory == root or root in directory.parents for root in roots):
+        try:
+            directory.rmdir()
+        except OSError:
+            return  # not empty, or already gone
+        if directory in roots:
+            return
+        directory = directory.parent
+
+
+def _key(record: dict) -> str:
+    return f"{record['kind']}:{record['name']}"
+
+
+def _is_always(record: dict) -> bool:
+    return record["kind"] == "rule" and record.get("type") == "Always"
+
+
 def _is_command(record: dict) -> bool:
     """Whether the user can type this resource's name as a command.
 
@@ -0,0 +1,52 @@
+"""A shared secret in front of the HTTP server.
+
+``common-rules serve`` reached beyond loopback is reachable by anyone on the
+network, and its tools write files wherever ``project_root`` points. The SDK's
+Host and Origin checks stop a browser being used against it; they do nothing
+about a direct caller. So a server bound beyond loopback requires every request
+to carry ``Authorization: Bearer <token>``, compared in constant time.
+
+Plain ASGI, with no Starlette import, so nothing here is loaded until ``serve``
+needs it.
+"""
+
+import hmac
+from typing import Any, Awaitable, Callable
+
+Scope = dict[str, Any]
+Receive = Callable[[], Awaitable[dict[str, Any]]]
+Send = Callable[[dict[str, Any]], Awaitable[None]]
+App = Callable[[Scope, Receive, Send], Awaitable[None]]
+
+
+class BearerToken:
+    def __init__(self, app: App, token: str):
+        self.app = app
+        self._expected = f"Bearer {token}".encode("utf-8")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] not in ("http", "websocket") or self._authorised(scope):
+            await self.app(scope, receive, send)
+            return
+        if scope["type"] == "websocket":
+            await send({"type": "websocket.close", "code": 1008})
+            return
+        body = b'{"error": "unauthorised: send Authorization: Bearer <token>"}'
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 401,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode("ascii")),
+                    (b"www-authenticate", b"Bearer"),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+    def _authorised(self, scope: Scope) -> bool:
+        for name, value in scope.get("headers", ()):
+            if name == b"authorization":
+                return hmac.compare_digest(value, self._expected)
+        return False
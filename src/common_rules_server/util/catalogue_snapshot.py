@@ -0,0 +1,206 @@
+"""The whole resolved catalogue in one file, readable without parsing the kit.
+
+Offline sync writes dozens of files per editor, and online sync writes stubs
+that still need the server. A snapshot is the third way out: every record with
+its resolved body, the output templates, the relationship graph and a hash of
+each, in a single file that a server, a CI container or a script can load
+directly. A server started with ``COMMON_RULES_SNAPSHOT`` serves from one and
+never reads a Markdown file.
+
+The file is an index on its first line, then every entry back to back, all
+compact JSON. The index maps each record key and template name to the
+``[offset, length, sha256]`` of its entry. Offsets count from the byte after
+the index line, so a reader after one resource reads the first line, seeks,
+and decodes only that entry. Loading the whole catalogue reads the file once
+and slices it.
+
+Compact JSON rather than msgpack: it needs no dependency, stays readable with
+any tool, and decoding it is not what a load costs.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from common_rules_server.util.resource_parsing import Section
+from common_rules_server.util.resource_record import ResourceRecord
+
+FORMAT = "common-rules-catalogue"
+VERSION = 1
+
+# What a record carries beyond its header, when it has it.
+_RECORD_FIELDS = (
+    "gate",
+    "body",
+    "resolved_env",
+    "unresolved_env",
+    "script",
+    "overrides",
+)
+
+
+def write(
+    path: Path, catalogue: dict, templates: dict[str, str], about: Optional[dict] = None
+) -> dict[str, Any]:
+    """Writes ``catalogue`` and ``templates`` to ``path``; what was written."""
+    blobs: list[bytes] = []
+    offset = 0
+
+    def add(value: Any) -> list:
+        nonlocal offset
+        blob = _compact(value)
+        blobs.append(blob)
+        entry = [offset, len(blob), hashlib.sha256(blob).hexdigest()]
+        offset += len(blob)
+        return entry
+
+    records = {
+        key: add(_record_entry(record)) for key, record in sorted(catalogue["resources"].items())
+    }
+    stored_templates = {name: add(text) for name, text in sorted(templates.items())}
+    graph = add(
+        {
+            key: [[edge.relation, edge.target, edge.required] for edge in record.edges]
+            for key, record in sorted(catalogue["resources"].items())
+        }
+    )
+    body = b"".join(blobs)
+    index = {
+        "format": FORMAT,
+        "version": VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "digest": hashlib.sha256(body).hexdigest(),
+        **(about or {}),
+        "catalogue": {
+            "config": catalogue["config"],
+            "env_status": catalogue["env_status"],
+            "problems": catalogue["problems"],
+            "gated_out": catalogue["gated_out"],
+        },
+        "records": records,
+        "templates": stored_templates,
+        "graph": graph,
+    }
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, temporary = tempfile.mkstemp(dir=str(path.parent), prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(_compact(index) + b"\n" + body)
+        os.replace(temporary, path)
+    except Exception:
+        Path(temporary).unlink(missing_ok=True)
+        raise
+    return {
+        "path": str(path),
+        "resources": len(records),
+        "templates": len(stored_templates),
+        "bytes": path.stat().st_size,
+        "digest": index["digest"],
+    }
+
+
+class Snapshot:
+    def __init__(self, path: Path, index: dict, body_start: int) -> None:
+        self.path = path
+        self.index = index
+        self._body_start = body_start
+
+    @classmethod
+    def open(cls, path: Path) -> "Snapshot":
+        """Reads the index only. Raises ValueError for a file that is not a snapshot."""
+        with open(path, "rb") as handle:
+            line = handle.readline()
+        try:
+            index = json.loads(line)
+        except ValueError:
+            raise ValueError(f"{path} is not a catalogue snapshot") from None
+        if not isinstance(index, dict) or index.get("format") != FORMAT:
+            raise ValueError(f"{path} is not a catalogue snapshot")
+        if index.get("version") != VERSION:
+            raise ValueError(
+                f"{path} is snapshot version {index.get('version')}; this server reads {VERSION}"
+            )
+        return cls(path, index, len(line))
+
+    def keys(self) -> list[str]:
+        return list(self.index["records"])
+
+    def record(self, key: str) -> Optional[dict]:
+        """One record's stored entry, read on its own."""
+        entry = self.index["records"].get(key)
+        return None if entry is None else self._read(entry)
+
+    def template(self, name: str) -> Optional[str]:
+        entry = self.index["templates"].get(name)
+        return None if entry is None else self._read(entry)
+
+    def graph(self) -> dict[str, list]:
+        return self._read(self.index["graph"])
+
+    def catalogue(self) -> dict[str, Any]:
+        """The catalogue as ``ResourceService`` builds it, plus the templates.
+
+        Raises ValueError when an entry does not match its hash.
+        """
+        body = self.path.read_bytes()[self._body_start :]
+        resources = {
+            key: _record(_decode(body, entry)) for key, entry in self.index["records"].items()
+        }
+        return {
+            **self.index["catalogue"],
+            "resources": resources,
+            "templates": {
+                name: _decode(body, entry) for name, entry in self.index["templates"].items()
+            },
+        }
+
+    def _read(self, entry: list) -> Any:
+        offset, length, _ = entry
+        with open(self.path, "rb") as handle:
+            handle.seek(self._body_start + offset)
+            return _decode(handle.read(length), [0, length, entry[2]])
+
+
+def _record_entry(record: ResourceRecord) -> dict[str, Any]:
+    entry: dict[str, Any] = {
+        "header": record.header,
+        "source": record.source,
+        "file": record.file,
+        "raw_body": record.raw_body,
+        "section_index": [
+            [section.title, section.start, section.end] for section in record.get("section_index", ())
+        ],
+    }
+    for field in _RECORD_FIELDS:
+        if field in record:
+            entry[field] = record[field]
+    return entry
+
+
+def _record(entry: dict) -> ResourceRecord:
+    record = ResourceRecord(entry["header"], entry["source"], entry["file"], entry["raw_body"])
+    for field in _RECORD_FIELDS:
+        if field in entry:
+            setattr(record, field, entry[field])
+    record.section_index = tuple(Section(*section) for section in entry["section_index"])
+    return record
+
+
+def _decode(body: bytes, entry: list) -> Any:
+    offset, length, expected = entry
+    blob = body[offset : offset + length]
+    if hashlib.sha256(blob).hexdigest() != expected:
+        raise ValueError("snapshot entry does not match its hash; the file is damaged")
+    return json.loads(blob)
+
+
+def _compact(value: Any) -> bytes:
+    # ``default=str`` for the odd frontmatter value YAML reads as a date.
+    return json.dumps(
+        value, separators=(",", ":"), sort_keys=True, ensure_ascii=False, default=str
+    ).encode("utf-8")
@@ -0,0 +1,70 @@
+"""What a sync would change, collected instead of written.
+
+A plan is handed to the same writers a real sync uses. Each one still renders
+its output and compares it with disk, but reports the outcome here rather than
+acting on it — so the plan cannot drift from what a sync would actually do, and
+a CI job can check that generated files are up to date without a checkout
+that is allowed to change.
+"""
+
+import difflib
+import threading
+from typing import Any, Optional
+
+
+class ChangePlan:
+    def __init__(self, diffs: bool = False) -> None:
+        self.created: list[str] = []
+        self.modified: list[str] = []
+        self.deleted: list[str] = []
+        self.unchanged = 0
+        self.diffs: Optional[dict[str, str]] = {} if diffs else None
+        self._lock = threading.Lock()
+
+    def note(self, relative: str, before: Optional[str], after: Optional[str]) -> bool:
+        """Records one path's outcome; whether it is a change.
+
+        ``before`` is None for a file that does not exist, ``after`` None for
+        one that would be deleted.
+        """
+        with self._lock:
+            if before == after:
+                self.unchanged += 1
+                return False
+            if after is None:
+                self.deleted.append(relative)
+            elif before is None:
+                self.created.append(relative)
+            else:
+                self.modified.append(relative)
+            if self.diffs is not None:
+                self.diffs[relative] = "".join(
+                    difflib.unified_diff(
+                        (before or "").splitlines(keepends=True),
+                        (after or "").splitlines(keepends=True),
+                        fromfile=f"a/{relative}" if before is not None else "/dev/null",
+                        tofile=f"b/{relative}" if after is not None else "/dev/null",
+                    )
+                )
+            return True
+
+    @property
+    def up_to_date(self) -> bool:
+        return not (self.created or self.modified or self.deleted)
+
+    def summary(self) -> dict[str, Any]:
+        summary: dict[str, Any] = {
+            "up_to_date": self.up_to_date,
+            "counts": {
+                "created": len(self.created),
+                "modified": len(self.modified),
+                "deleted": len(self.deleted),
+                "unchanged": self.unchanged,
+            },
+            "created": sorted(self.created),
+            "modified": sorted(self.modified),
+            "deleted": sorted(self.deleted),
+        }
+        if self.diffs is not None:
+            summary["diffs"] = dict(sorted(self.diffs.items()))
+        return summary
@@ -0,0 +1,85 @@
+"""Which resources an edit affects: the reverse of what each one is rendered from.
+
+A resource's exported output depends on more than its own file. Its body has
+the project's configuration substituted into it, and the output template its
+relationships name is copied in. So "this file changed" has to be turned into
+"these resources need rendering again" by looking the dependency up backwards —
+from a file, a template or a config key to the resources that read it.
+
+The index is built per catalogue. Comparing the indexes on either side of an
+edit also catches what no single file explains: a gate switched in config adds
+or removes resources whose files never changed.
+"""
+
+from dataclasses import dataclass
+from pathlib import Path
+
+
+@dataclass(frozen=True)
+class DependencyIndex:
+    #: Every resource key in the catalogue.
+    keys: frozenset[str]
+    #: Resource file to the key it was loaded as.
+    by_file: dict[str, str]
+    #: Output template file name to the keys that copy it in.
+    by_template: dict[str, frozenset[str]]
+    #: Config key to the keys whose body names it, resolved or not.
+    by_config: dict[str, frozenset[str]]
+
+    def dependents(self, files: set[str], templates: set[str], config_keys: set[str]) -> set[str]:
+        found = {self.by_file[path] for path in files if path in self.by_file}
+        for name in templates:
+            found |= self.by_template.get(name, frozenset())
+        for key in config_keys:
+            found |= self.by_config.get(key, frozenset())
+        return found
+
+
+def build(catalogue: dict) -> DependencyIndex:
+    by_file: dict[str, str] = {}
+    by_template: dict[str, set[str]] = {}
+    by_config: dict[str, set[str]] = {}
+    for key, record in catalogue["resources"].items():
+        by_file[str(record["file"])] = key
+        output = (record.get("relationships") or {}).get("output")
+        if output:
+            by_template.setdefault(Path(str(output)).name, set()).add(key)
+        for name in [*(record.get("resolved_env") or {}), *(record.get("unresolved_env") or ())]:
+            by_config.setdefault(name, set()).add(key)
+        if record.get("gate"):
+            by_config.setdefault(str(record["gate"]), set()).add(key)
+    return DependencyIndex(
+        keys=frozenset(catalogue["resources"]),
+        by_file=by_file,
+        by_template={name: frozenset(keys) for name, keys in by_template.items()},
+        by_config={name: frozenset(keys) for name, keys in by_config.items()},
+    )
+
+
+def affected(
+    before: DependencyIndex,
+    after: DependencyIndex,
+    old_signature: tuple,
+    new_signature: tuple,
+    templates_dir: Path,
+) -> set[str]:
+    """The resource keys whose output may differ between two catalogue signatures.
+
+    Signatures are ``ResourceService``'s: file stamps, then configuration
+    items. Both indexes are asked, because a deleted file is only in the
+    one before and a new file only in the one after.
+    """
+    old_files, new_files = dict(old_signature[0]), dict(new_signature[0])
+    files = {
+        path for path in old_files.keys() | new_files.keys() if old_files.get(path) != new_files.get(path)
+    }
+    old_config, new_config = dict(old_signature[1]), dict(new_signature[1])
+    config_keys = {
+        key for key in old_config.keys() | new_config.keys() if old_config.get(key) != new_config.get(key)
+    }
+    templates = {Path(path).name for path in files if Path(path).parent == templates_dir}
+
+    found = before.keys ^ after.keys
+    for index in (before, after):
+        found |= index.dependents(files, templates, config_keys)
+    return found
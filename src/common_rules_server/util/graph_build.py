@@ -0,0 +1,256 @@
+"""Building the code-review-graph companion's index without waiting for it.
+
+Sync starts ``code-review-graph build`` when a project has no graph yet, so
+the companion has something to answer from. On a large repository that build
+takes minutes. Run inline, it held ``sync_to_ide``, ``setup_config`` and the
+CLI for all of that time, and nothing stopped a build that never finished.
+
+Here the build is a background job, one per project. ``ensure`` starts it and
+returns at once with its status; a sync while it runs reports the same job
+rather than starting another, and a failure is remembered for a while so a
+failing build is not retried on every sync. At most ``MAX_CONCURRENT_BUILDS``
+run at once; the rest wait their turn.
+
+The build runs in its own process group, and after
+``COMMON_RULES_GRAPH_TIMEOUT`` seconds the whole group is killed — the command
+may have children of its own. A server that exits stops its builds rather than
+orphaning them.
+
+A CLI sync exits long before a build ends, so ``detach=True`` hands the build
+to a small supervisor process instead — this module run as a script — that
+outlives the command and enforces the same timeout. A pid file beside the log
+says whether one is still running. The build writes to a log file rather than
+a pipe, so nothing dies on a closed pipe.
+
+Whether the command is installed is looked up once and remembered, so a
+project without the companion does not pay a ``PATH`` search on every sync.
+"""
+
+import atexit
+import logging
+import os
+import shutil
+import signal
+import subprocess
+import sys
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+COMMAND = "code-review-graph"
+GRAPH_DIRNAME = ".code-review-graph"
+#: Environment override for how long a build may run, in seconds.
+TIMEOUT_ENV = "COMMON_RULES_GRAPH_TIMEOUT"
+DEFAULT_TIMEOUT = 600
+#: How long a failed build is reported instead of being started again.
+RETRY_AFTER_SECONDS = 300
+#: How long the result of looking the command up is trusted. Long enough that
+#: syncs do not search ``PATH``; short enough that installing it is noticed.
+LOOKUP_TTL_SECONDS = 300
+#: Builds one process runs at once. Each parses a whole repository.
+MAX_CONCURRENT_BUILDS = 2
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GraphBuild:
+    project_root: str
+    timeout: int
+    log: Path
+    started: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+    #: running, succeeded, failed or timed_out.
+    state: str = "running"
+    error: Optional[str] = None
+    done: threading.Event = field(default_factory=threading.Event)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until the build ends; whether it did within ``timeout``."""
+        return self.done.wait(timeout)
+
+    def status(self) -> dict[str, Any]:
+        status: dict[str, Any] = {"status": self.state, "started": _iso(self.started)}
+        if self.finished is not None:
+            status["finished"] = _iso(self.finished)
+        if self.error:
+            status["error"] = self.error
+            status["log"] = str(self.log)
+        if self.state == "running":
+            status["note"] = "Building in the background; sync did not wait for it."
+        return status
+
+
+_builds: dict[str, GraphBuild] = {}
+_builds_guard = threading.Lock()
+_located: Optional[tuple[float, Optional[str]]] = None
+_slots = threading.BoundedSemaphore(MAX_CONCURRENT_BUILDS)
+#: Build processes this process started and has not yet seen end.
+_running: set[subprocess.Popen] = set()
+
+
+def ensure(project_root: Path, log: Path, detach: bool = False) -> dict[str, Any]:
+    """Starts a build for ``project_root`` unless it has a graph, or one is under way.
+
+    Never waits: the answer says what state the graph is in now. The build's
+    output goes to ``log``. ``detach`` is for a caller about to exit.
+    """
+    if (project_root / GRAPH_DIRNAME).exists():
+        return {"status": "present"}
+    command = locate()
+    if command is None:
+        return {
+            "status": "unavailable",
+            "hint": f"{COMMAND} is not installed; install it with `uv tool install {COMMAND}`.",
+        }
+
+    if detach:
+        return _ensure_detached(project_root, log, command)
+
+    key = str(project_root)
+    with _builds_guard:
+        build = _builds.get(key)
+        if build is not None and (
+            build.state == "running"
+            or (build.finished or 0) > time.time() - RETRY_AFTER_SECONDS
+        ):
+            return build.status()
+        build = _builds[key] = GraphBuild(key, timeout(), log)
+    threading.Thread(
+        target=_run, args=(build, command), name="common-rules-graph-build", daemon=True
+    ).start()
+    return build.status()
+
+
+def current(project_root: Path) -> Optional[GraphBuild]:
+    """The latest build started for ``project_root`` in this process, if any."""
+    with _builds_guard:
+        return _builds.get(str(project_root))
+
+
+def locate() -> Optional[str]:
+    """The command's path, or None; looked up at most once per TTL."""
+    global _located
+    now = time.monotonic()
+    if _located is None or now - _located[0] > LOOKUP_TTL_SECONDS:
+        _located = (now, shutil.which(COMMAND))
+    return _located[1]
+
+
+def timeout() -> int:
+    configured = os.environ.get(TIMEOUT_ENV, "").strip()
+    return int(configured) if configured.isdigit() and int(configured) > 0 else DEFAULT_TIMEOUT
+
+
+def reset() -> None:
+    """Forgets every build and the command lookup. For tests."""
+    global _located
+    with _builds_guard:
+        _builds.clear()
+    _located = None
+
+
+def _run(build: GraphBuild, command: str) -> None:
+    with _slots:
+        state, error = _supervise(command, build.project_root, build.log, build.timeout)
+    # Finished before state, so a build is never seen ended without an end time.
+    build.finished = time.time()
+    build.error = error
+    build.state = state
+    build.done.set()
+    if error:
+        logger.warning("code-review-graph build in %s: %s", build.project_root, error)
+
+
+def _supervise(command: str, cwd: str, log: Path, limit: int) -> tuple[str, Optional[str]]:
+    """Runs the build to its end or its time limit; its final state and error."""
+    try:
+        log.parent.mkdir(parents=True, exist_ok=True)
+        with open(log, "wb") as output:
+            process = subprocess.Popen(
+                [command, "build"],
+                cwd=cwd,
+                stdin=subprocess.DEVNULL,
+                stdout=output,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+    except OSError as e:
+        return "failed", str(e)
+    _running.add(process)
+    try:
+        returncode = process.wait(limit)
+    except subprocess.TimeoutExpired:
+        _stop(process)
+        return "timed_out", f"stopped after {limit}s; raise {TIMEOUT_ENV} for a large repository"
+    finally:
+        _running.discard(process)
+    if returncode:
+        return "failed", f"{COMMAND} build exited with status {returncode}"
+    return "succeeded", None
+
+
+def _stop(process: subprocess.Popen) -> None:
+    """Kills the build and everything it started."""
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+    except ProcessLookupError:
+        pass
+    process.wait()
+
+
+@atexit.register
+def _stop_all() -> None:
+    for process in list(_running):
+        _stop(process)
+
+
+def _ensure_detached(project_root: Path, log: Path, command: str) -> dict[str, Any]:
+    pid_file = log.with_suffix(".pid")
+    if _alive(pid_file):
+        return {"status": "running", "log": str(log)}
+    if log.exists() and log.stat().st_mtime > time.time() - RETRY_AFTER_SECONDS:
+        # No graph from a build that ended a moment ago: it failed.
+        return {"status": "failed", "log": str(log), "note": "Retried once the log is older."}
+
+    log.parent.mkdir(parents=True, exist_ok=True)
+    supervisor = subprocess.Popen(
+        [sys.executable, "-m", __name__, str(project_root), str(log), command, str(timeout())],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    pid_file.write_text(str(supervisor.pid), encoding="utf-8")
+    return {
+        "status": "running",
+        "log": str(log),
+        "note": f"Building in the background; it carries on after this command and is stopped after {timeout()}s.",
+    }
+
+
+def _alive(pid_file: Path) -> bool:
+    try:
+        pid = int(pid_file.read_text(encoding="utf-8"))
+        os.kill(pid, 0)
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def _iso(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
+
+
+if __name__ == "__main__":
+    # The detached supervisor: ``python -m ... ROOT LOG COMMAND TIMEOUT``.
+    root, log_path, build_command, limit = sys.argv[1:5]
+    try:
+        _supervise(build_command, root, Path(log_path), int(limit))
+    finally:
+        Path(log_path).with_suffix(".pid").unlink(missing_ok=True)
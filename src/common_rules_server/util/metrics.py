@@ -0,0 +1,206 @@
+"""What the server has been doing: call latencies, response sizes, cache hits.
+
+Tuning needs numbers, and none of the interesting ones are visible from outside
+the process — how long a tool takes once the client's overhead is removed, how
+much context each answer costs, whether a catalogue was served from memory or
+parsed again. Every tool call passes through ``observe``, and the services count
+the events worth counting with ``count``.
+
+Latencies are kept as a window of the most recent calls per tool rather than a
+full history, so percentiles describe current behaviour and memory stays flat
+however long the server runs. Counters are plain totals since start-up.
+
+Recording is a lock and an append; the cost of a call is unchanged to within
+measurement error. Measuring a response's size is not: it means serialising the
+whole answer a second time. So sizes are sampled — the first call of each tool
+and one in ``SIZE_SAMPLE_EVERY`` after it — and measured off the event loop,
+and the total is estimated from the samples.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Optional
+
+#: Environment variable: seconds between snapshots appended to each project's
+#: ``.common-rules-server/cache/metrics.jsonl``. Unset writes nothing.
+METRICS_INTERVAL_ENV = "COMMON_RULES_METRICS_INTERVAL"
+
+#: Size past which ``metrics.jsonl`` is moved aside to ``metrics.jsonl.1``, so
+#: the log holds between one and two of these and never grows without bound.
+ROTATE_BYTES = 1 << 20
+
+#: Calls per tool the percentiles are computed over.
+DEFAULT_WINDOW = 1024
+
+#: One call in this many has its response size measured.
+SIZE_SAMPLE_EVERY = 16
+
+#: Counter pairs reported as hit ratios: name -> (hits counter, misses counter).
+HIT_RATIOS = {
+    "catalogue": ("catalogue.hits", "catalogue.misses"),
+    "derived": ("derived.hits", "derived.misses"),
+    "built_in_parse": ("built_in_parse.hits", "built_in_parse.misses"),
+    "sync_body": ("sync_body.hits", "sync_body.misses"),
+}
+
+
+class Metrics:
+    def __init__(self, window: int = DEFAULT_WINDOW) -> None:
+        self.window = window
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._latencies: dict[str, deque] = defaultdict(lambda: deque(maxlen=self.window))
+        self._sizes: dict[str, deque] = defaultdict(lambda: deque(maxlen=self.window))
+        self._calls: dict[str, int] = defaultdict(int)
+        self._failures: dict[str, int] = defaultdict(int)
+        #: Bytes over the calls whose size was measured, and how many those were.
+        self._bytes: dict[str, int] = defaultdict(int)
+        self._sized: dict[str, int] = defaultdict(int)
+        self._counters: dict[str, int] = defaultdict(int)
+        self._last_written: dict[str, float] = {}
+
+    def observe(
+        self,
+        tool: str,
+        duration_ms: float,
+        response_bytes: Optional[int] = None,
+        failed: bool = False,
+    ) -> None:
+        """Records one tool call; ``response_bytes`` when its size was measured."""
+        with self._lock:
+            self._calls[tool] += 1
+            self._latencies[tool].append(duration_ms)
+            if failed:
+                self._failures[tool] += 1
+                return
+            if response_bytes is not None:
+                self._sizes[tool].append(response_bytes)
+                self._bytes[tool] += response_bytes
+                self._sized[tool] += 1
+
+    def wants_size(self, tool: str) -> bool:
+        """Whether the next call of ``tool`` should have its response measured."""
+        with self._lock:
+            return self._calls[tool] % SIZE_SAMPLE_EVERY == 0
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] += amount
+
+    def snapshot(self) -> dict[str, Any]:
+        """Everything recorded so far, summarised; safe to serialise as JSON."""
+        with self._lock:
+            tools = {
+                tool: {
+                    "calls": self._calls[tool],
+                    "failures": self._failures[tool],
+                    "latency_ms": _summary(self._latencies[tool]),
+                    "response_bytes": {
+                        **_summary(self._sizes[tool]),
+                        "sampled": self._sized[tool],
+                        "total": _estimated_total(
+                            self._bytes[tool],
+                            self._sized[tool],
+                            self._calls[tool] - self._failures[tool],
+                        ),
+                    },
+                }
+                for tool in sorted(self._calls)
+            }
+            counters = dict(sorted(self._counters.items()))
+
+        ratios = {}
+        for name, (hits_name, misses_name) in HIT_RATIOS.items():
+            hits, misses = counters.get(hits_name, 0), counters.get(misses_name, 0)
+            ratios[name] = round(hits / (hits + misses), 3) if hits + misses else None
+
+        return {
+            "uptime_s": round(time.monotonic() - self._started, 1),
+            "tools": tools,
+            "counters": counters,
+            "hit_ratios": ratios,
+        }
+
+    def write_if_due(self, project_root: str, extra: Optional[dict] = None) -> Optional[Path]:
+        """Appends a snapshot to the project's metrics log once per interval.
+
+        Does nothing unless the interval is configured and the project already
+        has a ``.common-rules-server`` directory — the server does not create
+        one just to log into it. A log past ``ROTATE_BYTES`` replaces the
+        previous ``metrics.jsonl.1`` and a new one is started. Returns the file
+        written, if any.
+        """
+        configured = os.environ.get(METRICS_INTERVAL_ENV, "").strip()
+        try:
+            interval = float(configured)
+        except ValueError:
+            return None
+        config_dir = Path(project_root) / ".common-rules-server"
+        if interval <= 0 or not config_dir.is_dir():
+            return None
+
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_written.get(project_root)
+            if last is not None and now - last < interval:
+                return None
+            self._last_written[project_root] = now
+
+        line = {"at": time.strftime("%Y-%m-%dT%H:%M:%S%z"), **self.snapshot(), **(extra or {})}
+        target = config_dir / "cache" / "metrics.jsonl"
+        try:
+            target.parent.mkdir(exist_ok=True)
+            if target.is_file() and target.stat().st_size >= ROTATE_BYTES:
+                os.replace(target, target.with_name(target.name + ".1"))
+            with target.open("a", encoding="utf-8") as handle:
+                handle.write(json.dumps(line, sort_keys=True) + "\n")
+        except OSError:
+            return None
+        return target
+
+    def reset(self) -> None:
+        with self._lock:
+            self._started = time.monotonic()
+            for table in (
+                self._latencies,
+                self._sizes,
+                self._calls,
+                self._failures,
+                self._bytes,
+                self._sized,
+                self._counters,
+                self._last_written,
+            ):
+                table.clear()
+
+
+def _estimated_total(measured: int, sampled: int, calls: int) -> int:
+    """Bytes over ``calls`` responses, from the ``sampled`` ones that were measured."""
+    return round(measured / sampled * calls) if sampled else 0
+
+
+def _summary(values: deque) -> dict[str, Any]:
+    if not values:
+        return {"p50": None, "p95": None, "p99": None, "max": None}
+    ordered = sorted(values)
+    return {
+        "p50": _percentile(ordered, 0.50),
+        "p95": _percentile(ordered, 0.95),
+        "p99": _percentile(ordered, 0.99),
+        "max": round(ordered[-1], 1),
+    }
+
+
+def _percentile(ordered: list, fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(1, math.ceil(len(ordered) * fraction))
+    return round(ordered[rank - 1], 1)
+
+
+#: The process-wide recorder.
+metrics = Metrics()
@@ -0,0 +1,161 @@
+"""Where a slow call spent its time, one profile per call.
+
+Timings say that a call was slow; a profile says why. With
+``COMMON_RULES_PROFILE`` naming a directory, each tool call and each CLI
+``sync`` writes a ``.pstats`` file there — open it with ``python -m pstats`` or
+snakeviz — and logs its most expensive functions, so the answer is often in the
+server log before anyone opens the file.
+
+The profiler runs where the work runs: on the worker that ``run_blocking``
+hands the call to, not on the event loop, which only waits. Profiling is
+exclusive — from Python 3.12 one profiler sees the whole process — so calls that
+overlap a profiled one run unprofiled rather than corrupting its numbers. Before
+3.12 a profiler sees only its own thread, so work a call spreads over further
+threads, such as setup's concurrent stages, shows only as the wait for it.
+
+Off, it costs a context-variable lookup per call. ``cProfile`` and ``pstats``
+are only imported once a call is profiled, so a server that never profiles
+never loads them.
+"""
+
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Iterator, Optional
+
+if TYPE_CHECKING:
+    import cProfile
+    import pstats
+
+logger = logging.getLogger(__name__)
+
+#: Environment variable naming the directory profiles are written to.
+PROFILE_ENV = "COMMON_RULES_PROFILE"
+
+#: Environment override for how many profiles are kept; the oldest go first.
+PROFILE_KEEP_ENV = "COMMON_RULES_PROFILE_KEEP"
+DEFAULT_KEEP = 50
+
+#: Functions listed in the log line for each profiled call.
+TOP_FUNCTIONS = 10
+
+_capture: contextvars.ContextVar[Optional["_Capture"]] = contextvars.ContextVar(
+    "common_rules_profile", default=None
+)
+_profiler_free = threading.Lock()
+
+
+class _Capture:
+    """The profiles collected for one call, to be merged when it ends."""
+
+    def __init__(self, label: str) -> None:
+        self.label = label
+        self.profiles: list["cProfile.Profile"] = []
+        self._lock = threading.Lock()
+
+    def add(self, profile: "cProfile.Profile") -> None:
+        with self._lock:
+            self.profiles.append(profile)
+
+
+def profile_dir() -> Optional[Path]:
+    configured = os.environ.get(PROFILE_ENV, "").strip()
+    return Path(configured).expanduser() if configured else None
+
+
+def active() -> bool:
+    """Whether the current call is being profiled."""
+    return _capture.get() is not None
+
+
+@contextmanager
+def capture(label: str) -> Iterator[None]:
+    """Profiles the work done under ``label`` and writes it out at the end.
+
+    Does nothing when profiling is off. The work itself is profiled by
+    ``profiled``, wherever it runs, as long as the context travels with it.
+    """
+    directory = profile_dir()
+    if directory is None:
+        yield
+        return
+
+    current = _Capture(label)
+    token = _capture.set(current)
+    try:
+        yield
+    finally:
+        _capture.reset(token)
+        if current.profiles:
+            _write(directory, current)
+
+
+def profiled(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """``fn(*args, **kwargs)``, under a profiler when the call is being profiled."""
+    current = _capture.get()
+    if current is None or not _profiler_free.acquire(blocking=False):
+        return fn(*args, **kwargs)
+
+    import cProfile
+
+    profile = cProfile.Profile()
+    try:
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler or debugger already owns the process.
+            return fn(*args, **kwargs)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            profile.disable()
+            current.add(profile)
+    finally:
+        _profiler_free.release()
+
+
+def _write(directory: Path, current: _Capture) -> Optional[Path]:
+    import pstats
+
+    stamp = time.time()
+    name = "{}-{:03d}-{}.pstats".format(
+        time.strftime("%Y%m%dT%H%M%S", time.localtime(stamp)),
+        int(stamp * 1000) % 1000,
+        re.sub(r"[^A-Za-z0-9_.-]", "_", current.label),
+    )
+    try:
+        directory.mkdir(parents=True, exist_ok=True)
+        stats = pstats.Stats(*current.profiles)
+        path = directory / name
+        stats.dump_stats(str(path))
+    except (OSError, TypeError) as exc:
+        logger.warning("could not write profile for %s: %s", current.label, exc)
+        return None
+
+    logger.info("profile of %s written to %s\n%s", current.label, path, _top_functions(stats))
+    _prune(directory)
+    return path
+
+
+def _top_functions(stats: "pstats.Stats") -> str:
+    """The most expensive functions by cumulative time, one per line."""
+    import pstats
+
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+    return "\n".join(
+        f"  {cumulative * 1000:9.1f} ms {calls:7d} calls  {pstats.func_std_string(function)}"
+        for function, (_, calls, _, cumulative, _) in rows[:TOP_FUNCTIONS]
+    )
+
+
+def _prune(directory: Path) -> None:
+    configured = os.environ.get(PROFILE_KEEP_ENV, "").strip()
+    keep = int(configured) if configured.isdigit() and int(configured) > 0 else DEFAULT_KEEP
+    profiles = sorted(directory.glob("*.pstats"), key=lambda path: path.name, reverse=True)
+    for stale in profiles[keep:]:
+        stale.unlink(missing_ok=True)
@@ -0,0 +1,112 @@
+"""Relevance ranking and size estimation for resources.
+
+Choosing what to read before a task is a retrieval problem: given a sentence
+describing the work, which resources say something about it? This module answers
+that with BM25 over three fields — name, description and body — weighted so that
+a word in a resource's name counts for more than the same word deep in its body.
+A resource is named and described for exactly this purpose, and the body is
+where incidental vocabulary lives.
+
+Nothing here knows what a resource is. It ranks keyed documents, which keeps it
+testable on its own and reusable by anything else that has to choose among them.
+"""
+
+import math
+import re
+from collections import Counter
+
+#: How much a term found in each field contributes. The body is the baseline.
+FIELD_WEIGHTS: dict[str, float] = {"name": 3.0, "description": 2.0, "body": 1.0}
+
+#: Standard BM25 constants. ``K1`` caps how much repetition of one term can
+#: count; ``B`` controls how strongly long documents are penalised.
+K1 = 1.2
+B = 0.75
+
+#: Characters per token for English prose and Markdown. A budget is an estimate
+#: either way, and a tokenizer dependency would tie the server to one model.
+CHARS_PER_TOKEN = 4
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Words that appear in nearly every task description and every resource, and so
+# rank nothing. Kept short on purpose: IDF already discounts common words, and a
+# long list starts discarding terms that do carry meaning in this domain.
+STOPWORDS = frozenset(
+    "a an and are as at be by do for from how i in into is it its of on or so "
+    "that the then this to we what when with without you your".split()
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count of ``text``, rounded up so a budget is never overrun."""
+    if not text:
+        return 0
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _stem(word: str) -> str:
+    """Folds the commonest English inflections together.
+
+    "tests", "testing" and "tested" should all find a resource about testing.
+    This is deliberately crude — a handful of suffixes, and only on words long
+    enough that stripping one still leaves a recognisable stem.
+    """
+    for suffix in ("ing", "ed", "es", "s"):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4:
+            return word[: -len(suffix)]
+    return word
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cased, stemmed terms of ``text`` with stopwords removed."""
+    return [
+        _stem(word)
+        for word in _WORD.findall((text or "").lower())
+        if word not in STOPWORDS
+    ]
+
+
+class RelevanceIndex:
+    """An inverted index over keyed, multi-field documents.
+
+    Built once, queried many times: every term frequency, document frequency and
+    field length is computed at construction, so a query costs a lookup per
+    query term rather than a pass over every document.
+    """
+
+    def __init__(self, documents: dict[str, dict[str, str]]):
+        self._postings: dict[str, dict[str, dict[str, int]]] = {}
+        self._lengths: dict[str, dict[str, int]] = {field: {} for field in FIELD_WEIGHTS}
+        self._average: dict[str, float] = {}
+
+        for key, fields in documents.items():
+            for field in FIELD_WEIGHTS:
+                terms = tokenize(fields.get(field, ""))
+                self._lengths[field][key] = len(terms)
+                for term, count in Counter(terms).items():
+                    self._postings.setdefault(term, {}).setdefault(key, {})[field] = count
+
+        for field, lengths in self._lengths.items():
+            self._average[field] = (sum(lengths.values()) / len(lengths)) if lengths else 0.0
+        self._size = len(documents)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def score(self, query: str) -> dict[str, float]:
+        """BM25 score of every document matching at least one query term."""
+        scores: dict[str, float] = {}
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (self._size - len(postings) + 0.5) / (len(postings) + 0.5))
+            for key, fields in postings.items():
+                total = 0.0
+                for field, count in fields.items():
+                    average = self._average[field] or 1.0
+                    norm = 1 - B + B * self._lengths[field][key] / average
+                    total += FIELD_WEIGHTS[field] * count * (K1 + 1) / (count + K1 * norm)
+                scores[key] = scores.get(key, 0.0) + idf * total
+        return scores
@@ -16,8 +16,6 @@ import re
 from dataclasses import dataclass, field
 from typing import Any, Optional
 
-import yaml
-
 VALID_KINDS = ("rule", "skill", "agent", "workflow", "loop", "hook")
 
 # Canonical lifecycle events. Each editor names these differently and
@@ -157,6 +155,10 @@ def parse_resource(text: str) -> ParsedResource:
             errors=["missing YAML frontmatter (file must open with '---' on line 1)"]
         )
 
+    # Imported here rather than at the top: the YAML parser is a measurable share
+    # of server start-up, and the handshake never parses a resource.
+    import yaml
+
     try:
         header = yaml.safe_load(match.group(1))
     except yaml.YAMLError as exc:
@@ -239,6 +241,51 @@ def parse_resource(text: str) -> ParsedResource:
 
 SCRIPT_BLOCK = re.compile(r"```(?:sh|bash|shell)\n(.*?)```", re.DOTALL)
 
+_SECTION_HEADING = re.compile(r"##[ \t]+(?P<title>.+?)[ \t#]*")
+_FENCE = re.compile(r"[ \t]*(```|~~~)")
+
+
+@dataclass(frozen=True)
+class Section:
+    """One ``##`` section of a body, addressed by byte offsets into its UTF-8 form."""
+
+    title: str
+    start: int
+    end: int
+
+    @property
+    def size(self) -> int:
+        return self.end - self.start
+
+
+def index_sections(body: str) -> tuple[Section, ...]:
+    """The ``##`` sections of ``body``, each running to the next one or the end.
+
+    Deeper headings belong to the section above them, and a ``##`` inside a
+    fenced block is code, not structure — a hook's script or an example report
+    would otherwise split the section that holds it. Text before the first
+    heading belongs to no section.
+
+    Offsets are in bytes so a section can be cut out of the encoded body without
+    rescanning it.
+    """
+    headings: list[tuple[str, int]] = []
+    offset = 0
+    fenced = False
+    for line in (body or "").splitlines(keepends=True):
+        if _FENCE.match(line):
+            fenced = not fenced
+        elif not fenced:
+            match = _SECTION_HEADING.fullmatch(line.rstrip("\r\n"))
+            if match:
+                headings.append((match.group("title").strip(), offset))
+        offset += len(line.encode("utf-8"))
+
+    return tuple(
+        Section(title, start, headings[i + 1][1] if i + 1 < len(headings) else offset)
+        for i, (title, start) in enumerate(headings)
+    )
+
 
 #: The one event that fires once per session. Every other event repeats — per
 #: turn, per shell command, per edit — so a message emitted without a condition
@@ -0,0 +1,103 @@
+"""The in-memory form of one loaded resource.
+
+A catalogue holds one record per resource, and a process serving many projects
+holds many catalogues, so the record's own weight matters more than its
+convenience. A record used to be a copy of the parsed header with a dozen keys
+added to it — a full dict per resource, per project, with the header copied
+into each one although built-in headers are already shared between projects.
+
+``ResourceRecord`` keeps a reference to the parsed header instead of copying it,
+and puts what loading adds in slots. Kind, name and source are interned, since
+every record repeats the same few, and the relationship block is also held as a
+tuple of ``Edge`` — what integrity and planning actually walk — so they no
+longer pick through nested dicts.
+
+It reads as a ``Mapping`` with the keys the old dict had, so renderers and
+templates that look fields up by name are unchanged. Responses still need plain
+dicts; ``to_dict`` makes one at the edge, where a response is built.
+"""
+
+import sys
+from collections.abc import Mapping
+from typing import Any, Iterator, NamedTuple
+
+#: Relations that connect resources, in the order they are walked. ``output``
+#: names a template, not a resource.
+EDGE_RELATIONS = ("comes_from", "goes_to", "can_invoke", "uses")
+
+# What loading adds to the header, in the order the old dict listed it. A slot
+# never assigned is a key the record does not have, as before.
+_ADDED = (
+    "kind",
+    "name",
+    "source",
+    "file",
+    "raw_body",
+    "gate",
+    "body",
+    "resolved_env",
+    "unresolved_env",
+    "section_index",
+    "script",
+    "overrides",
+)
+_ADDED_KEYS = frozenset(_ADDED)
+
+
+class Edge(NamedTuple):
+    relation: str
+    target: str
+    required: bool
+
+
+class ResourceRecord(Mapping):
+    __slots__ = ("header", "edges", *_ADDED)
+
+    def __init__(self, header: dict, source: str, file: str, raw_body: str) -> None:
+        self.header = header
+        self.kind = sys.intern(str(header["kind"]))
+        self.name = sys.intern(str(header["name"]))
+        self.source = sys.intern(source)
+        self.file = file
+        self.raw_body = raw_body
+        self.edges = edges_of(header.get("relationships"))
+
+    def __getitem__(self, key: str) -> Any:
+        if key in _ADDED_KEYS:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                pass
+        return self.header[key]
+
+    def __contains__(self, key: object) -> bool:
+        if key in _ADDED_KEYS and hasattr(self, key):  # type: ignore[arg-type]
+            return True
+        return key in self.header
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.header
+        for key in _ADDED:
+            if key not in self.header and hasattr(self, key):
+                yield key
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"ResourceRecord({self.kind}:{self.name}, {self.source})"
+
+    def to_dict(self, exclude: tuple[str, ...] = ()) -> dict[str, Any]:
+        """A plain dict of the record, for a response."""
+        return {key: self[key] for key in self if key not in exclude}
+
+
+def edges_of(relationships: Any) -> tuple[Edge, ...]:
+    """The outgoing edges of a normalized relationship block, interned."""
+    if not isinstance(relationships, dict):
+        return ()
+    return tuple(
+        Edge(relation, sys.intern(str(edge.get("target", ""))), bool(edge.get("required")))
+        for relation in EDGE_RELATIONS
+        for edge in relationships.get(relation, ())
+    )
@@ -0,0 +1,46 @@
+"""Coalescing concurrent identical computations into one.
+
+When several threads ask for the same expensive result at once — the agent
+firing ``get_context`` and a handful of ``get_resource`` calls together, each
+finding the catalogue stale — the first computes it and the rest wait for its
+answer. Without this, every one of them parses the same files.
+
+Only concurrent callers share. Once a computation finishes its key is forgotten,
+so the next caller computes afresh; remembering results is the caller's job.
+That keeps this correct for any key whose computation is deterministic while it
+runs, and keeps it from ever serving a result older than the call in flight.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._in_flight: dict[Hashable, Future] = {}
+
+    def do(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """``compute()``, or the result of the identical call already running.
+
+        An exception reaches every caller that shared the computation, exactly
+        as if each had run it.
+        """
+        with self._lock:
+            flight = self._in_flight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[key] = Future()
+
+        if not leader:
+            return flight.result()
+
+        try:
+            flight.set_result(compute())
+        except BaseException as exc:
+            flight.set_exception(exc)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return flight.result()
@@ -0,0 +1,119 @@
+"""The record of what sync generated, so the next sync can change only that.
+
+Editors watch their rules and skills directories and re-index on every file
+touched there. A sync that deletes and rewrites its whole output makes the
+editor reload everything even when nothing changed — and a sync that only adds
+files never notices the ones whose resource was deleted.
+
+The manifest remembers, for each generated path, the hash of what was written,
+the resource it came from, the editor it was written for, and the file's
+``(mtime, size)`` just after writing. A path whose hash is unchanged and whose
+file still has that stamp is left alone without being read; one that differs
+either way is compared and, if needed, rewritten. Paths in the manifest that the
+current kit no longer produces are the ones to delete.
+
+It also keeps, per editor, a fingerprint of everything the last sync rendered
+from. When that is unchanged and every file still has its stamp, there is
+nothing to render: the sync can answer from the manifest alone.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any, Optional
+
+MANIFEST_NAME = "sync-manifest.json"
+VERSION = 1
+
+
+def digest(content: str) -> str:
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class SyncManifest:
+    def __init__(
+        self, path: Path, files: dict[str, dict], existed: bool, inputs: Optional[dict] = None
+    ) -> None:
+        self.path = path
+        self.files = files
+        #: Fingerprint of what each editor's output was last rendered from.
+        self.inputs: dict[str, str] = inputs or {}
+        #: Whether a manifest was on disk. Without one, what an earlier sync
+        #: wrote can only be found by its generated header.
+        self.existed = existed
+        self._saved = self._serialised()
+
+    @classmethod
+    def load(cls, path: Path) -> "SyncManifest":
+        """The manifest at ``path``; an empty one if it is missing or unreadable."""
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return cls(path, {}, existed=False)
+        if not isinstance(data, dict) or data.get("version") != VERSION:
+            return cls(path, {}, existed=False)
+        files = data.get("files")
+        inputs = data.get("inputs")
+        return cls(
+            path,
+            files if isinstance(files, dict) else {},
+            existed=True,
+            inputs=inputs if isinstance(inputs, dict) else {},
+        )
+
+    def entry(self, relative: str) -> Optional[dict[str, Any]]:
+        return self.files.get(relative)
+
+    def paths(self, ide: str) -> list[str]:
+        return sorted(path for path, entry in self.files.items() if entry.get("ide") == ide)
+
+    def is_current(self, relative: str, content_digest: str, path: Path) -> bool:
+        """Whether ``path`` still holds exactly what was recorded, by its stamp."""
+        entry = self.files.get(relative)
+        if entry is None or entry.get("sha256") != content_digest:
+            return False
+        return _stamp(path) == entry.get("stamp")
+
+    def all_current(self, ide: str, root: Path) -> bool:
+        """Whether every file recorded for ``ide`` still has its recorded stamp."""
+        return all(
+            _stamp(root / relative) == self.files[relative].get("stamp")
+            for relative in self.paths(ide)
+        )
+
+    def record(self, relative: str, content_digest: str, path: Path, **about: Any) -> None:
+        self.files[relative] = {"sha256": content_digest, "stamp": _stamp(path), **about}
+
+    def forget(self, relative: str) -> None:
+        self.files.pop(relative, None)
+
+    def save(self) -> bool:
+        """Writes the manifest if anything in it changed; whether it did."""
+        current = self._serialised()
+        if current == self._saved and self.existed:
+            return False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.write_text(
+            json.dumps(
+                {"version": VERSION, "inputs": self.inputs, "files": self.files},
+                indent=2,
+                sort_keys=True,
+            )
+            + "\n",
+            encoding="utf-8",
+        )
+        self._saved = current
+        self.existed = True
+        return True
+
+    def _serialised(self) -> str:
+        return json.dumps([self.inputs, self.files], sort_keys=True)
+
+
+def _stamp(path: Path) -> Optional[list[int]]:
+    try:
+        info = os.stat(path)
+    except OSError:
+        return None
+    return [info.st_mtime_ns, info.st_size]
@@ -0,0 +1,242 @@
+"""Synthetic resource trees, for measuring how the server scales.
+
+The built-in kit is 52 resources, and every test runs against it or against a
+handful of handwritten files. That says nothing about a project with a thousand
+resources of its own, relationship chains twenty deep, or bodies ten times the
+usual size — which is where loading, integrity, sync and ``get_context`` would
+first show their cost.
+
+``generate_kit`` writes such a tree. Every file is a valid resource, every edge
+points at a resource that exists, and the same spec and seed always produce the
+same bytes, so two runs measure the same work. The knobs are the properties the
+server's costs depend on:
+
+* ``size`` and ``kinds`` — how many resources, and the share of each kind;
+* ``edge_density`` — mean relationship edges per resource;
+* ``chain_depth`` — length of the required ``goes-to`` chains, for deep graphs;
+* ``gated_fraction`` — share gated behind ``SYNTHETIC_GATE``, off unless set;
+* ``placeholders_per_kb`` — ``{{KEY}}`` substitutions per KiB of body;
+* ``body_bytes`` — approximate body size;
+* ``override_ratio`` — share named after an existing resource, so it overrides
+  it. The names to override are passed in; this module does not read the kit.
+
+Files land under ``<directory>/<kind>s/``, the layout of a project's resources
+directory.
+"""
+
+import math
+import random
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Sequence
+
+#: Config key the gated share is gated behind.
+SYNTHETIC_GATE = "SYNTHETIC_GATE"
+
+#: Real config keys, so placeholders resolve the way a real kit's would.
+PLACEHOLDER_KEYS = (
+    "PROJECT_NAME",
+    "TEST_COMMAND",
+    "LINT_COMMAND",
+    "BUILD_COMMAND",
+    "DOCS_DIR",
+    "WIKI_DIR",
+)
+
+DEFAULT_KINDS = {
+    "skill": 0.5,
+    "rule": 0.2,
+    "agent": 0.1,
+    "workflow": 0.1,
+    "loop": 0.05,
+    "hook": 0.05,
+}
+
+_WORDS = (
+    "agent build change check commit context contract coverage decision design "
+    "diff document edge error evidence failure feature file fixture gate graph "
+    "interface module plan project review risk scenario scope signal skill source "
+    "state step suite target task test trace verify work"
+).split()
+
+
+@dataclass(frozen=True)
+class KitSpec:
+    size: int = 1000
+    seed: int = 0
+    kinds: dict[str, float] = field(default_factory=lambda: dict(DEFAULT_KINDS))
+    edge_density: float = 2.0
+    chain_depth: int = 1
+    gated_fraction: float = 0.1
+    placeholders_per_kb: float = 2.0
+    body_bytes: int = 2000
+    override_ratio: float = 0.0
+
+
+def generate_kit(
+    directory: str | Path, spec: KitSpec, overridable: Sequence[tuple[str, str]] = ()
+) -> dict[str, Any]:
+    """Writes ``spec.size`` resources under ``directory`` and summarises them.
+
+    ``overridable`` is ``(kind, name)`` pairs of existing resources; the share
+    ``override_ratio`` of the generated ones take those names in turn.
+    """
+    rng = random.Random(spec.seed)
+    root = Path(directory)
+    overridden = {name for _, name in overridable}
+    plan = _plan(rng, spec, overridable)
+    # Gated resources are absent from the catalogue, so nothing may point at
+    # them; nor is an override gated, since the kit's own edges point at it.
+    gated = [
+        kind != "hook" and name not in overridden and rng.random() < spec.gated_fraction
+        for kind, name in plan
+    ]
+    names = [f"/{name}" for _, name in plan]
+    reachable = [name for name, off in zip(names, gated) if not off]
+
+    summary: dict[str, Any] = {
+        "directory": str(root),
+        "resources": len(plan),
+        "by_kind": {},
+        "edges": 0,
+        "gated": 0,
+        "overrides": 0,
+        "bytes": 0,
+    }
+    for index, (kind, name) in enumerate(plan):
+        edges = _edges(rng, spec, index, names, gated, reachable)
+        text = _render(rng, spec, kind, name, edges, gated[index])
+
+        path = root / f"{kind}s" / f"{name}.md"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text, encoding="utf-8")
+
+        summary["by_kind"][kind] = summary["by_kind"].get(kind, 0) + 1
+        summary["edges"] += len(edges)
+        summary["gated"] += int(gated[index])
+        summary["overrides"] += int(name in overridden)
+        summary["bytes"] += len(text.encode("utf-8"))
+
+    return summary
+
+
+def _plan(
+    rng: random.Random, spec: KitSpec, overridable: Sequence[tuple[str, str]]
+) -> list[tuple[str, str]]:
+    """The kind and name of every resource, in generation order."""
+    kinds = sorted(spec.kinds)
+    weights = [spec.kinds[kind] for kind in kinds]
+    to_override = list(overridable)
+    plan = []
+    for index in range(spec.size):
+        if to_override and rng.random() < spec.override_ratio:
+            plan.append(to_override.pop(0))
+            continue
+        kind = rng.choices(kinds, weights)[0]
+        plan.append((kind, f"synthetic-{kind}-{index:05d}"))
+    return plan
+
+
+def _edges(
+    rng: random.Random,
+    spec: KitSpec,
+    index: int,
+    names: list[str],
+    gated: list[bool],
+    reachable: list[str],
+) -> list[dict]:
+    """Outgoing edges: the next link of this resource's chain, then random ones."""
+    edges = []
+    depth = max(spec.chain_depth, 1)
+    following = index + 1
+    if depth > 1 and index % depth != depth - 1 and following < len(names) and not gated[following]:
+        edges.append({"relation": "goes-to", "target": names[following], "required": True})
+
+    wanted = _poisson(rng, spec.edge_density) if reachable else 0
+    for _ in range(wanted):
+        target = reachable[rng.randrange(len(reachable))]
+        if target == names[index]:
+            continue
+        relation = rng.choice(("comes-from", "goes-to", "uses", "can-invoke"))
+        edges.append({"relation": relation, "target": target, "required": False})
+    return edges
+
+
+def _render(
+    rng: random.Random, spec: KitSpec, kind: str, name: str, edges: list[dict], gated: bool
+) -> str:
+    header = [
+        "---",
+        f"kind: {kind}",
+        f"name: {name}",
+        f"description: Synthetic {kind} {name} for scale measurements.",
+    ]
+    header += {
+        "rule": ["type: Agent Requested"],
+        "skill": [f"trigger: {rng.choice(('model-invoked', 'user-invoked', 'both'))}"],
+        "agent": ["tools: [Read, Grep]"],
+        "workflow": [
+            "phases:",
+            *(f"  - name: Phase {step}\n    skills: [{edge['target']}]" for step, edge in enumerate(edges[:3], 1)),
+        ]
+        if edges
+        else ["phases:", "  - name: Only phase"],
+        "loop": ["trigger: user-invoked", f"wraps: {edges[0]['target'] if edges else '/' + name}"],
+        "hook": ["event: session-start", "blocking: false"],
+    }[kind]
+    if gated:
+        header.append(f"gate: {SYNTHETIC_GATE}")
+
+    by_relation: dict[str, list[dict]] = {}
+    for edge in edges:
+        by_relation.setdefault(edge["relation"], []).append(edge)
+    if by_relation:
+        header.append("relationships:")
+        for relation, targets in by_relation.items():
+            header.append(f"  {relation}:")
+            for edge in targets:
+                header.append(f"    - target: {edge['target']}")
+                header.append(f"      required: {'true' if edge['required'] else 'false'}")
+    header += ["self_check:", "  - Did the synthetic step do what it says?", "---", ""]
+
+    body = [
+        "## Relationships",
+        "",
+        *(f"- {edge['relation']} {edge['target']}" for edge in edges),
+        "",
+        "## Instructions",
+        "",
+        _prose(rng, spec),
+        "",
+    ]
+    if kind == "hook":
+        body += ["```sh", "exit 0", "```", ""]
+    return "\n".join(header + body)
+
+
+def _prose(rng: random.Random, spec: KitSpec) -> str:
+    """About ``body_bytes`` of words, with placeholders at the configured density."""
+    placeholder_odds = spec.placeholders_per_kb * 6 / 1024
+    words: list[str] = []
+    size = 0
+    while size < spec.body_bytes:
+        if rng.random() < placeholder_odds:
+            word = "{{" + rng.choice(PLACEHOLDER_KEYS) + "}}"
+        else:
+            word = rng.choice(_WORDS)
+        words.append(word)
+        size += len(word) + 1
+        if len(words) % 12 == 0:
+            words[-1] += ".\n"
+    return " ".join(words).replace("\n ", "\n").strip() + "."
+
+
+def _poisson(rng: random.Random, mean: float) -> int:
+    """A Poisson-distributed count, by Knuth's method; fine for small means."""
+    if mean <= 0:
+        return 0
+    limit, product, count = math.exp(-mean), rng.random(), 0
+    while product > limit:
+        product *= rng.random()
+        count += 1
+    return count
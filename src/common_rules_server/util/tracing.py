@@ -0,0 +1,146 @@
+"""Nested timing spans for the phases of a long call.
+
+Setup and sync report what they wrote but not where the time went, and the
+candidates are many: cleaning old output, building the code-review graph,
+rendering each editor's files, installing hooks, merging the always-file. A
+span around each phase answers that from a single response.
+
+Spans only record while a trace is open. ``trace`` opens one and ``span`` marks
+a phase inside it; outside a trace ``span`` does nothing beyond one
+context-variable lookup, so phases stay marked permanently at no cost. The
+current span is a context variable, so phases run on a worker or a pipeline
+thread nest under the span that handed the work off, as long as the context
+travels with it.
+
+A finished trace reads two ways: ``tree`` for the tool response, and
+``trace_events`` in the Trace Event format that chrome://tracing and Perfetto
+open, with each thread on its own track.
+"""
+
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+#: Trace files kept per project; the oldest go first.
+KEEP_TRACES = 20
+
+
+class Span:
+    def __init__(self, trace: "Trace", name: str, attrs: dict[str, Any]) -> None:
+        self.trace = trace
+        self.name = name
+        self.attrs = attrs
+        self.thread = threading.get_ident()
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.children: list[Span] = []
+
+    def tree(self) -> dict[str, Any]:
+        origin = self.trace.root.started
+        node: dict[str, Any] = {
+            "name": self.name,
+            "started_ms": _ms(self.started - origin),
+            "duration_ms": _ms((self.finished or time.perf_counter()) - self.started),
+        }
+        if self.attrs:
+            node["attrs"] = self.attrs
+        if self.children:
+            node["children"] = [child.tree() for child in self.children]
+        return node
+
+
+class Trace:
+    def __init__(self, name: str) -> None:
+        self._lock = threading.Lock()
+        self.root = Span(self, name, {})
+
+    def add(self, parent: Span, child: Span) -> None:
+        with self._lock:
+            parent.children.append(child)
+
+    def tree(self) -> dict[str, Any]:
+        with self._lock:
+            return self.root.tree()
+
+    def trace_events(self) -> dict[str, Any]:
+        """The trace as Trace Event JSON: one complete event per span."""
+        events: list[dict[str, Any]] = []
+        pid = os.getpid()
+        origin = self.root.started
+        with self._lock:
+            pending = [self.root]
+            while pending:
+                span = pending.pop()
+                finished = span.finished or time.perf_counter()
+                events.append(
+                    {
+                        "name": span.name,
+                        "ph": "X",
+                        "ts": round((span.started - origin) * 1_000_000, 1),
+                        "dur": round((finished - span.started) * 1_000_000, 1),
+                        "pid": pid,
+                        "tid": span.thread,
+                        "args": span.attrs,
+                    }
+                )
+                pending.extend(span.children)
+        events.sort(key=lambda event: event["ts"])
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export(self, directory: Path) -> Path:
+        """Writes the trace events into ``directory``, keeping the newest few."""
+        directory.mkdir(parents=True, exist_ok=True)
+        stamp = time.time()
+        path = directory / "{}-{:03d}-{}.json".format(
+            time.strftime("%Y%m%dT%H%M%S", time.localtime(stamp)),
+            int(stamp * 1000) % 1000,
+            self.root.name.replace("/", "_"),
+        )
+        path.write_text(json.dumps(self.trace_events()), encoding="utf-8")
+        for stale in sorted(directory.glob("*.json"), reverse=True)[KEEP_TRACES:]:
+            stale.unlink(missing_ok=True)
+        return path
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "common_rules_span", default=None
+)
+
+
+@contextmanager
+def trace(name: str) -> Iterator[Trace]:
+    """Opens a trace; spans marked inside it, on any thread, are recorded."""
+    recorded = Trace(name)
+    token = _current.set(recorded.root)
+    try:
+        yield recorded
+    finally:
+        recorded.root.finished = time.perf_counter()
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Optional[Span]]:
+    """Marks a phase. Records only inside an open trace."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+
+    child = Span(parent.trace, name, attrs)
+    parent.trace.add(parent, child)
+    token = _current.set(child)
+    try:
+        yield child
+    finally:
+        child.finished = time.perf_counter()
+        _current.reset(token)
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 1)
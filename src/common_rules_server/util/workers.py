@@ -0,0 +1,103 @@
+"""Blocking service work, kept off the event loop.
+
+Every tool is a coroutine, and every service underneath is synchronous: it reads
+the kit from disk, writes editor files, spawns git. Run directly inside a tool,
+that work holds the event loop for its whole duration, and a slow
+``setup_config`` then stalls every other request in flight — including the
+``roots/list`` round trip another call is waiting on.
+
+So service work runs in a bounded thread pool. The bound matters as much as the
+pool: a burst of parallel tool calls should queue, not spawn a thread each.
+
+Threads bring a second problem, which is two writers interleaving in the same
+project — a sync cleaning files while another writes them. ``project_lock``
+serialises writers per project; readers never take it, because nothing they do
+can leave the project half-written.
+"""
+
+import asyncio
+import contextvars
+import functools
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+from common_rules_server.util import profiling
+
+#: Environment override for the pool size.
+WORKERS_ENV = "COMMON_RULES_WORKERS"
+
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_guard = threading.Lock()
+
+#: Held weakly: a lock lives while someone holds or waits on it, so a
+#: long-running server does not keep one for every project it ever wrote to.
+_locks: "weakref.WeakValueDictionary[str, threading.RLock]" = weakref.WeakValueDictionary()
+_locks_guard = threading.Lock()
+
+
+def max_workers() -> int:
+    """Pool size: the environment override, else a small multiple of the CPUs.
+
+    The work is mostly file I/O, which releases the GIL, so a few more threads
+    than cores is useful. Past that, more threads only mean more contention on
+    the same disk.
+    """
+    configured = os.environ.get(WORKERS_ENV, "").strip()
+    if configured.isdigit() and int(configured) > 0:
+        return int(configured)
+    return min(8, (os.cpu_count() or 1) + 4)
+
+
+def executor() -> ThreadPoolExecutor:
+    """The shared pool, created on first use rather than at import."""
+    global _pool
+    with _pool_guard:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=max_workers(), thread_name_prefix="common-rules")
+        return _pool
+
+
+@contextmanager
+def project_lock(project_root: str) -> Iterator[None]:
+    """Holds the write lock for one project.
+
+    Re-entrant, so a writer that calls another writer in the same project —
+    setup running a sync — does not deadlock against itself.
+    """
+    with _locks_guard:
+        lock = _locks.get(str(project_root))
+        if lock is None:
+            lock = _locks[str(project_root)] = threading.RLock()
+    with lock:
+        yield
+
+
+async def run_blocking(
+    fn: Callable[..., Any], *args: Any, lock: Optional[str] = None, **kwargs: Any
+) -> Any:
+    """Runs ``fn`` on the worker pool and awaits its result.
+
+    ``lock`` names a project root to hold the write lock for while ``fn`` runs.
+    The lock is taken inside the worker, so waiting for it ties up a thread and
+    never the event loop.
+
+    Context variables travel with the call, so anything the caller set — which
+    tool is running, an active trace — is visible to the work it hands off.
+    A call that is being profiled is profiled here, where its work runs.
+    """
+    if profiling.active():
+        fn = functools.partial(profiling.profiled, fn)
+    if lock is not None:
+        fn = functools.partial(_locked, lock, fn)
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, fn, *args, **kwargs)
+    return await asyncio.get_running_loop().run_in_executor(executor(), call)
+
+
+def _locked(project_root: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    with project_lock(project_root):
+        return fn(*args, **kwargs)
@@ -0,0 +1,108 @@
+"""Long-lived per-project catalogues and their warm-up."""
+
+import threading
+import time
+from pathlib import Path
+
+from common_rules_server.service.catalogue_registry import CatalogueRegistry
+from common_rules_server.service.resource_service import ResourceService
+
+
+def test_one_service_per_project(python_project: Path, tmp_path_factory):
+    registry = CatalogueRegistry()
+    other = tmp_path_factory.mktemp("other")
+
+    first = registry.resources(str(python_project))
+    assert registry.resources(str(python_project)) is first
+    assert registry.resources(str(other)) is not first
+
+
+def test_the_catalogue_outlives_the_call_that_loaded_it(python_project: Path):
+    registry = CatalogueRegistry()
+    catalogue = registry.resources(str(python_project)).load()
+    assert registry.resources(str(python_project)).load() is catalogue
+
+
+def test_a_warmed_project_answers_without_parsing(python_project: Path, monkeypatch):
+    registry = CatalogueRegistry()
+    summary = registry.start_warm_up(str(python_project)).result(timeout=30)
+    assert summary["warmed"] is True
+    assert summary["resources"] > 0
+
+    def no_parsing(*_):
+        raise AssertionError("parsed a file after warm-up")
+
+    monkeypatch.setattr(ResourceService, "_load_file", no_parsing)
+    context = registry.resources(str(python_project)).get_context()
+    assert context["integrity"]["ok"] is True
+
+
+def test_a_call_during_warm_up_waits_instead_of_parsing_again(python_project: Path, monkeypatch):
+    parsed: list[str] = []
+    guard = threading.Lock()
+    real_load_file = ResourceService._load_file
+
+    def slow_load_file(self, path, source):
+        with guard:
+            parsed.append(str(path))
+        time.sleep(0.005)
+        return real_load_file(self, path, source)
+
+    monkeypatch.setattr(ResourceService, "_load_file", slow_load_file)
+    registry = CatalogueRegistry()
+    warm_up = registry.start_warm_up(str(python_project))
+    while not warm_up.running() and not warm_up.done():
+        time.sleep(0.001)
+
+    registry.resources(str(python_project)).load()
+
+    assert warm_up.done()
+    assert len(parsed) == len(set(parsed))
+
+
+def test_a_second_warm_up_request_joins_the_one_in_flight(python_project: Path):
+    registry = CatalogueRegistry()
+    first = registry.start_warm_up(str(python_project))
+    second = registry.start_warm_up(str(python_project))
+    assert first is second or first.done()
+    first.result(timeout=30)
+
+
+def test_a_failed_warm_up_is_reported_not_raised(python_project: Path, monkeypatch):
+    def broken(self, force=False):
+        raise OSError("disk went away")
+
+    monkeypatch.setattr(ResourceService, "load", broken)
+    summary = CatalogueRegistry().start_warm_up(str(python_project)).result(timeout=30)
+    assert summary["warmed"] is False
+
+
+def test_the_least_recently_used_project_is_dropped_first(tmp_path_factory):
+    registry = CatalogueRegistry(max_projects=2)
+    first, second, third = (str(tmp_path_factory.mktemp(name)) for name in ("a", "b", "c"))
+
+    kept = registry.resources(first)
+    registry.resources(second)
+    registry.resources(first)
+    registry.resources(third)
+
+    assert registry.resources(first) is kept
+    assert list(registry._services) == [third, first]
+
+
+def test_the_memory_ceiling_drops_loaded_catalogues(python_project: Path, tmp_path_factory):
+    registry = CatalogueRegistry(max_bytes=1)
+    other = str(tmp_path_factory.mktemp("other"))
+
+    registry.resources(str(python_project)).load()
+    registry.resources(other).load()
+
+    assert list(registry._services) == [other]
+
+
+def test_the_ceilings_come_from_the_environment(monkeypatch):
+    monkeypatch.setenv("COMMON_RULES_MAX_PROJECTS", "3")
+    monkeypatch.setenv("COMMON_RULES_CACHE_MB", "nonsense")
+    registry = CatalogueRegistry()
+    assert registry.max_projects == 3
+    assert registry.max_bytes == 256 * 1024 * 1024
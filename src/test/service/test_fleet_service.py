@@ -0,0 +1,100 @@
+"""Syncing many projects in one run."""
+
+import os
+from pathlib import Path
+
+from common_rules_server.service.fleet_service import FleetService, expand_roots
+
+
+def _projects(tmp_path: Path, count: int) -> list[str]:
+    roots = []
+    for i in range(count):
+        root = tmp_path / "services" / f"svc-{i}"
+        root.mkdir(parents=True)
+        (root / "pyproject.toml").write_text(f'[project]\nname = "svc-{i}"\n', encoding="utf-8")
+        roots.append(str(root))
+    return roots
+
+
+def test_every_project_is_synced_and_totalled(tmp_path: Path):
+    roots = _projects(tmp_path, 2)
+
+    result = FleetService(jobs=1).sync(roots, ["cursor"], include_hooks=False)
+
+    assert [p["project"] for p in result["projects"]] == roots
+    assert all(p["ok"] and p["editors"] == ["cursor"] for p in result["projects"])
+    assert result["total"]["failed"] == 0
+    assert result["total"]["changed"] == sum(p["changed"] for p in result["projects"]) > 0
+    for root in roots:
+        assert (Path(root) / ".cursor/skills/tdd/SKILL.md").exists()
+
+
+def test_projects_run_across_worker_processes(tmp_path: Path):
+    roots = _projects(tmp_path, 3)
+
+    result = FleetService(jobs=2).sync(roots, ["claude"], include_hooks=False, offline=True)
+
+    assert result["total"] == {**result["total"], "projects": 3, "failed": 0, "jobs": 2}
+    for root in roots:
+        assert (Path(root) / "CLAUDE.md").exists()
+
+
+def test_a_failing_project_is_reported_without_stopping_the_rest(tmp_path: Path):
+    roots = [str(tmp_path / "gone"), *_projects(tmp_path, 1)]
+
+    result = FleetService(jobs=1).sync(roots, ["cursor"], include_hooks=False)
+
+    missing, synced = result["projects"]
+    assert not missing["ok"] and "no such directory" in missing["error"]
+    assert synced["ok"]
+    assert result["total"]["failed"] == 1
+
+
+def test_a_project_with_no_editor_counts_as_failed(tmp_path: Path):
+    result = FleetService(jobs=1).sync(_projects(tmp_path, 1), include_hooks=False)
+
+    assert result["projects"][0]["error"] == "No editor detected in this project."
+    assert result["total"]["failed"] == 1
+
+
+def test_roots_come_from_globs_and_a_listing(tmp_path: Path):
+    roots = _projects(tmp_path, 3)
+    (tmp_path / "services" / "README.md").write_text("not a project", encoding="utf-8")
+    listing = tmp_path / "fleet.txt"
+    listing.write_text(f"# our services\n\n{roots[0]}\n{tmp_path / 'elsewhere'}\n", encoding="utf-8")
+
+    expanded = expand_roots([str(tmp_path / "services" / "*")], str(listing))
+
+    assert expanded == [*roots, str(tmp_path / "elsewhere")]
+
+
+def test_fleet_workers_start_no_graph_builds(tmp_path: Path, monkeypatch):
+    from common_rules_server.util import graph_build
+
+    started = []
+    monkeypatch.setattr(graph_build, "ensure", lambda *args, **kwargs: started.append(args))
+
+    result = FleetService(jobs=1).sync(_projects(tmp_path, 2), ["cursor"], include_hooks=False)
+
+    assert result["total"]["failed"] == 0
+    assert started == []
+
+
+def _dies(root, *args):
+    if root.endswith("svc-0"):
+        os._exit(1)
+    return {"project": root, "ok": True, "changed": 0, "removed": 0}
+
+
+def test_a_worker_that_dies_is_a_failed_project_not_a_failed_run(tmp_path: Path, monkeypatch):
+    from common_rules_server.service import fleet_service
+
+    monkeypatch.setattr(fleet_service, "_sync_project", _dies)
+    roots = _projects(tmp_path, 2)
+
+    result = FleetService(jobs=2).sync(roots, ["cursor"], include_hooks=False)
+
+    died = result["projects"][0]
+    assert [p["project"] for p in result["projects"]] == roots
+    assert not died["ok"] and "BrokenProcessPool" in died["error"]
+    assert result["total"]["failed"] >= 1
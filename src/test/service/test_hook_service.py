@@ -122,6 +122,27 @@ def test_reinstall_does_not_duplicate(tmp_path: Path):
     assert len(cursor["hooks"]["beforeShellExecution"]) == 1
 
 
+def test_reinstalling_the_same_hooks_writes_nothing(tmp_path: Path):
+    service = HookService(str(tmp_path))
+    service.install([HOOK], ["cursor"])
+    files = [tmp_path / ".cursor/hooks.json", tmp_path / ".cursor/hooks/test-guard.sh"]
+    before = [path.stat().st_mtime_ns for path in files]
+
+    result = service.install([HOOK], ["cursor"])
+
+    assert result["installed"][0]["changed"] == []
+    assert [path.stat().st_mtime_ns for path in files] == before
+
+
+def test_a_hook_dropped_from_the_kit_loses_its_script(tmp_path: Path):
+    service = HookService(str(tmp_path))
+    service.install([HOOK, {**HOOK, "name": "second-guard"}], ["cursor"])
+    service.install([HOOK], ["cursor"])
+
+    assert (tmp_path / ".cursor/hooks/test-guard.sh").exists()
+    assert not (tmp_path / ".cursor/hooks/second-guard.sh").exists()
+
+
 def test_uninstall_removes_only_generated_hooks(tmp_path: Path):
     config = tmp_path / ".cursor" / "hooks.json"
     config.parent.mkdir(parents=True)
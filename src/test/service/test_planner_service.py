@@ -0,0 +1,79 @@
+"""Budget-aware planning: relevance, cost and required edges together."""
+
+from pathlib import Path
+
+from common_rules_server.service.planner_service import PlannerService
+from common_rules_server.service.resource_service import ResourceService
+from test.conftest import write_resource
+
+
+def _skill(name: str, description: str, body: str, goes_to: str = "") -> str:
+    edge = f"relationships:\n  goes-to:\n    - target: {goes_to}\n      required: true\n" if goes_to else ""
+    return (
+        f"---\nkind: skill\nname: {name}\ndescription: {description}\n"
+        f"trigger: model-invoked\n{edge}---\n\n{body}\n"
+    )
+
+
+def _kit(service: ResourceService) -> Path:
+    root = service.built_in_dir / "skills"
+    write_resource(root, "deploy", _skill("deploy", "Deploy the release.", "x" * 400, "/smoke"))
+    write_resource(root, "smoke", _skill("smoke", "Smoke check after a change.", "y" * 400))
+    write_resource(root, "lint", _skill("lint", "Lint the code.", "z" * 40))
+    return root
+
+
+def _names(result: dict) -> list[str]:
+    return [step["name"] for step in result["plan"]]
+
+
+def test_plans_the_most_relevant_resource(isolated_resources: ResourceService):
+    _kit(isolated_resources)
+    result = PlannerService(isolated_resources).plan("lint the code", 1000)
+    assert _names(result)[0] == "lint"
+    assert result["plan"][0]["reason"] == "matched the task"
+
+
+def test_a_selected_resource_brings_its_required_edges(isolated_resources: ResourceService):
+    _kit(isolated_resources)
+    result = PlannerService(isolated_resources).plan("deploy", 1000)
+    names = _names(result)
+    assert names.index("smoke") == names.index("deploy") + 1
+    assert result["plan"][names.index("smoke")]["reason"] == "required by /deploy"
+
+
+def test_a_group_that_does_not_fit_is_omitted_whole(isolated_resources: ResourceService):
+    """Offering deploy without its required smoke check would drop a step silently."""
+    _kit(isolated_resources)
+    result = PlannerService(isolated_resources).plan("deploy", 150)
+    assert "deploy" not in _names(result)
+    assert any(entry["name"] == "deploy" for entry in result["omitted"])
+
+
+def test_the_plan_never_exceeds_the_budget(resources: ResourceService):
+    result = PlannerService(resources).plan("review the change and write docs", 1500)
+    assert 0 < result["used_tokens"] <= 1500
+    assert result["used_tokens"] == sum(step["tokens"] for step in result["plan"])
+
+
+def test_inline_carries_the_instructions(resources: ResourceService):
+    result = PlannerService(resources).plan("test driven development", 3000, inline=True)
+    assert result["plan"]
+    assert all(step["body"] for step in result["plan"])
+
+
+def test_hooks_are_never_planned(resources: ResourceService):
+    result = PlannerService(resources).plan("guard secrets destructive commands", 100000)
+    assert all(step["kind"] != "hook" for step in result["plan"])
+
+
+def test_the_index_is_built_once_per_catalogue(resources: ResourceService):
+    planner = PlannerService(resources)
+    assert planner.index() is planner.index()
+
+
+def test_invalid_input_is_a_result_with_a_hint(resources: ResourceService):
+    planner = PlannerService(resources)
+    assert "hint" in planner.plan("", 100)
+    assert "hint" in planner.plan("anything", 0)
+    assert "hint" in planner.plan("anything", "lots")
@@ -1,7 +1,12 @@
 """Resource loading, resolution, overriding and creation."""
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from common_rules_server.service import resource_service
+from common_rules_server.service.config_service import ConfigService
 from common_rules_server.service.resource_service import ResourceService
 from test.conftest import write_resource
 
@@ -303,3 +308,124 @@ def test_cache_is_invalidated_when_a_file_changes(isolated_resources: ResourceSe
 
     names = {e["name"] for e in isolated_resources.get_context()["resources"]}
     assert names == {"renamed"}
+
+
+def test_concurrent_loads_of_one_project_parse_each_file_once(config, monkeypatch):
+    """Separate instances too: a setup run and the server's own catalogue share."""
+    parsed: list[str] = []
+    guard = threading.Lock()
+    real_load_file = ResourceService._load_file
+
+    def counting_load_file(self, path, source):
+        with guard:
+            parsed.append(str(path))
+        time.sleep(0.002)
+        return real_load_file(self, path, source)
+
+    monkeypatch.setattr(ResourceService, "_load_file", counting_load_file)
+    services = [ResourceService(config), ResourceService(config)]
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        catalogues = list(pool.map(lambda i: services[i % 2].load(), range(4)))
+
+    assert len(parsed) == len(set(parsed))
+    assert all(catalogue is catalogues[0] for catalogue in catalogues)
+
+
+def test_integrity_is_reused_until_a_template_appears(isolated_resources: ResourceService):
+    """Templates are not resources, but the report depends on which ones exist."""
+    write_resource(
+        isolated_resources.built_in_dir,
+        "sample",
+        "---\nkind: skill\nname: sample\ndescription: X.\ntrigger: user-invoked\n"
+        "relationships:\n  output: templates/sample.md\n---\nBody\n",
+    )
+    first = isolated_resources.check_integrity()
+    assert first["missing_templates"]
+    assert isolated_resources.check_integrity() is first
+
+    write_resource(isolated_resources.templates_dir, "sample", "# Sample\n")
+    assert isolated_resources.check_integrity()["ok"] is True
+
+
+# ------------------------------------------------------------------ sections
+
+
+def test_get_resource_returns_only_the_sections_asked_for(resources: ResourceService):
+    result = resources.get_resource("skill", "tdd", sections=["INSTRUCTIONS"])
+    assert result["sections"] == ["Instructions"]
+    assert result["body"].startswith("## Instructions")
+    assert "## Relationships" not in result["body"]
+    assert len(result["body"]) < len(resources.get_resource("skill", "tdd")["body"])
+
+
+def test_sections_are_cut_after_placeholders_are_resolved(isolated_resources: ResourceService):
+    """Resolution changes the body's length, so offsets taken before it would cut mid-word."""
+    write_resource(
+        isolated_resources.built_in_dir,
+        "sample",
+        SKILL.replace("Documentation lives", "## First\n\nDocumentation lives")
+        + "\n## Second\n\nTail.\n",
+    )
+    result = isolated_resources.get_resource("skill", "sample", sections=["Second"])
+    assert result["body"] == "## Second\n\nTail.\n"
+
+
+def test_unknown_sections_are_reported_with_the_available_ones(resources: ResourceService):
+    result = resources.get_resource("skill", "tdd", sections=["Instructions", "Nope"])
+    assert result["sections"] == ["Instructions"]
+    assert result["missing_sections"] == ["Nope"]
+    assert "Relationships" in result["available_sections"]
+
+
+def test_get_context_lists_section_titles_and_sizes(resources: ResourceService):
+    entry = next(e for e in resources.get_context()["resources"] if e["name"] == "tdd")
+    titles = [section["title"] for section in entry["sections"]]
+    assert titles == ["Relationships", "Instructions"]
+    assert all(section["bytes"] > 0 for section in entry["sections"])
+
+
+# ------------------------------------------------------------------- sharing
+
+
+def test_a_second_project_reuses_the_built_in_parses(
+    resources: ResourceService, tmp_path_factory, monkeypatch
+):
+    resources.load()
+    parsed = []
+    real_parse = resource_service.parse_resource
+    monkeypatch.setattr(
+        resource_service, "parse_resource", lambda text: parsed.append(1) or real_parse(text)
+    )
+
+    other = ResourceService(ConfigService(str(tmp_path_factory.mktemp("other"))))
+    assert len(other.load()["resources"]) == len(resources.load()["resources"])
+    assert parsed == []
+
+
+def test_an_edited_built_in_is_parsed_again(isolated_resources: ResourceService):
+    path = write_resource(isolated_resources.built_in_dir, "sample", SKILL)
+    isolated_resources.load()
+    path.write_text(SKILL.replace("A sample skill.", "An edited skill, longer."), encoding="utf-8")
+
+    record = isolated_resources.load(force=True)["resources"]["skill:sample"]
+    assert record["description"] == "An edited skill, longer."
+
+
+def test_cache_hits_and_reparses_are_counted(isolated_resources: ResourceService):
+    resource_service.metrics.reset()
+    path = write_resource(isolated_resources.built_in_dir, "sample", SKILL)
+    isolated_resources.load()
+    isolated_resources.load()
+    path.write_text(SKILL + "\nMore.\n", encoding="utf-8")
+    isolated_resources.load(force=True)
+
+    counters = resource_service.metrics.snapshot()["counters"]
+    assert counters["catalogue.loads"] == 1
+    assert counters["catalogue.hits"] == 1
+    assert counters["catalogue.reparses"] == 1
+
+
+def test_footprint_counts_a_loaded_catalogue_only(resources: ResourceService):
+    assert resources.footprint() == 0
+    resources.load()
+    assert resources.footprint() > 0
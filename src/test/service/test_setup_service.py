@@ -0,0 +1,46 @@
+"""Project setup as a dependency graph of stages."""
+
+from pathlib import Path
+
+from common_rules_server.service.setup_service import SetupService
+
+
+def test_setup_reports_every_stage_and_its_timing(python_project: Path):
+    result = SetupService(str(python_project)).setup(active_ide="claude")
+
+    assert (python_project / ".common-rules-server" / "config.env").exists()
+    assert result["git_hooks"]["installed"] is True
+    assert result["editor_hooks"] is not None
+    assert set(result["timings"]["stages"]) == {
+        "config",
+        "ide_rules",
+        "detected",
+        "git_hooks",
+        "editor_hooks",
+        "companions",
+        "sync",
+    }
+
+
+def test_sync_starts_only_after_the_files_it_rewrites_are_written(python_project: Path):
+    stages = SetupService(str(python_project)).setup(active_ide="claude")["timings"]["stages"]
+
+    sync_start = stages["sync"]["started_ms"]
+    for before in ("config", "ide_rules", "editor_hooks"):
+        assert sync_start >= stages[before]["started_ms"] + stages[before]["duration_ms"]
+
+
+def test_detection_sees_the_guidance_file_setup_just_wrote(python_project: Path):
+    """Naming no editor still reaches one the project shows evidence of."""
+    (python_project / ".cursor").mkdir()
+    result = SetupService(str(python_project)).setup()
+
+    assert [w["ide"] for w in result["ide_rules"]["written"]] == ["cursor"]
+    assert [r["ide"] for r in result["editor_hooks"]["installed"]] == ["cursor"]
+
+
+def test_no_editor_means_no_hooks_and_a_next_step(python_project: Path):
+    result = SetupService(str(python_project)).setup()
+
+    assert result["editor_hooks"] is None
+    assert any("No editor detected" in step for step in result["next_steps"])
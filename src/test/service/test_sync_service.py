@@ -4,6 +4,10 @@ Sync is what lets the kit work with the server switched off, so these check the
 output against each vendor's documented layout rather than against our own.
 """
 
+import os
+import subprocess
+import threading
+import time
 from pathlib import Path
 
 import pytest
@@ -11,8 +15,10 @@ import pytest
 from common_rules_server.service.sync_service import (
     BLOCK_START,
     GENERATED_HEADER,
+    STALE_STAGING_SECONDS,
     SyncService,
 )
+from common_rules_server.util import graph_build
 
 
 @pytest.fixture
@@ -271,6 +277,236 @@ def test_resync_is_stable(sync, python_project: Path):
     assert first["synced"][0]["files_written"] == second["synced"][0]["files_written"]
 
 
+def _stamps(root: Path, directory: str) -> dict[str, int]:
+    return {str(path): path.stat().st_mtime_ns for path in (root / directory).rglob("*") if path.is_file()}
+
+
+def test_resyncing_an_unchanged_kit_touches_nothing(sync, python_project: Path):
+    sync.sync(["claude"])
+    before = _stamps(python_project, ".claude")
+    always = (python_project / "CLAUDE.md").stat().st_mtime_ns
+
+    result = sync.sync(["claude"])
+
+    assert result["synced"][0]["changed"] == []
+    assert result["hooks"]["installed"][0]["changed"] == []
+    assert _stamps(python_project, ".claude") == before
+    assert (python_project / "CLAUDE.md").stat().st_mtime_ns == always
+
+
+def test_a_changed_resource_rewrites_only_its_own_output(sync, resources, python_project: Path):
+    sync.sync(["cursor"], include_hooks=False)
+    resources.create_resource("skill", "verify", "Project verification.", "Run the house pipeline.")
+
+    result = sync.sync(["cursor"], include_hooks=False)
+
+    assert result["synced"][0]["changed"] == [".cursor/skills/verify/SKILL.md"]
+
+
+def test_an_edited_output_is_restored(sync, python_project: Path):
+    sync.sync(["cursor"], include_hooks=False)
+    skill = python_project / ".cursor/skills/tdd/SKILL.md"
+    original = skill.read_text(encoding="utf-8")
+    skill.write_text(original + "A local edit.\n", encoding="utf-8")
+
+    sync.sync(["cursor"], include_hooks=False)
+
+    assert skill.read_text(encoding="utf-8") == original
+
+
+def test_output_of_a_deleted_resource_is_removed(sync, resources, python_project: Path):
+    resources.create_resource("skill", "house-style", "Team conventions.", "Body.")
+    sync.sync(["cursor"], include_hooks=False)
+    (python_project / ".common-rules-server/resources/skills/house-style.md").unlink()
+
+    result = sync.sync(["cursor"], include_hooks=False)
+
+    assert result["synced"][0]["removed"] == [".cursor/skills/house-style/SKILL.md"]
+    assert not (python_project / ".cursor/skills/house-style").exists()
+    assert (python_project / ".cursor/skills/tdd/SKILL.md").exists()
+
+
+def test_syncing_one_editor_leaves_another_alone(sync, python_project: Path):
+    sync.sync(["cursor", "claude"], include_hooks=False)
+    before = _stamps(python_project, ".cursor")
+
+    sync.sync(["claude"], include_hooks=False)
+
+    assert _stamps(python_project, ".cursor") == before
+
+
+def test_a_plan_reports_the_first_sync_without_writing_it(sync, python_project: Path):
+    result = sync.sync(["cursor"], plan=True)
+
+    plan = result["plan"]
+    assert plan["counts"]["created"] == len(plan["created"]) > 0
+    assert ".cursor/hooks.json" in plan["created"]
+    assert not (python_project / ".cursor").exists()
+    assert not sync.manifest_path.exists()
+
+
+def _git(project: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@example.com", *args],
+        cwd=project,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+
+
+def test_sync_state_stays_out_of_git(sync, python_project: Path):
+    """The manifest holds this machine's file stamps; committed, it would churn."""
+    _git(python_project, "init", "-q")
+    sync.sync(["claude"])
+
+    untracked = _git(python_project, "status", "--porcelain", "--untracked-files=all")
+    assert not [line for line in untracked.splitlines() if "/cache/" in line or "manifest" in line]
+
+    _git(python_project, "add", "-A")
+    _git(python_project, "commit", "-qm", "sync")
+    (python_project / ".claude/skills/tdd/SKILL.md").write_text("edited", encoding="utf-8")
+    sync.sync(["claude"])
+
+    assert _git(python_project, "status", "--porcelain") == ""
+
+
+
+def test_a_plan_after_a_sync_is_up_to_date(sync, python_project: Path):
+    sync.sync(["cursor"])
+    plan = sync.sync(["cursor"], plan=True)["plan"]
+
+    assert plan["up_to_date"] is True
+    assert plan["counts"]["unchanged"] > 0
+
+
+def test_a_plan_shows_modified_and_deleted_outputs_with_diffs(sync, resources, python_project: Path):
+    resources.create_resource("skill", "house-style", "Team conventions.", "Body.")
+    sync.sync(["cursor"], include_hooks=False, offline=True)
+    resources.create_resource("skill", "verify", "Project verification.", "Run the house pipeline.")
+    (python_project / ".common-rules-server/resources/skills/house-style.md").unlink()
+    before = _stamps(python_project, ".cursor")
+
+    plan = sync.sync(["cursor"], include_hooks=False, offline=True, plan=True, diffs=True)["plan"]
+
+    assert plan["modified"] == [".cursor/skills/verify/SKILL.md"]
+    assert plan["deleted"] == [".cursor/skills/house-style/SKILL.md"]
+    assert "+Run the house pipeline." in plan["diffs"][".cursor/skills/verify/SKILL.md"]
+    assert _stamps(python_project, ".cursor") == before
+
+
+def test_each_body_is_rendered_once_for_every_editor(sync, monkeypatch):
+    rendered: list[str] = []
+    real_render = SyncService._render_body
+
+    def counting_render(self, record):
+        rendered.append(f"{record['kind']}:{record['name']}")
+        return real_render(self, record)
+
+    monkeypatch.setattr(SyncService, "_render_body", counting_render)
+    sync.sync(["cursor", "claude", "antigravity"], include_hooks=False, offline=True)
+
+    assert rendered
+    assert len(rendered) == len(set(rendered))
+
+
+def test_editors_render_concurrently(sync, monkeypatch):
+    threads: set[str] = set()
+    real_render = SyncService._render_target
+
+    def recording_render(self, output, *args):
+        threads.add(threading.current_thread().name)
+        return real_render(self, output, *args)
+
+    monkeypatch.setattr(SyncService, "_render_target", recording_render)
+    sync.sync(["cursor", "claude", "antigravity"], include_hooks=False, offline=True)
+
+    assert len(threads) == 3
+
+
+def test_a_failure_while_rendering_publishes_nothing(sync, python_project: Path, monkeypatch):
+    def failing(self, output, record):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(SyncService, "_write_agent_command", failing)
+
+    with pytest.raises(OSError):
+        sync.sync(["cursor", "claude"], include_hooks=False, offline=True)
+
+    assert not (python_project / ".cursor").exists()
+    assert not (python_project / "CLAUDE.md").exists()
+    assert not any(sync.staging_root.iterdir())
+
+
+def test_staging_left_by_a_killed_sync_is_removed(sync, python_project: Path):
+    stale = sync.staging_root / "cursor-killed"
+    (stale / ".cursor/rules").mkdir(parents=True)
+    old = time.time() - 2 * STALE_STAGING_SECONDS
+    os.utime(stale, (old, old))
+
+    sync.sync(["cursor"], include_hooks=False)
+
+    assert not stale.exists()
+    assert not any(sync.staging_root.iterdir())
+
+
+def test_sync_reports_the_graph_build_without_waiting_for_it(sync, monkeypatch):
+    monkeypatch.setattr(graph_build, "locate", lambda: None)
+
+    result = sync.sync(["cursor"], include_hooks=False)
+    plan = sync.sync(["cursor"], include_hooks=False, plan=True)
+
+    assert result["code_review_graph"]["status"] == "unavailable"
+    assert "code_review_graph" not in plan
+
+
+def test_watch_re_renders_only_what_an_edit_affects(sync, resources, python_project: Path, monkeypatch):
+    created = resources.create_resource("skill", "verify", "Project verification.", "Run the house pipeline.")
+    rounds = sync.watch(["claude"], include_hooks=False, offline=True, interval=0.01, debounce=0.01)
+    next(rounds)
+    rendered: list[str] = []
+    real_render = SyncService._render_body
+
+    def counting_render(self, record):
+        rendered.append(f"{record['kind']}:{record['name']}")
+        return real_render(self, record)
+
+    monkeypatch.setattr(SyncService, "_render_body", counting_render)
+    source = Path(created["absolute_path"])
+    source.write_text(source.read_text(encoding="utf-8").replace("house", "nightly"), encoding="utf-8")
+
+    edited = next(rounds)
+
+    assert edited["affected"] == ["skill:verify"]
+    assert rendered == ["skill:verify"]
+    assert edited["synced"][0]["changed"] == [".claude/skills/verify/SKILL.md"]
+    skill = (python_project / ".claude/skills/verify/SKILL.md").read_text(encoding="utf-8")
+    assert "Run the nightly pipeline." in skill
+    assert (python_project / ".claude/skills/tdd/SKILL.md").exists()
+
+
+def test_watch_removes_the_output_of_a_deleted_resource(sync, resources, python_project: Path):
+    created = resources.create_resource("skill", "house-style", "House style.", "Write it our way.")
+    rounds = sync.watch(["claude"], include_hooks=False, offline=True, interval=0.01, debounce=0.01)
+    next(rounds)
+
+    Path(created["absolute_path"]).unlink()
+    edited = next(rounds)
+
+    assert edited["affected"] == ["skill:house-style"]
+    assert edited["synced"][0]["removed"] == [".claude/skills/house-style/SKILL.md"]
+    assert not (python_project / ".claude/skills/house-style").exists()
+
+
+def test_a_changed_resource_is_rendered_again(sync, resources, python_project: Path):
+    sync.sync(["claude"], include_hooks=False, offline=True)
+    resources.create_resource("skill", "verify", "Project verification.", "Run the house pipeline.")
+    sync.sync(["claude"], include_hooks=False, offline=True)
+
+    skill = (python_project / ".claude/skills/verify/SKILL.md").read_text(encoding="utf-8")
+    assert "Run the house pipeline." in skill
+
+
 def test_generated_files_are_marked_as_generated(sync, python_project: Path):
     """A reader who opens one needs to know edits will be overwritten."""
     sync.sync(["cursor"], include_hooks=False)
@@ -290,6 +526,59 @@ def test_clean_removes_generated_files_only(sync, python_project: Path):
     assert result["removed"]
 
 
+def test_clean_goes_by_the_manifest_without_scanning(sync, python_project: Path, monkeypatch):
+    sync.sync(["cursor"], include_hooks=False)
+    monkeypatch.setattr(SyncService, "_generated_files", lambda self, target: pytest.fail("scanned"))
+
+    result = sync.clean(["cursor"])
+
+    assert ".cursor/skills/tdd/SKILL.md" in result["removed"]
+    assert not (python_project / ".cursor/skills").exists()
+
+
+def test_clean_without_a_manifest_finds_output_by_its_header(sync, python_project: Path):
+    sync.sync(["cursor"], include_hooks=False)
+    sync.manifest_path.unlink()
+
+    sync.clean(["cursor"])
+
+    assert not (python_project / ".cursor/skills/tdd/SKILL.md").exists()
+
+
+def test_clean_leaves_the_users_own_directories_alone(sync, python_project: Path):
+    sync.sync(["cursor"], include_hooks=False)
+    empty = python_project / ".cursor/skills/drafts/later"
+    empty.mkdir(parents=True)
+    notes = python_project / ".cursor/rules/notes.md"
+    notes.write_text("# Notes\n\n" + "A long note.\n" * 5000 + GENERATED_HEADER, encoding="utf-8")
+
+    sync.clean(["cursor"])
+
+    assert empty.is_dir()
+    assert notes.exists()
+
+
+def test_a_snapshot_export_writes_one_file_instead_of_editor_files(sync, python_project: Path):
+    result = sync.export_snapshot()
+
+    snapshot = python_project / ".common-rules-server/catalogue-snapshot.json"
+    assert result["written"] and result["path"] == str(snapshot)
+    assert result["resources"] > 0
+    assert "COMMON_RULES_SNAPSHOT" in result["note"]
+    assert not (python_project / ".cursor").exists()
+
+
+def test_a_snapshot_is_not_written_over_unparseable_resources(sync, resources, python_project: Path):
+    broken = python_project / ".common-rules-server/resources/skills/broken.md"
+    broken.parent.mkdir(parents=True)
+    broken.write_text("no frontmatter here\n", encoding="utf-8")
+
+    result = sync.export_snapshot()
+
+    assert not result["written"]
+    assert result["problems"]
+
+
 # ------------------------------------------------------------------ hooks
 
 
@@ -640,6 +929,60 @@ def test_online_sync_exports_proxy_skills_and_agents(sync, python_project: Path)
     assert "Call get_resource(uri=\"resources/skills/tdd\") from common-rules-server MCP" in content
     assert (python_project / "CLAUDE.md").exists()
 
+# ------------------------------------------------------------------ hybrid
+
+
+def test_a_hybrid_sync_inlines_small_resources_and_stubs_large_ones(sync, python_project: Path):
+    sync.sync(["claude"], include_hooks=False, inline_tokens=1000)
+
+    small = (python_project / ".claude/skills/tdd/SKILL.md").read_text()
+    large = (python_project / ".claude/agents/orchestrator.md").read_text()
+    assert "get_resource" not in small
+    assert 'get_resource(uri="resources/agents/orchestrator")' in large
+
+
+def test_always_rules_are_inlined_only_while_they_fit_the_budget(sync, python_project: Path):
+    result = sync.sync(["claude"], include_hooks=False, always_budget=0)
+    text = (python_project / "CLAUDE.md").read_text()
+
+    assert result["hybrid"]["always_inlined"] == []
+    assert "## general" not in text
+    assert "`resources/rules/general`" in text
+
+    result = sync.sync(["claude"], include_hooks=False, always_budget=100_000)
+    text = (python_project / "CLAUDE.md").read_text()
+
+    assert result["hybrid"]["always_stubbed"] == []
+    assert "## general" in text
+
+
+def test_a_budget_lowers_the_always_on_cost_each_editor_reports(sync):
+    offline = sync.sync(["claude", "cursor"], include_hooks=False, offline=True)
+    hybrid = sync.sync(["claude", "cursor"], include_hooks=False, always_budget=500)
+
+    for before, after in zip(offline["synced"], hybrid["synced"]):
+        assert after["always_on"]["always"] < before["always_on"]["always"]
+        assert after["always_on"]["descriptions"] == before["always_on"]["descriptions"]
+        assert after["always_on"]["tokens"] == sum(
+            after["always_on"][part] for part in ("always", "descriptions")
+        )
+
+
+def test_changing_the_threshold_renders_again(sync, python_project: Path):
+    sync.sync(["claude"], include_hooks=False, inline_tokens=1000)
+    result = sync.sync(["claude"], include_hooks=False, inline_tokens=100_000)
+
+    assert ".claude/agents/orchestrator.md" in result["synced"][0]["changed"]
+    assert "get_resource" not in (python_project / ".claude/agents/orchestrator.md").read_text()
+
+
+def test_a_negative_threshold_is_refused(sync, python_project: Path):
+    result = sync.sync(["claude"], include_hooks=False, inline_tokens=-1)
+
+    assert "inline_tokens" in result["error"]
+    assert not (python_project / ".claude").exists()
+
+
 def test_sync_purges_before_writing(sync, python_project: Path):
     from common_rules_server.service.sync_service import GENERATED_HEADER
     
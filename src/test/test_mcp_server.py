@@ -4,13 +4,21 @@ The decorator registers each function with the server and returns it unchanged,
 so these call the same callable a connected agent reaches, and a separate test
 asserts the registration itself."""
 
+import asyncio
 import json
+import os
+import pstats
+import subprocess
+import sys
+import threading
+import time
 from pathlib import Path
 from unittest.mock import AsyncMock
 
 import pytest
 
 from common_rules_server import mcp_server
+from common_rules_server.service.sync_service import SyncService
 
 
 @pytest.fixture(autouse=True)
@@ -123,6 +131,20 @@ async def test_get_resource_unknown_kind_is_handled(fake_ctx):
     assert "error" in await call(mcp_server.get_resource, kind="gadget", name="x", ctx=fake_ctx)
 
 
+# ----------------------------------------------------------------- plan_context
+
+
+@pytest.mark.anyio
+async def test_plan_context_returns_an_ordered_plan_within_budget(fake_ctx):
+    result = await call(
+        mcp_server.plan_context, task="fix a failing test", budget_tokens=2000, ctx=fake_ctx
+    )
+    assert result["plan"]
+    assert result["used_tokens"] <= 2000
+    assert [step["step"] for step in result["plan"]] == list(range(1, len(result["plan"]) + 1))
+    json.dumps(result)
+
+
 # --------------------------------------------------------------- create_resource
 
 
@@ -385,6 +407,105 @@ async def test_project_root_walks_up_from_the_working_directory(
     assert resolution["source"] == "cwd-walk-up"
 
 
+@pytest.mark.anyio
+async def test_client_roots_are_asked_for_once_per_session(_no_root_env, sandbox: Path):
+    project = sandbox / "proj"
+    project.mkdir()
+    (project / ".git").mkdir()
+    ctx = ctx_with_roots(str(project))
+
+    for _ in range(3):
+        resolution = await mcp_server._resolve_root(ctx)
+        assert resolution["source"] == "mcp-roots"
+    assert ctx.session.list_roots.await_count == 1
+
+    other = ctx_with_roots(str(project))
+    await mcp_server._resolve_root(other)
+    assert other.session.list_roots.await_count == 1
+
+
+@pytest.mark.anyio
+async def test_a_roots_change_notification_makes_the_next_call_ask_again(
+    _no_root_env, sandbox: Path
+):
+    first, second = sandbox / "first", sandbox / "second"
+    for project in (first, second):
+        project.mkdir()
+        (project / ".git").mkdir()
+    ctx = ctx_with_roots(str(first))
+    assert (await mcp_server._resolve_root(ctx))["root"] == str(first.resolve())
+
+    ctx.session.list_roots.return_value = AsyncMock(
+        roots=[AsyncMock(uri=f"file://{second}")]
+    )
+    handler = mcp_server.mcp._mcp_server.notification_handlers[
+        mcp_server.types.RootsListChangedNotification
+    ]
+    await handler(
+        mcp_server.types.RootsListChangedNotification(method="notifications/roots/list_changed")
+    )
+
+    assert (await mcp_server._resolve_root(ctx))["root"] == str(second.resolve())
+    assert ctx.session.list_roots.await_count == 2
+
+
+def _initialized_handler():
+    return mcp_server.mcp._mcp_server.notification_handlers[
+        mcp_server.types.InitializedNotification
+    ]
+
+
+@pytest.mark.anyio
+async def test_warm_up_starts_when_the_handshake_completes(_root: Path, monkeypatch):
+    started = []
+    monkeypatch.setattr(mcp_server._catalogues, "start_warm_up", started.append)
+    monkeypatch.setenv("COMMON_RULES_WARMUP", "true")
+
+    await _initialized_handler()(
+        mcp_server.types.InitializedNotification(method="notifications/initialized")
+    )
+    assert started == [str(_root.resolve())]
+
+
+@pytest.mark.anyio
+async def test_warm_up_is_off_unless_asked_for(monkeypatch):
+    started = []
+    monkeypatch.setattr(mcp_server._catalogues, "start_warm_up", started.append)
+    monkeypatch.delenv("COMMON_RULES_WARMUP", raising=False)
+
+    await _initialized_handler()(
+        mcp_server.types.InitializedNotification(method="notifications/initialized")
+    )
+    assert started == []
+
+
+def test_marker_probes_are_reused_until_the_directory_changes(sandbox: Path, monkeypatch):
+    project = sandbox / "settled"
+    project.mkdir()
+    long_ago = time.time_ns() - 60_000_000_000
+    os.utime(project, ns=(long_ago, long_ago))
+    assert mcp_server._looks_like_a_project(str(project)) is False
+
+    probes = []
+    real_exists = os.path.exists
+    monkeypatch.setattr(
+        mcp_server.os.path, "exists", lambda p: probes.append(p) or real_exists(p)
+    )
+    assert mcp_server._looks_like_a_project(str(project)) is False
+    assert probes == []
+
+    (project / "pyproject.toml").write_text("", encoding="utf-8")
+    assert mcp_server._looks_like_a_project(str(project)) is True
+
+
+def test_a_just_modified_directory_is_always_probed(sandbox: Path):
+    """Its mtime may not move again when the next marker lands in it."""
+    project = sandbox / "fresh"
+    project.mkdir()
+    assert mcp_server._looks_like_a_project(str(project)) is False
+    assert str(project) not in mcp_server._project_probes
+
+
 def test_active_ide_comes_from_the_mcp_handshake(monkeypatch):
     """clientInfo survives a server launched without the editor's environment."""
     monkeypatch.delenv("CLAUDE_CODE_ENTRYPOINT", raising=False)
@@ -399,6 +520,440 @@ def test_active_ide_from_handshake_is_none_when_unrecognised():
     assert mcp_server._active_ide_from_client(ctx) is None
 
 
+@pytest.mark.anyio
+async def test_a_slow_sync_does_not_hold_the_event_loop(monkeypatch, fake_ctx):
+    """Another request must be able to make progress while one is writing."""
+
+    def slow_sync(self, ides=None, include_hooks=True, offline=False):
+        time.sleep(0.3)
+        return {"synced": ides}
+
+    monkeypatch.setattr(SyncService, "sync", slow_sync)
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    try:
+        result = await call(mcp_server.sync_to_ide, ctx=fake_ctx, ides=["claude"])
+    finally:
+        task.cancel()
+    assert result == {"synced": ["claude"]}
+    assert ticks >= 10
+
+
+@pytest.mark.anyio
+async def test_concurrent_syncs_of_one_project_are_serialised(monkeypatch, fake_ctx):
+    active, peak = 0, 0
+    guard = threading.Lock()
+
+    def tracked_sync(self, ides=None, include_hooks=True, offline=False):
+        nonlocal active, peak
+        with guard:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with guard:
+            active -= 1
+        return {"synced": ides}
+
+    monkeypatch.setattr(SyncService, "sync", tracked_sync)
+    await asyncio.gather(
+        *(call(mcp_server.sync_to_ide, ctx=fake_ctx, ides=["claude"]) for _ in range(3))
+    )
+    assert peak == 1
+
+
+@pytest.mark.anyio
+async def test_one_session_cannot_hold_every_worker(monkeypatch, fake_ctx):
+    monkeypatch.setenv(mcp_server.SESSION_CONCURRENCY_ENV, "2")
+    active, peak = 0, 0
+    guard = threading.Lock()
+
+    def tracked_context(self):
+        nonlocal active, peak
+        with guard:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with guard:
+            active -= 1
+        return {"resources": []}
+
+    monkeypatch.setattr(mcp_server.ResourceService, "get_context", tracked_context)
+    results = await asyncio.gather(*(call(mcp_server.get_context, ctx=fake_ctx) for _ in range(6)))
+    assert len(results) == 6
+    assert peak == 2
+
+
+@pytest.mark.anyio
+async def test_sessions_are_capped_separately(monkeypatch, fake_ctx):
+    monkeypatch.setenv(mcp_server.SESSION_CONCURRENCY_ENV, "1")
+    other_ctx = ctx_with_roots()
+    active, peak = 0, 0
+    guard = threading.Lock()
+
+    def tracked_context(self):
+        nonlocal active, peak
+        with guard:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.1)
+        with guard:
+            active -= 1
+        return {"resources": []}
+
+    monkeypatch.setattr(mcp_server.ResourceService, "get_context", tracked_context)
+    await asyncio.gather(
+        call(mcp_server.get_context, ctx=fake_ctx), call(mcp_server.get_context, ctx=other_ctx)
+    )
+    assert peak == 2
+
+
+@pytest.fixture
+def served(monkeypatch) -> dict:
+    """``serve`` with its settings restored afterwards and nothing listening."""
+    ran: dict = {}
+    monkeypatch.setattr(mcp_server, "_run_http", lambda app: ran.update(app=app))
+    for name in ("host", "port", "transport_security"):
+        monkeypatch.setattr(mcp_server.mcp.settings, name, getattr(mcp_server.mcp.settings, name))
+    monkeypatch.setattr(mcp_server, "_serving_many_clients", False)
+    monkeypatch.delenv(mcp_server.SERVE_TOKEN_ENV, raising=False)
+    return ran
+
+
+def test_serve_runs_over_http_on_the_requested_address(served, monkeypatch):
+    from common_rules_server.util.bearer_token import BearerToken
+
+    monkeypatch.setenv(mcp_server.SERVE_TOKEN_ENV, "s3cret")
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["common-rules", "serve", "--host", "0.0.0.0", "--port", "9100", "--allow-host", "rules.internal"],
+    )
+
+    mcp_server.main()
+
+    security = mcp_server.mcp.settings.transport_security
+    assert isinstance(served["app"], BearerToken)
+    assert mcp_server.mcp.settings.host == "0.0.0.0"
+    assert mcp_server.mcp.settings.port == 9100
+    assert security.enable_dns_rebinding_protection is True
+    assert "rules.internal:*" in security.allowed_hosts
+    assert "0.0.0.0:*" not in security.allowed_hosts
+    assert "http://rules.internal:*" in security.allowed_origins
+    assert mcp_server._serving_many_clients is True
+
+
+def test_serve_refuses_to_listen_beyond_loopback_without_a_token(served, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["common-rules", "serve", "--host", "10.0.0.5"])
+
+    with pytest.raises(SystemExit) as refused:
+        mcp_server.main()
+
+    assert refused.value.code == 1
+    assert mcp_server.SERVE_TOKEN_ENV in json.loads(capsys.readouterr().out)["error"]
+    assert served == {}
+
+
+def test_a_wildcard_bind_needs_the_names_clients_use(served, monkeypatch, capsys):
+    monkeypatch.setenv(mcp_server.SERVE_TOKEN_ENV, "s3cret")
+    monkeypatch.setattr(sys, "argv", ["common-rules", "serve", "--host", "0.0.0.0"])
+
+    with pytest.raises(SystemExit):
+        mcp_server.main()
+
+    assert "--allow-host" in json.loads(capsys.readouterr().out)["error"]
+    assert served == {}
+
+
+@pytest.mark.parametrize("port", ["x", "0", "70000"])
+def test_serve_refuses_a_port_that_is_not_one(served, monkeypatch, capsys, port):
+    monkeypatch.setattr(sys, "argv", ["common-rules", "serve", "--port", port])
+
+    with pytest.raises(SystemExit) as refused:
+        mcp_server.main()
+
+    assert refused.value.code == 1
+    assert "--port" in json.loads(capsys.readouterr().out)["error"]
+    assert served == {}
+
+
+def test_serve_on_loopback_keeps_rebinding_protection(served, monkeypatch):
+    monkeypatch.setattr(sys, "argv", ["common-rules", "serve", "--sse"])
+
+    mcp_server.main()
+
+    security = mcp_server.mcp.settings.transport_security
+    assert security.enable_dns_rebinding_protection is True
+    assert "127.0.0.1:*" in security.allowed_hosts
+    assert "[::1]:*" in security.allowed_hosts
+
+
+@pytest.mark.anyio
+async def test_a_shared_server_does_not_guess_the_project_from_its_own_directory(
+    _no_root_env, sandbox: Path, monkeypatch
+):
+    project = sandbox / "proj"
+    project.mkdir()
+    (project / "pyproject.toml").write_text("", encoding="utf-8")
+    monkeypatch.chdir(project)
+    monkeypatch.setattr(mcp_server, "_serving_many_clients", True)
+    resolution = await mcp_server._resolve_root(ctx_with_roots())
+    assert resolution["trusted"] is False
+
+
+@pytest.mark.anyio
+async def test_server_stats_report_every_call_and_the_catalogue_cache(fake_ctx):
+    mcp_server.metrics.reset()
+    await call(mcp_server.get_context, ctx=fake_ctx)
+    await call(mcp_server.get_context, ctx=fake_ctx)
+
+    stats = await call(mcp_server.get_server_stats, ctx=fake_ctx)
+
+    tool = stats["tools"]["get_context"]
+    assert tool["calls"] == 2
+    assert tool["latency_ms"]["p50"] is not None
+    assert tool["response_bytes"]["total"] > 0
+    assert stats["counters"]["catalogue.hits"] >= 1
+    assert stats["hit_ratios"]["catalogue"] > 0
+    assert stats["catalogues"]["projects"] >= 1
+    json.dumps(stats)
+
+
+@pytest.mark.anyio
+async def test_a_failing_tool_is_counted_and_still_raises(monkeypatch, fake_ctx):
+    mcp_server.metrics.reset()
+
+    def broken(self):
+        raise OSError("disk went away")
+
+    monkeypatch.setattr(mcp_server.ResourceService, "get_context", broken)
+    with pytest.raises(OSError):
+        await call(mcp_server.get_context, ctx=fake_ctx)
+    assert mcp_server.metrics.snapshot()["tools"]["get_context"]["failures"] == 1
+
+
+@pytest.mark.anyio
+async def test_metrics_are_logged_into_the_project_when_asked(_root: Path, monkeypatch, fake_ctx):
+    (_root / ".common-rules-server").mkdir(exist_ok=True)
+    monkeypatch.setenv("COMMON_RULES_METRICS_INTERVAL", "3600")
+    mcp_server.metrics.reset()
+
+    await call(mcp_server.get_context, ctx=fake_ctx)
+
+    log = _root / ".common-rules-server" / "cache" / "metrics.jsonl"
+    entry = json.loads(log.read_text(encoding="utf-8").splitlines()[-1])
+    assert entry["tools"]["get_context"]["calls"] == 1
+    assert "catalogues" in entry
+
+
+@pytest.mark.anyio
+async def test_a_profiled_tool_call_profiles_the_work_on_the_worker(
+    tmp_path: Path, monkeypatch, fake_ctx
+):
+    profiles = tmp_path / "profiles"
+    monkeypatch.setenv("COMMON_RULES_PROFILE", str(profiles))
+
+    await call(mcp_server.get_context, ctx=fake_ctx)
+
+    written = list(profiles.glob("*-get_context.pstats"))
+    assert len(written) == 1
+    functions = {name for _, _, name in pstats.Stats(str(written[0])).stats}
+    assert "get_context" in functions
+
+
+def _span_names(node: dict) -> set[str]:
+    names = {node["name"]}
+    for child in node.get("children", []):
+        names |= _span_names(child)
+    return names
+
+
+@pytest.mark.anyio
+async def test_a_traced_setup_says_where_its_time_went(_root: Path, fake_ctx):
+    result = await call(mcp_server.setup_config, ctx=fake_ctx, ide="claude", trace=True)
+
+    spans = result["timings"]["spans"]
+    assert spans["name"] == "setup_config"
+    assert {"config", "editor_hooks", "sync", "prune", "target", "always_file"} <= _span_names(spans)
+    assert "stages" in result["timings"]
+
+    events = json.loads(Path(result["timings"]["trace_file"]).read_text(encoding="utf-8"))
+    assert {event["name"] for event in events["traceEvents"]} == _span_names(spans)
+
+
+@pytest.mark.anyio
+async def test_a_traced_sync_returns_its_phases(fake_ctx):
+    result = await call(mcp_server.sync_to_ide, ctx=fake_ctx, ides=["cursor"], trace=True)
+
+    spans = result["timings"]["spans"]
+    assert {"prune", "load_catalogue", "target", "hooks"} <= _span_names(spans)
+    assert spans["duration_ms"] >= max(child["duration_ms"] for child in spans["children"])
+
+
+@pytest.mark.anyio
+async def test_an_untraced_sync_carries_no_timings(fake_ctx):
+    result = await call(mcp_server.sync_to_ide, ctx=fake_ctx, ides=["cursor"])
+    assert "timings" not in result
+
+
+@pytest.mark.anyio
+async def test_a_planned_sync_writes_nothing_and_says_what_it_would(_root: Path, fake_ctx):
+    result = await call(mcp_server.sync_to_ide, ctx=fake_ctx, ides=["cursor"], plan=True)
+
+    assert result["plan"]["up_to_date"] is False
+    assert ".cursor/skills/tdd/SKILL.md" in result["plan"]["created"]
+    assert not (_root / ".cursor").exists()
+
+
+def test_sync_check_fails_until_the_output_is_current(_root: Path, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["common-rules", "sync", "cursor", "--check"])
+    with pytest.raises(SystemExit) as stale:
+        mcp_server.main()
+    assert stale.value.code == 1
+
+    monkeypatch.setattr(sys, "argv", ["common-rules", "sync", "cursor"])
+    mcp_server.main()
+    capsys.readouterr()
+
+    monkeypatch.setattr(sys, "argv", ["common-rules", "sync", "cursor", "--check"])
+    mcp_server.main()
+    assert json.loads(capsys.readouterr().out)["plan"]["up_to_date"] is True
+
+
+def test_sync_watch_prints_a_line_per_edit_until_interrupted(_root: Path, monkeypatch, capsys):
+    from common_rules_server.service.sync_service import SyncService
+
+    def rounds(self, ides, include_hooks, offline):
+        yield {"synced": [{"changed": [".cursor/skills/tdd/SKILL.md"], "removed": []}]}
+        yield {
+            "synced": [{"changed": [".cursor/skills/tdd/SKILL.md"], "removed": []}],
+            "affected": ["skill:tdd"],
+            "duration_ms": 12.5,
+        }
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(SyncService, "watch", rounds)
+    monkeypatch.setattr(sys, "argv", ["common-rules", "sync", "cursor", "--watch"])
+
+    mcp_server.main()
+
+    edit = capsys.readouterr().out.strip().splitlines()[-1]
+    assert json.loads(edit) == {
+        "affected": ["skill:tdd"],
+        "changed": [".cursor/skills/tdd/SKILL.md"],
+        "removed": [],
+        "duration_ms": 12.5,
+    }
+
+
+def test_sync_takes_hybrid_limits_without_reading_them_as_editors(_root: Path, monkeypatch, capsys):
+    monkeypatch.setattr(
+        sys, "argv", ["common-rules", "sync", "claude", "--inline-tokens", "0", "--always-budget", "0"]
+    )
+
+    mcp_server.main()
+
+    result = json.loads(capsys.readouterr().out)
+    assert [target["ide"] for target in result["synced"]] == ["claude"]
+    assert result["hybrid"]["inline_tokens"] == 0
+    assert "get_resource" in (_root / ".claude/skills/tdd/SKILL.md").read_text()
+
+
+def test_sync_watch_refuses_flags_it_would_ignore(_root: Path, monkeypatch, capsys):
+    from common_rules_server.service.sync_service import SyncService
+
+    monkeypatch.setattr(SyncService, "watch", lambda *args, **kwargs: pytest.fail("watch started"))
+    monkeypatch.setattr(sys, "argv", ["common-rules", "sync", "cursor", "--watch", "--check"])
+
+    with pytest.raises(SystemExit) as refused:
+        mcp_server.main()
+
+    assert refused.value.code == 1
+    assert "--check" in json.loads(capsys.readouterr().out)["error"]
+    assert not (_root / ".cursor").exists()
+
+
+def test_sync_fleet_exits_non_zero_when_a_project_fails(tmp_path: Path, monkeypatch, capsys):
+    project = tmp_path / "svc"
+    project.mkdir()
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        ["common-rules", "sync-fleet", str(project), str(tmp_path / "gone"), "--ides", "cursor", "--no-hooks"],
+    )
+
+    with pytest.raises(SystemExit) as failed:
+        mcp_server.main()
+
+    summary = json.loads(capsys.readouterr().out)
+    assert failed.value.code == 1
+    assert [p["ok"] for p in summary["projects"]] == [True, False]
+    assert (project / ".cursor/skills/tdd/SKILL.md").exists()
+
+
+def test_sync_snapshot_writes_the_catalogue_to_the_given_path(_root: Path, monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["common-rules", "sync", "--snapshot", "kit.json"])
+
+    mcp_server.main()
+
+    assert json.loads(capsys.readouterr().out)["written"] is True
+    assert (_root / "kit.json").is_file()
+
+
+def test_synth_kit_writes_a_tree_and_reports_it(tmp_path: Path, monkeypatch, capsys):
+    target = tmp_path / "kit"
+    monkeypatch.setattr(
+        sys, "argv", ["common-rules", "synth-kit", str(target), "--size", "12", "--seed", "5"]
+    )
+
+    mcp_server.main()
+
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["resources"] == 12
+    assert len(list(target.rglob("*.md"))) == 12
+
+
+def test_synth_kit_without_a_directory_explains_itself(monkeypatch, capsys):
+    monkeypatch.setattr(sys, "argv", ["common-rules", "synth-kit", "--size", "12"])
+    with pytest.raises(SystemExit) as refused:
+        mcp_server.main()
+    assert refused.value.code == 1
+    assert "synth-kit DIRECTORY" in json.loads(capsys.readouterr().out)["hint"]
+
+
+@pytest.mark.parametrize(
+    "option, value, complaint",
+    [
+        ("--size", "abc", "whole number"),
+        ("--size", "-3", "at least 0"),
+        ("--gated", "1.5", "between 0 and 1"),
+        ("--edge-density", "lots", "a number"),
+        ("--kinds", "skill=half", "share"),
+        ("--kinds", "gadget=0.5", "kinds are"),
+    ],
+)
+def test_synth_kit_reports_a_bad_option_instead_of_crashing(
+    tmp_path: Path, monkeypatch, capsys, option, value, complaint
+):
+    target = tmp_path / "kit"
+    monkeypatch.setattr(sys, "argv", ["common-rules", "synth-kit", str(target), option, value])
+
+    with pytest.raises(SystemExit) as refused:
+        mcp_server.main()
+
+    result = json.loads(capsys.readouterr().out)
+    assert refused.value.code == 1
+    assert option in result["error"] and complaint in result["error"]
+    assert result["hint"]
+    assert not target.exists()
+
+
 @pytest.mark.anyio
 async def test_every_tool_is_registered_with_the_server():
     """Calling the function proves the body works; this proves clients can reach it."""
@@ -406,13 +961,79 @@ async def test_every_tool_is_registered_with_the_server():
     assert registered == {
         "get_context",
         "get_resource",
+        "plan_context",
         "create_resource",
         "setup_config",
         "get_bdd_scenario",
         "sync_to_ide",
+        "get_server_stats",
     }
 
 
+
+# ---------------------------------------------------------------------- startup
+
+#: Modules the handshake and the read-only tools never need.
+DEFERRED_MODULES = (
+    "cProfile",
+    "pstats",
+    "common_rules_server.service.bdd_service",
+    "common_rules_server.service.git_hook_service",
+    "common_rules_server.service.hook_service",
+    "common_rules_server.service.mcp_installer_service",
+    "common_rules_server.service.planner_service",
+    "common_rules_server.service.setup_service",
+    "common_rules_server.service.sync_service",
+    "common_rules_server.util.pipeline",
+    "common_rules_server.util.relevance",
+)
+
+#: What importing the server may add on top of the MCP SDK, in milliseconds.
+#: Around 60 on a development machine; the margin absorbs slow CI machines, not
+#: new imports.
+IMPORT_BUDGET_MS = 200
+
+
+def _fresh_interpreter(code: str, *flags: str) -> subprocess.CompletedProcess:
+    """Runs code in a new interpreter, where nothing is imported yet."""
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "PYTHONPATH": str(Path(mcp_server.__file__).parents[1])},
+    )
+
+
+def test_importing_the_server_leaves_write_side_services_unloaded():
+    result = _fresh_interpreter(
+        "import sys, common_rules_server.mcp_server\n"
+        f"print([m for m in {DEFERRED_MODULES!r} if m in sys.modules])"
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_importing_the_server_stays_within_its_start_up_budget():
+    """Measured on top of an already imported SDK, so only this package counts.
+
+    importtime reports a module once, when first imported, so the server's
+    cumulative figure is exactly what it adds. Best of three, to discount a
+    machine that was busy for one of them.
+    """
+    timings = []
+    for _ in range(3):
+        result = _fresh_interpreter(
+            "import mcp.server.fastmcp; import common_rules_server.mcp_server", "-X", "importtime"
+        )
+        line = next(
+            line
+            for line in result.stderr.splitlines()
+            if line.rstrip().endswith("| common_rules_server.mcp_server")
+        )
+        timings.append(int(line.split("|")[1]) / 1000)
+    assert min(timings) < IMPORT_BUDGET_MS, f"server import took {min(timings):.0f} ms"
+
+
 @pytest.fixture
 def anyio_backend():
     return "asyncio"
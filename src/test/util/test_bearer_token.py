@@ -0,0 +1,36 @@
+"""The shared secret in front of the HTTP server."""
+
+import anyio
+
+from common_rules_server.util.bearer_token import BearerToken
+
+
+async def _app(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"ok"})
+
+
+def _status(headers: list) -> int:
+    sent: list = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    scope = {"type": "http", "headers": headers}
+    anyio.run(BearerToken(_app, "s3cret"), scope, receive, send)
+    return sent[0]["status"]
+
+
+def test_a_request_with_the_token_reaches_the_server():
+    assert _status([(b"authorization", b"Bearer s3cret")]) == 200
+
+
+def test_a_request_without_it_is_refused():
+    assert _status([]) == 401
+
+
+def test_a_wrong_token_is_refused():
+    assert _status([(b"authorization", b"Bearer guess")]) == 401
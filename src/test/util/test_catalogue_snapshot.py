@@ -0,0 +1,83 @@
+"""The single-file catalogue snapshot."""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from common_rules_server.service import resource_service
+from common_rules_server.service.config_service import ConfigService
+from common_rules_server.service.resource_service import ResourceService
+from common_rules_server.util import catalogue_snapshot
+
+
+@pytest.fixture
+def snapshot(resources: ResourceService, tmp_path: Path) -> Path:
+    path = tmp_path / "snapshot.json"
+    catalogue_snapshot.write(path, resources.load(), resources.templates())
+    return path
+
+
+def test_the_first_line_indexes_every_entry(snapshot: Path, resources: ResourceService):
+    index = json.loads(snapshot.read_bytes().split(b"\n", 1)[0])
+
+    assert index["format"] == catalogue_snapshot.FORMAT
+    assert set(index["records"]) == set(resources.load()["resources"])
+    assert "review.md" in index["templates"]
+
+
+def test_one_record_is_read_without_the_rest(snapshot: Path, resources: ResourceService):
+    entry = catalogue_snapshot.Snapshot.open(snapshot).record("skill:tdd")
+
+    assert entry["body"] == resources.load()["resources"]["skill:tdd"]["body"]
+    assert entry["header"]["name"] == "tdd"
+
+
+def test_the_loaded_catalogue_matches_the_one_it_was_written_from(
+    snapshot: Path, resources: ResourceService
+):
+    original = resources.load()
+    loaded = catalogue_snapshot.Snapshot.open(snapshot).catalogue()
+
+    assert set(loaded["resources"]) == set(original["resources"])
+    for key, record in original["resources"].items():
+        assert loaded["resources"][key].to_dict() == record.to_dict()
+        assert loaded["resources"][key].edges == record.edges
+    assert loaded["templates"] == resources.templates()
+
+
+def test_a_damaged_entry_is_refused(snapshot: Path):
+    data = snapshot.read_bytes()
+    head, body = data.split(b"\n", 1)
+    snapshot.write_bytes(head + b"\n" + body.replace(b"tdd", b"tdx", 1))
+
+    with pytest.raises(ValueError, match="hash"):
+        catalogue_snapshot.Snapshot.open(snapshot).catalogue()
+
+
+def test_a_server_serves_a_snapshot_without_parsing_markdown(
+    snapshot: Path, tmp_path: Path, monkeypatch
+):
+    monkeypatch.setattr(resource_service, "parse_resource", lambda text: pytest.fail("parsed"))
+    empty_kit = tmp_path / "no-kit"
+    empty_kit.mkdir()
+    served = ResourceService(
+        ConfigService(str(tmp_path)), built_in_dir=str(empty_kit), snapshot=str(snapshot)
+    )
+
+    resource = served.get_resource("skill", "review")
+
+    assert "error" not in resource
+    assert resource["body"] and resource["template"]
+    assert served.check_integrity()["missing_templates"] == []
+
+
+def test_an_unusable_snapshot_is_reported_as_a_problem(tmp_path: Path):
+    broken = tmp_path / "broken.json"
+    broken.write_text("not a snapshot\n", encoding="utf-8")
+    served = ResourceService(ConfigService(str(tmp_path)), snapshot=str(broken))
+
+    problems = served.load()["problems"]
+
+    assert served.load()["resources"] == {}
+    assert "unusable snapshot" in problems[0]["error"]
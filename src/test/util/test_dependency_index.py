@@ -0,0 +1,56 @@
+"""Finding the resources an edit affects."""
+
+from common_rules_server.service.resource_service import ResourceService
+from common_rules_server.util import dependency_index
+
+
+def _touched(signature: tuple, path: str) -> tuple:
+    return (tuple((p, stamp + 1 if p == path else stamp) for p, stamp in signature[0]), signature[1])
+
+
+def test_an_edited_resource_affects_only_itself(resources: ResourceService):
+    signature, catalogue = resources.load_signed()
+    index = dependency_index.build(catalogue)
+    edited = catalogue["resources"]["skill:tdd"].file
+
+    affected = dependency_index.affected(
+        index, index, signature, _touched(signature, edited), resources.templates_dir
+    )
+
+    assert affected == {"skill:tdd"}
+
+
+def test_an_edited_template_affects_every_resource_that_copies_it(resources: ResourceService):
+    signature, catalogue = resources.load_signed()
+    index = dependency_index.build(catalogue)
+    template = str(resources.templates_dir / "review.md")
+
+    affected = dependency_index.affected(
+        index, index, signature, _touched(signature, template), resources.templates_dir
+    )
+
+    assert affected == {"agent:reviewer", "skill:review"}
+
+
+def test_a_changed_config_key_affects_the_resources_naming_it(resources: ResourceService):
+    signature, catalogue = resources.load_signed()
+    index = dependency_index.build(catalogue)
+    config = dict(signature[1], TEST_COMMAND="make check")
+
+    affected = dependency_index.affected(
+        index, index, signature, (signature[0], tuple(sorted(config.items()))), resources.templates_dir
+    )
+
+    assert affected == index.by_config["TEST_COMMAND"]
+    assert "skill:tdd" in affected
+
+
+def test_a_resource_gated_out_is_affected_though_no_file_changed(resources: ResourceService):
+    signature, catalogue = resources.load_signed()
+    before = dependency_index.build(catalogue)
+    remaining = {k: v for k, v in catalogue["resources"].items() if k != "skill:tdd"}
+    after = dependency_index.build({"resources": remaining})
+
+    affected = dependency_index.affected(before, after, signature, signature, resources.templates_dir)
+
+    assert affected == {"skill:tdd"}
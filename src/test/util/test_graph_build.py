@@ -0,0 +1,150 @@
+"""The background code-review-graph build."""
+
+import os
+import stat
+import time
+from pathlib import Path
+
+import pytest
+
+from common_rules_server.util import graph_build
+
+
+@pytest.fixture(autouse=True)
+def _fresh():
+    graph_build.reset()
+    yield
+    graph_build.reset()
+
+
+def _fake_command(tmp_path: Path, monkeypatch, script: str) -> None:
+    command = tmp_path / "bin" / graph_build.COMMAND
+    command.parent.mkdir()
+    command.write_text("#!/bin/sh\n" + script, encoding="utf-8")
+    command.chmod(command.stat().st_mode | stat.S_IXUSR)
+    monkeypatch.setenv("PATH", f"{command.parent}{os.pathsep}{os.environ['PATH']}")
+
+
+def test_a_missing_command_is_looked_up_once(tmp_path: Path, monkeypatch):
+    lookups = []
+    monkeypatch.setattr(graph_build.shutil, "which", lambda name: lookups.append(name))
+
+    first = graph_build.ensure(tmp_path, tmp_path / "build.log")
+    graph_build.ensure(tmp_path, tmp_path / "build.log")
+
+    assert first["status"] == "unavailable"
+    assert "uv tool install" in first["hint"]
+    assert lookups == [graph_build.COMMAND]
+
+
+def test_an_existing_graph_starts_nothing(tmp_path: Path):
+    (tmp_path / graph_build.GRAPH_DIRNAME).mkdir()
+
+    assert graph_build.ensure(tmp_path, tmp_path / "build.log") == {"status": "present"}
+    assert graph_build.current(tmp_path) is None
+
+
+def test_the_build_runs_in_the_background_and_is_shared(tmp_path: Path, monkeypatch):
+    project = tmp_path / "project"
+    project.mkdir()
+    release = tmp_path / "release"
+    _fake_command(
+        tmp_path, monkeypatch, f"while [ ! -e {release} ]; do sleep 0.01; done\nmkdir .code-review-graph\n"
+    )
+
+    first = graph_build.ensure(project, project / "build.log")
+    build = graph_build.current(project)
+    again = graph_build.ensure(project, project / "build.log")
+    release.touch()
+
+    assert first["status"] == again["status"] == "running"
+    assert graph_build.current(project) is build
+    assert build.wait(10)
+    assert build.state == "succeeded"
+    assert graph_build.ensure(project, project / "build.log") == {"status": "present"}
+
+
+def _running(pid: int) -> bool:
+    """Whether ``pid`` is alive; a killed process nobody reaped yet is not."""
+    try:
+        os.kill(pid, 0)
+    except OSError:
+        return False
+    status = Path(f"/proc/{pid}/status")
+    return not (status.exists() and "\nState:\tZ" in status.read_text())
+
+
+def test_a_build_past_its_timeout_is_stopped_with_its_children(tmp_path: Path, monkeypatch):
+    child = tmp_path / "child.pid"
+    _fake_command(tmp_path, monkeypatch, f"sleep 30 &\necho $! > {child}\nwait\n")
+    monkeypatch.setenv(graph_build.TIMEOUT_ENV, "1")
+
+    graph_build.ensure(tmp_path, tmp_path / "build.log")
+    build = graph_build.current(tmp_path)
+
+    assert build.wait(10)
+    assert build.state == "timed_out"
+    assert graph_build.TIMEOUT_ENV in build.error
+    time.sleep(0.1)
+    assert not _running(int(child.read_text()))
+
+
+def test_builds_still_running_at_exit_are_stopped(tmp_path: Path, monkeypatch):
+    _fake_command(tmp_path, monkeypatch, "exec sleep 30\n")
+
+    graph_build.ensure(tmp_path, tmp_path / "build.log")
+    deadline = time.monotonic() + 5
+    while not graph_build._running and time.monotonic() < deadline:
+        time.sleep(0.01)
+    (process,) = graph_build._running
+    graph_build._stop_all()
+
+    assert process.poll() is not None
+    assert graph_build.current(tmp_path).wait(10)
+
+
+def test_only_a_few_builds_run_at_once(tmp_path: Path, monkeypatch):
+    release = tmp_path / "release"
+    _fake_command(
+        tmp_path, monkeypatch, f"while [ ! -e {release} ]; do sleep 0.01; done\nmkdir .code-review-graph\n"
+    )
+    projects = [tmp_path / f"p{i}" for i in range(graph_build.MAX_CONCURRENT_BUILDS + 2)]
+    for project in projects:
+        project.mkdir()
+        graph_build.ensure(project, project / "build.log")
+
+    time.sleep(0.3)
+    assert len(graph_build._running) == graph_build.MAX_CONCURRENT_BUILDS
+    release.touch()
+    assert all(graph_build.current(p).wait(10) for p in projects)
+    assert all((p / graph_build.GRAPH_DIRNAME).is_dir() for p in projects)
+
+
+def test_a_detached_build_outlives_its_caller_under_a_supervisor(tmp_path: Path, monkeypatch):
+    project = tmp_path / "project"
+    project.mkdir()
+    _fake_command(tmp_path, monkeypatch, "mkdir .code-review-graph\n")
+    log = project / "build.log"
+
+    status = graph_build.ensure(project, log, detach=True)
+
+    assert status["status"] == "running"
+    assert graph_build.current(project) is None
+    deadline = time.monotonic() + 20
+    while log.with_suffix(".pid").exists() and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert graph_build.ensure(project, log, detach=True) == {"status": "present"}
+
+
+def test_a_failed_build_is_not_retried_straight_away(tmp_path: Path, monkeypatch):
+    _fake_command(tmp_path, monkeypatch, "echo 'no parser for this language'\nexit 3\n")
+
+    graph_build.ensure(tmp_path, tmp_path / "build.log")
+    failed = graph_build.current(tmp_path)
+    failed.wait(10)
+    status = graph_build.ensure(tmp_path, tmp_path / "build.log")
+
+    assert graph_build.current(tmp_path) is failed
+    assert status["status"] == "failed"
+    assert "finished" in status
+    assert "no parser" in Path(status["log"]).read_text(encoding="utf-8")
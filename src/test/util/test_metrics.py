@@ -0,0 +1,109 @@
+"""Call latencies, response sizes and counters."""
+
+import json
+from pathlib import Path
+
+from common_rules_server.util.metrics import (
+    METRICS_INTERVAL_ENV,
+    ROTATE_BYTES,
+    SIZE_SAMPLE_EVERY,
+    Metrics,
+)
+
+
+def test_percentiles_are_nearest_rank():
+    recorder = Metrics()
+    for value in range(1, 101):
+        recorder.observe("get_context", float(value), 10)
+
+    summary = recorder.snapshot()["tools"]["get_context"]
+    assert summary["calls"] == 100
+    assert summary["latency_ms"] == {"p50": 50, "p95": 95, "p99": 99, "max": 100}
+    assert summary["response_bytes"]["total"] == 1000
+
+
+def test_only_the_most_recent_calls_are_summarised():
+    recorder = Metrics(window=10)
+    for _ in range(50):
+        recorder.observe("get_context", 1000.0)
+    for _ in range(10):
+        recorder.observe("get_context", 1.0)
+
+    summary = recorder.snapshot()["tools"]["get_context"]
+    assert summary["calls"] == 60
+    assert summary["latency_ms"]["max"] == 1.0
+
+
+def test_a_failed_call_counts_without_a_response_size():
+    recorder = Metrics()
+    recorder.observe("setup_config", 5.0, failed=True)
+
+    summary = recorder.snapshot()["tools"]["setup_config"]
+    assert summary["failures"] == 1
+    assert summary["response_bytes"]["p50"] is None
+
+
+def test_sizes_are_sampled_and_the_total_estimated_from_them():
+    recorder = Metrics()
+    measured = 0
+    for _ in range(SIZE_SAMPLE_EVERY * 4):
+        if recorder.wants_size("get_context"):
+            measured += 1
+            recorder.observe("get_context", 1.0, 100)
+        else:
+            recorder.observe("get_context", 1.0)
+
+    sizes = recorder.snapshot()["tools"]["get_context"]["response_bytes"]
+    assert measured == sizes["sampled"] == 4
+    assert sizes["total"] == 100 * SIZE_SAMPLE_EVERY * 4
+
+
+def test_hit_ratios_come_from_counter_pairs():
+    recorder = Metrics()
+    recorder.count("catalogue.hits", 3)
+    recorder.count("catalogue.misses")
+
+    ratios = recorder.snapshot()["hit_ratios"]
+    assert ratios["catalogue"] == 0.75
+    assert ratios["derived"] is None
+
+
+def test_snapshots_are_written_once_per_interval(tmp_path: Path, monkeypatch):
+    (tmp_path / ".common-rules-server").mkdir()
+    monkeypatch.setenv(METRICS_INTERVAL_ENV, "3600")
+    recorder = Metrics()
+    recorder.observe("get_context", 1.0, 10)
+
+    written = recorder.write_if_due(str(tmp_path), {"catalogues": {"projects": 1}})
+    assert recorder.write_if_due(str(tmp_path)) is None
+
+    lines = written.read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 1
+    entry = json.loads(lines[0])
+    assert entry["tools"]["get_context"]["calls"] == 1
+    assert entry["catalogues"] == {"projects": 1}
+
+
+def test_a_full_metrics_log_is_rotated(tmp_path: Path, monkeypatch):
+    cache = tmp_path / ".common-rules-server" / "cache"
+    cache.mkdir(parents=True)
+    (cache / "metrics.jsonl").write_text("x" * ROTATE_BYTES, encoding="utf-8")
+    (cache / "metrics.jsonl.1").write_text("oldest", encoding="utf-8")
+    monkeypatch.setenv(METRICS_INTERVAL_ENV, "3600")
+
+    written = Metrics().write_if_due(str(tmp_path))
+
+    assert len(written.read_text(encoding="utf-8").splitlines()) == 1
+    assert (cache / "metrics.jsonl.1").stat().st_size == ROTATE_BYTES
+
+
+def test_nothing_is_written_into_an_unconfigured_project(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv(METRICS_INTERVAL_ENV, "1")
+    assert Metrics().write_if_due(str(tmp_path)) is None
+    assert not (tmp_path / ".common-rules-server").exists()
+
+
+def test_nothing_is_written_unless_asked_for(tmp_path: Path, monkeypatch):
+    (tmp_path / ".common-rules-server").mkdir()
+    monkeypatch.delenv(METRICS_INTERVAL_ENV, raising=False)
+    assert Metrics().write_if_due(str(tmp_path)) is None
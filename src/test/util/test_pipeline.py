@@ -0,0 +1,81 @@
+"""Dependency-ordered, concurrent stage execution."""
+
+import threading
+
+import pytest
+
+from common_rules_server.util import tracing
+from common_rules_server.util.pipeline import Stage, run_pipeline
+
+
+def test_a_stage_receives_the_results_of_what_it_runs_after():
+    results, _ = run_pipeline(
+        [
+            Stage("double", lambda done: done["base"] * 2, after=("base",)),
+            Stage("base", lambda done: 21),
+        ]
+    )
+    assert results == {"base": 21, "double": 42}
+
+
+def test_independent_stages_run_at_the_same_time():
+    """Each waits for the other, so a sequential runner would never finish."""
+    barrier = threading.Barrier(2, timeout=5)
+    results, _ = run_pipeline(
+        [Stage("left", lambda _: barrier.wait()), Stage("right", lambda _: barrier.wait())]
+    )
+    assert set(results) == {"left", "right"}
+
+
+def test_a_stage_never_starts_before_its_dependencies_finish():
+    order: list[str] = []
+    run_pipeline(
+        [
+            Stage("last", lambda _: order.append("last"), after=("first", "second")),
+            Stage("first", lambda _: order.append("first")),
+            Stage("second", lambda _: order.append("second"), after=("first",)),
+        ]
+    )
+    assert order == ["first", "second", "last"]
+
+
+def test_timings_cover_every_stage():
+    _, timings = run_pipeline([Stage("a", lambda _: None), Stage("b", lambda _: None, after=("a",))])
+    assert set(timings["stages"]) == {"a", "b"}
+    assert timings["stages"]["b"]["after"] == ["a"]
+    assert timings["stages"]["b"]["started_ms"] >= timings["stages"]["a"]["started_ms"]
+    assert timings["total_ms"] >= 0
+
+
+def test_a_failing_stage_stops_what_depends_on_it():
+    ran: list[str] = []
+
+    def fail(_):
+        raise RuntimeError("git is missing")
+
+    with pytest.raises(RuntimeError, match="git is missing"):
+        run_pipeline(
+            [Stage("broken", fail), Stage("after", lambda _: ran.append("after"), after=("broken",))]
+        )
+    assert ran == []
+
+
+@pytest.mark.parametrize(
+    "stages",
+    [
+        [Stage("a", lambda _: None), Stage("a", lambda _: None)],
+        [Stage("a", lambda _: None, after=("missing",))],
+        [Stage("a", lambda _: None, after=("b",)), Stage("b", lambda _: None, after=("a",))],
+    ],
+    ids=["duplicate", "unknown", "cycle"],
+)
+def test_a_malformed_graph_is_rejected_before_anything_runs(stages):
+    with pytest.raises(ValueError):
+        run_pipeline(stages)
+
+
+def test_each_stage_is_a_span_in_an_open_trace():
+    with tracing.trace("setup_config") as recorded:
+        run_pipeline([Stage("a", lambda _: 1), Stage("b", lambda _: 2, after=("a",))])
+
+    assert sorted(child["name"] for child in recorded.tree()["children"]) == ["a", "b"]
@@ -0,0 +1,66 @@
+"""Opt-in per-call profiles."""
+
+import logging
+import pstats
+from pathlib import Path
+
+from common_rules_server.util import profiling
+
+
+def _busy() -> int:
+    return sum(i * i for i in range(20000))
+
+
+def test_nothing_is_profiled_when_off(tmp_path: Path, monkeypatch):
+    monkeypatch.delenv(profiling.PROFILE_ENV, raising=False)
+    with profiling.capture("get_context"):
+        assert not profiling.active()
+        assert profiling.profiled(_busy) == _busy()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_a_profiled_call_writes_one_file_and_logs_its_top_functions(
+    tmp_path: Path, monkeypatch, caplog
+):
+    monkeypatch.setenv(profiling.PROFILE_ENV, str(tmp_path))
+    with caplog.at_level(logging.INFO, logger=profiling.__name__):
+        with profiling.capture("setup_config"):
+            profiling.profiled(_busy)
+            profiling.profiled(_busy)
+
+    written = list(tmp_path.glob("*.pstats"))
+    assert len(written) == 1
+    assert written[0].name.endswith("-setup_config.pstats")
+    functions = {name for _, _, name in pstats.Stats(str(written[0])).stats}
+    assert "_busy" in functions
+    assert "_busy" in caplog.text
+
+
+def test_a_call_that_ran_nothing_profiled_writes_nothing(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv(profiling.PROFILE_ENV, str(tmp_path))
+    with profiling.capture("get_server_stats"):
+        pass
+    assert not tmp_path.exists() or list(tmp_path.iterdir()) == []
+
+
+def test_an_overlapping_call_runs_unprofiled(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv(profiling.PROFILE_ENV, str(tmp_path))
+    with profiling.capture("get_context"):
+        with profiling._profiler_free:
+            assert profiling.profiled(_busy) == _busy()
+    assert list(tmp_path.glob("*.pstats")) == []
+
+
+def test_only_the_newest_profiles_are_kept(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv(profiling.PROFILE_ENV, str(tmp_path))
+    monkeypatch.setenv(profiling.PROFILE_KEEP_ENV, "2")
+    for index in range(3):
+        (tmp_path / f"20000101T00000{index}-000-old.pstats").write_bytes(b"")
+
+    with profiling.capture("sync_to_ide"):
+        profiling.profiled(_busy)
+
+    kept = sorted(path.name for path in tmp_path.glob("*.pstats"))
+    assert len(kept) == 2
+    assert kept[0] == "20000101T000002-000-old.pstats"
+    assert kept[1].endswith("-sync_to_ide.pstats")
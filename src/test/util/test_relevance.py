@@ -0,0 +1,35 @@
+"""Relevance ranking and token estimation."""
+
+from common_rules_server.util.relevance import RelevanceIndex, estimate_tokens, tokenize
+
+
+def test_tokenize_folds_case_inflection_and_stopwords():
+    assert tokenize("The Tests are FAILING") == ["test", "fail"]
+
+
+def test_short_words_keep_their_suffix():
+    """Stripping "s" from "uses" would leave a stem too short to mean anything."""
+    assert tokenize("uses") == ["uses"]
+
+
+def test_estimate_rounds_up_so_a_budget_is_never_overrun():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("abcde") == 2
+
+
+def test_a_match_in_the_name_outranks_the_same_match_in_the_body():
+    index = RelevanceIndex(
+        {
+            "named": {"name": "release", "description": "Ship it.", "body": "Steps."},
+            "mentioned": {"name": "notes", "description": "Notes.", "body": "Before a release."},
+        }
+    )
+    scores = index.score("release")
+    assert scores["named"] > scores["mentioned"] > 0
+
+
+def test_documents_without_a_query_term_are_not_scored():
+    index = RelevanceIndex({"a": {"name": "alpha"}, "b": {"name": "beta"}})
+    assert set(index.score("alpha")) == {"a"}
+    assert index.score("gamma") == {}
@@ -239,3 +239,33 @@ def test_a_guarded_message_is_allowed():
 
 def test_a_hook_that_sets_no_message_is_allowed():
     assert parse_resource(_hook("stop", "decision=allow")).ok
+
+
+# ------------------------------------------------------------------ sections
+
+
+def test_sections_run_from_one_level_two_heading_to_the_next():
+    from common_rules_server.util.resource_parsing import index_sections
+
+    body = "Intro.\n\n## One\n\nFirst.\n\n### Detail\n\nStill one.\n\n## Two\n\nSecond.\n"
+    sections = index_sections(body)
+    assert [s.title for s in sections] == ["One", "Two"]
+    assert body[sections[0].start:sections[0].end].endswith("Still one.\n\n")
+    assert sections[1].end == len(body)
+
+
+def test_a_heading_inside_a_fenced_block_is_not_a_section():
+    from common_rules_server.util.resource_parsing import index_sections
+
+    body = "## Script\n\n```sh\n## comment\n```\n\n## After\n"
+    assert [s.title for s in index_sections(body)] == ["Script", "After"]
+
+
+def test_section_offsets_are_bytes_not_characters():
+    from common_rules_server.util.resource_parsing import index_sections
+
+    body = "## Über\n\né\n\n## Next\n"
+    first, second = index_sections(body)
+    encoded = body.encode("utf-8")
+    assert encoded[second.start:second.end].decode("utf-8") == "## Next\n"
+    assert first.size == len("## Über\n\né\n\n".encode("utf-8"))
@@ -0,0 +1,76 @@
+"""The slotted record a loaded resource is held in."""
+
+import sys
+from pathlib import Path
+
+from common_rules_server.service.config_service import ConfigService
+from common_rules_server.service.resource_service import ResourceService
+from common_rules_server.util.resource_parsing import parse_resource
+from common_rules_server.util.resource_record import Edge, ResourceRecord
+
+SKILL = """---
+kind: skill
+name: sample
+description: A sample skill.
+trigger: both
+relationships:
+  uses:
+    - /helper
+  comes-from:
+    - target: /start
+      required: true
+---
+
+## Instructions
+
+Do the thing.
+"""
+
+
+def _record() -> ResourceRecord:
+    parsed = parse_resource(SKILL)
+    return ResourceRecord(parsed.header, "project", "/tmp/sample.md", parsed.body)
+
+
+def test_it_reads_like_the_header_plus_what_loading_added():
+    record = _record()
+    record.body = "resolved"
+
+    assert record["trigger"] == "both"
+    assert record["body"] == "resolved"
+    assert record.get("script") is None
+    assert "script" not in record
+    assert {"kind", "name", "description", "source", "file", "raw_body", "body"} <= set(record)
+    assert dict(record)["source"] == "project"
+
+
+def test_to_dict_is_a_plain_dict_without_the_excluded_keys():
+    record = _record()
+    plain = record.to_dict(exclude=("raw_body",))
+
+    assert type(plain) is dict
+    assert "raw_body" not in plain
+    assert plain["relationships"] == record.header["relationships"]
+
+
+def test_edges_are_interned_tuples_in_walking_order():
+    edges = _record().edges
+
+    assert edges == (Edge("comes_from", "/start", True), Edge("uses", "/helper", False))
+    assert edges[0].target is sys.intern("/start")
+
+
+def test_it_has_no_instance_dict():
+    record = _record()
+
+    assert not hasattr(record, "__dict__")
+    assert record.kind is sys.intern("skill")
+
+
+def test_projects_share_the_parsed_built_in_header(tmp_path: Path, resources: ResourceService):
+    other = ResourceService(ConfigService(str(tmp_path / "other")))
+    mine = resources.load()["resources"]["skill:tdd"]
+    theirs = other.load()["resources"]["skill:tdd"]
+
+    assert mine is not theirs
+    assert mine.header is theirs.header
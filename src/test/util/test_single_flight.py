@@ -0,0 +1,57 @@
+"""Coalescing concurrent identical computations."""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from common_rules_server.util.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_computation():
+    flights = SingleFlight()
+    computed = []
+
+    def compute():
+        computed.append(threading.get_ident())
+        time.sleep(0.2)
+        return object()
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        results = list(pool.map(lambda _: flights.do("catalogue", compute), range(5)))
+
+    assert len(computed) == 1
+    assert all(result is results[0] for result in results)
+
+
+def test_a_finished_computation_is_not_remembered():
+    flights = SingleFlight()
+    assert flights.do("key", lambda: 1) == 1
+    assert flights.do("key", lambda: 2) == 2
+
+
+def test_different_keys_do_not_wait_for_each_other():
+    flights = SingleFlight()
+    barrier = threading.Barrier(2, timeout=5)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        left = pool.submit(flights.do, "left", barrier.wait)
+        right = pool.submit(flights.do, "right", barrier.wait)
+        left.result()
+        right.result()
+
+
+def test_every_sharing_caller_sees_the_failure():
+    flights = SingleFlight()
+
+    def fail():
+        time.sleep(0.1)
+        raise OSError("disk went away")
+
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        futures = [pool.submit(flights.do, "key", fail) for _ in range(3)]
+    for future in futures:
+        with pytest.raises(OSError, match="disk went away"):
+            future.result()
+    assert flights.do("key", lambda: "recovered") == "recovered"
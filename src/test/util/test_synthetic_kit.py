@@ -0,0 +1,70 @@
+"""Synthetic resource trees for scale measurements."""
+
+from pathlib import Path
+
+from common_rules_server.service.config_service import ConfigService
+from common_rules_server.service.resource_service import ResourceService
+from common_rules_server.util.synthetic_kit import KitSpec, generate_kit
+
+
+def _tree(directory: Path) -> dict[str, bytes]:
+    return {str(path.relative_to(directory)): path.read_bytes() for path in directory.rglob("*.md")}
+
+
+def _project_resources(resources: ResourceService) -> Path:
+    return resources.project_root / ".common-rules-server" / "resources"
+
+
+def test_the_same_seed_writes_the_same_bytes(tmp_path: Path):
+    spec = KitSpec(size=40, seed=7)
+    generate_kit(tmp_path / "a", spec)
+    generate_kit(tmp_path / "b", spec)
+    generate_kit(tmp_path / "c", KitSpec(size=40, seed=8))
+
+    assert _tree(tmp_path / "a") == _tree(tmp_path / "b")
+    assert _tree(tmp_path / "a") != _tree(tmp_path / "c")
+
+
+def test_every_generated_resource_loads_and_every_edge_resolves(resources: ResourceService):
+    summary = generate_kit(
+        _project_resources(resources), KitSpec(size=200, seed=1, chain_depth=6, edge_density=3)
+    )
+    catalogue = resources.load()
+
+    assert catalogue["problems"] == []
+    synthetic = [r for r in catalogue["resources"].values() if r["source"] == "project"]
+    assert len(synthetic) == summary["resources"] - summary["gated"]
+    assert resources.check_integrity()["ok"] is True
+
+
+def test_the_gated_share_is_withheld_until_its_gate_is_on(resources: ResourceService):
+    summary = generate_kit(_project_resources(resources), KitSpec(size=100, seed=2, gated_fraction=0.3))
+    gated = [g for g in resources.load()["gated_out"] if g["gate"] == "SYNTHETIC_GATE"]
+    assert summary["gated"] > 0
+    assert len(gated) == summary["gated"]
+
+
+def test_overrides_take_the_names_they_are_given(resources: ResourceService):
+    built_in = sorted(
+        (r["kind"], r["name"]) for r in resources.load()["resources"].values()
+    )
+    summary = generate_kit(
+        _project_resources(resources), KitSpec(size=50, seed=3, override_ratio=0.5), built_in
+    )
+    overriding = [r for r in resources.load()["resources"].values() if r.get("overrides")]
+
+    assert summary["overrides"] > 0
+    assert len(overriding) == summary["overrides"]
+
+
+def test_kinds_bodies_and_placeholders_follow_the_spec(resources: ResourceService):
+    spec = KitSpec(
+        size=30, seed=4, kinds={"skill": 1.0}, body_bytes=8000, placeholders_per_kb=20, gated_fraction=0
+    )
+    summary = generate_kit(_project_resources(resources), spec)
+    records = [r for r in resources.load()["resources"].values() if r["source"] == "project"]
+
+    assert summary["by_kind"] == {"skill": 30}
+    assert all(len(r["raw_body"]) >= 8000 for r in records)
+    assert all(r["resolved_env"] or r["unresolved_env"] for r in records)
+    assert all("{{PROJECT_NAME}}" not in r["body"] for r in records)
@@ -0,0 +1,75 @@
+"""Nested timing spans and their export."""
+
+import contextvars
+import json
+import threading
+from pathlib import Path
+
+from common_rules_server.util import tracing
+
+
+def _names(node: dict) -> list[str]:
+    return [child["name"] for child in node.get("children", [])]
+
+
+def test_spans_outside_a_trace_record_nothing():
+    with tracing.span("clean") as span:
+        assert span is None
+
+
+def test_spans_nest_under_the_span_they_were_opened_in():
+    with tracing.trace("sync_to_ide") as recorded:
+        with tracing.span("clean"):
+            pass
+        with tracing.span("target", ide="cursor"):
+            with tracing.span("always_file"):
+                pass
+
+    tree = recorded.tree()
+    assert tree["name"] == "sync_to_ide"
+    assert _names(tree) == ["clean", "target"]
+    target = tree["children"][1]
+    assert target["attrs"] == {"ide": "cursor"}
+    assert _names(target) == ["always_file"]
+    assert tree["duration_ms"] >= target["duration_ms"]
+
+
+def test_work_handed_to_another_thread_nests_under_the_caller():
+    with tracing.trace("setup_config") as recorded:
+        with tracing.span("stages"):
+            context = contextvars.copy_context()
+
+            def stage():
+                with tracing.span("sync"):
+                    pass
+
+            worker = threading.Thread(target=context.run, args=(stage,))
+            worker.start()
+            worker.join()
+
+    assert _names(recorded.tree()["children"][0]) == ["sync"]
+
+
+def test_trace_events_are_complete_events_on_their_threads():
+    with tracing.trace("sync_to_ide") as recorded:
+        with tracing.span("clean"):
+            pass
+
+    events = recorded.trace_events()["traceEvents"]
+    assert [event["name"] for event in events] == ["sync_to_ide", "clean"]
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
+    assert events[1]["tid"] == threading.get_ident()
+
+
+def test_exported_traces_are_json_and_only_the_newest_are_kept(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(tracing, "KEEP_TRACES", 2)
+    for index in range(3):
+        (tmp_path / f"20000101T00000{index}-000-old.json").write_text("{}", encoding="utf-8")
+
+    with tracing.trace("sync_to_ide") as recorded:
+        pass
+    path = recorded.export(tmp_path)
+
+    assert "traceEvents" in json.loads(path.read_text(encoding="utf-8"))
+    kept = sorted(p.name for p in tmp_path.glob("*.json"))
+    assert kept == ["20000101T000002-000-old.json", path.name]
@@ -0,0 +1,87 @@
+"""The worker pool and per-project write locks."""
+
+import asyncio
+import contextvars
+import gc
+import threading
+import time
+
+import pytest
+
+from common_rules_server.util import workers
+
+_current_tool: contextvars.ContextVar[str] = contextvars.ContextVar("current_tool", default="")
+
+
+@pytest.mark.anyio
+async def test_work_runs_off_the_event_loop_thread():
+    loop_thread = threading.get_ident()
+    assert await workers.run_blocking(threading.get_ident) != loop_thread
+
+
+@pytest.mark.anyio
+async def test_context_variables_travel_with_the_work():
+    _current_tool.set("get_context")
+    assert await workers.run_blocking(_current_tool.get) == "get_context"
+
+
+@pytest.mark.anyio
+async def test_exceptions_reach_the_caller():
+    def fail():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError, match="boom"):
+        await workers.run_blocking(fail)
+
+
+@pytest.mark.anyio
+async def test_writers_to_one_project_never_overlap():
+    active, peak = 0, 0
+    guard = threading.Lock()
+
+    def write():
+        nonlocal active, peak
+        with guard:
+            active += 1
+            peak = max(peak, active)
+        time.sleep(0.05)
+        with guard:
+            active -= 1
+
+    await asyncio.gather(*(workers.run_blocking(write, lock="/project") for _ in range(3)))
+    assert peak == 1
+
+
+@pytest.mark.anyio
+async def test_writers_to_different_projects_run_together():
+    barrier = threading.Barrier(2, timeout=5)
+
+    await asyncio.gather(
+        workers.run_blocking(barrier.wait, lock="/first"),
+        workers.run_blocking(barrier.wait, lock="/second"),
+    )
+
+
+def test_the_lock_is_reentrant():
+    with workers.project_lock("/project"):
+        with workers.project_lock("/project"):
+            pass
+
+
+def test_a_lock_is_dropped_once_nobody_holds_it():
+    with workers.project_lock("/released"):
+        assert "/released" in workers._locks
+    gc.collect()
+    assert "/released" not in workers._locks
+
+
+def test_pool_size_can_be_overridden(monkeypatch):
+    monkeypatch.setenv(workers.WORKERS_ENV, "3")
+    assert workers.max_workers() == 3
+    monkeypatch.setenv(workers.WORKERS_ENV, "none")
+    assert workers.max_workers() >= 1
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
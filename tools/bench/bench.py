@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""Benchmarks for the server's hot paths, and a regression check against a baseline.
+
+    uv run python tools/bench/bench.py run                      # measure, print, save
+    uv run python tools/bench/bench.py run --only sync --repeat 10
+    uv run python tools/bench/bench.py run --synthetic 1000    # plus 1000 generated resources
+    uv run python tools/bench/bench.py baseline                 # save as this machine's baseline
+    uv run python tools/bench/bench.py compare                  # latest run against the baseline
+
+``compare`` exits non-zero when any case's median is slower than the baseline's
+by more than ``--threshold`` (a fraction; 0.25 by default). Baselines are only
+comparable on the machine that recorded them, so each is named after it.
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+sys.path.insert(0, str(HERE.parents[1] / "src"))
+sys.path.insert(0, str(HERE))
+
+import cases  # noqa: E402
+
+RESULTS = HERE / "results"
+BASELINES = HERE / "baselines"
+LATEST = RESULTS / "latest.json"
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.25
+
+
+def measure(names: list[str], repeat: int) -> dict:
+    """Times each case ``repeat`` times, each time from freshly prepared state."""
+    results = {}
+    for name in names:
+        samples = []
+        for _ in range(repeat):
+            call = cases.CASES[name]()
+            started = time.perf_counter()
+            call()
+            samples.append((time.perf_counter() - started) * 1000)
+            cases.cleanup()
+        results[name] = {
+            "median_ms": round(statistics.median(samples), 3),
+            "min_ms": round(min(samples), 3),
+            "max_ms": round(max(samples), 3),
+            "samples": len(samples),
+        }
+        print(f"{name:28} {results[name]['median_ms']:10.2f} ms  (min {results[name]['min_ms']:.2f})")
+    return {"machine": _machine(), "commit": _commit(), "repeat": repeat, "cases": results}
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """The cases whose median grew by more than ``threshold`` over the baseline."""
+    if baseline.get("synthetic", 0) != current.get("synthetic", 0):
+        print("Warning: the two runs measured kits of different sizes.\n")
+    regressions = []
+    for name, now in sorted(current["cases"].items()):
+        before = baseline["cases"].get(name)
+        if before is None:
+            print(f"{name:28} {'new':>10}")
+            continue
+        change = now["median_ms"] / before["median_ms"] - 1 if before["median_ms"] else 0.0
+        flag = "REGRESSED" if change > threshold else ""
+        print(
+            f"{name:28} {before['median_ms']:10.2f} -> {now['median_ms']:10.2f} ms "
+            f"{change:+7.1%} {flag}"
+        )
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    for command in ("run", "baseline"):
+        sub = commands.add_parser(command)
+        sub.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+        sub.add_argument("--only", action="append", default=[], help="run cases whose name starts with this")
+        sub.add_argument("--output", type=Path, help="where to write the results")
+        sub.add_argument("--synthetic", type=int, default=0, help="generated resources per project")
+
+    check = commands.add_parser("compare")
+    check.add_argument("baseline", type=Path, nargs="?", help="default: this machine's baseline")
+    check.add_argument("current", type=Path, nargs="?", default=LATEST)
+    check.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        baseline_path = args.baseline or BASELINES / f"{_machine()['node']}.json"
+        if not baseline_path.is_file():
+            print(f"No baseline at {baseline_path}. Record one with: bench.py baseline")
+            return 2
+        regressions = compare(_read(baseline_path), _read(args.current), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.threshold:.0%}.")
+            return 1
+        return 0
+
+    names = [name for name in cases.CASES if not args.only or name.startswith(tuple(args.only))]
+    if not names:
+        print(f"No case matches {args.only}. Cases: {', '.join(cases.CASES)}")
+        return 2
+    cases.SYNTHETIC = args.synthetic
+    measured = measure(names, args.repeat)
+    measured["synthetic"] = args.synthetic
+
+    default = BASELINES / f"{measured['machine']['node']}.json" if args.command == "baseline" else LATEST
+    output = args.output or default
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(measured, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+    print(f"\nWritten to {output}")
+    return 0
+
+
+def _machine() -> dict:
+    return {
+        "node": platform.node() or "unknown",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def _commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "-C", str(HERE), "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _read(path: Path) -> dict:
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
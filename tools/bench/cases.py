@@ -0,0 +1,169 @@
+"""The benchmark cases: what is measured, and in what state.
+
+Each case is a function that prepares its state and returns the call to time.
+Preparation is never timed. ``cold`` cases time the first call a fresh process
+would make — a new service, and no parse shared from an earlier one; ``warm``
+cases time the calls after it, which is what a long-lived server pays.
+
+Every case runs against a fresh temporary git project, like the test fixtures,
+and nothing reaches the network: the code-review-graph build that sync would
+otherwise attempt is marked as already done. With ``SYNTHETIC`` set, each
+project also holds that many generated resources of its own, to measure the
+same paths at a scale the built-in kit does not reach.
+"""
+
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Callable
+
+from common_rules_server.service import resource_service
+from common_rules_server.service.bdd_service import BddService
+from common_rules_server.service.config_service import ConfigService
+from common_rules_server.service.hook_service import HookService
+from common_rules_server.service.resource_service import ResourceService
+from common_rules_server.service.sync_service import SYNC_TARGETS, SyncService
+from common_rules_server.util.synthetic_kit import KitSpec, generate_kit
+
+REPO = Path(__file__).resolve().parents[2]
+FEATURE = REPO / "agent_bdd.feature"
+
+#: Generated resources per project; 0 measures the built-in kit alone.
+SYNTHETIC = 0
+
+_scratch: list[tempfile.TemporaryDirectory] = []
+
+
+def project() -> Path:
+    """A new, empty git project that lives until ``cleanup``."""
+    directory = tempfile.TemporaryDirectory(prefix="common-rules-bench-")
+    _scratch.append(directory)
+    root = Path(directory.name)
+    subprocess.run(["git", "init", "-q", str(root)], check=True)
+    (root / "pyproject.toml").write_text('[project]\nname = "bench"\n', encoding="utf-8")
+    (root / ".code-review-graph").mkdir()
+    if SYNTHETIC:
+        generate_kit(root / ".common-rules-server" / "resources", KitSpec(size=SYNTHETIC))
+    return root
+
+
+def cleanup() -> None:
+    while _scratch:
+        _scratch.pop().cleanup()
+
+
+def fresh_resources(root: Path) -> ResourceService:
+    """A service with nothing cached, in this process or on it."""
+    resource_service._built_in_parses.clear()
+    return ResourceService(ConfigService(str(root)))
+
+
+def warm_resources(root: Path) -> ResourceService:
+    resources = fresh_resources(root)
+    resources.load()
+    resources.check_integrity()
+    return resources
+
+
+# ------------------------------------------------------------------ catalogue
+
+
+def load_cold() -> Callable[[], object]:
+    resources = fresh_resources(project())
+    return resources.load
+
+
+def load_warm() -> Callable[[], object]:
+    return warm_resources(project()).load
+
+
+def get_context_cold() -> Callable[[], object]:
+    return fresh_resources(project()).get_context
+
+
+def get_context_warm() -> Callable[[], object]:
+    resources = warm_resources(project())
+    resources.get_context()
+    return resources.get_context
+
+
+def get_resource_cold() -> Callable[[], object]:
+    resources = fresh_resources(project())
+    return lambda: resources.get_resource("skill", "tdd")
+
+
+def get_resource_warm() -> Callable[[], object]:
+    resources = warm_resources(project())
+    return lambda: resources.get_resource("skill", "tdd")
+
+
+def check_integrity_cold() -> Callable[[], object]:
+    return fresh_resources(project()).check_integrity
+
+
+def check_integrity_warm() -> Callable[[], object]:
+    return warm_resources(project()).check_integrity
+
+
+# ----------------------------------------------------------------------- sync
+
+
+def _sync(ide: str, warm: bool) -> Callable[[], object]:
+    root = project()
+    resources = warm_resources(root) if warm else fresh_resources(root)
+    if warm:
+        SyncService(resources, str(root)).sync([ide])
+    return lambda: SyncService(resources, str(root)).sync([ide])
+
+
+def hook_install_cold() -> Callable[[], object]:
+    root = project()
+    hooks = warm_resources(root).hooks()
+    return lambda: HookService(str(root)).install(hooks)
+
+
+def hook_install_warm() -> Callable[[], object]:
+    root = project()
+    hooks = warm_resources(root).hooks()
+    HookService(str(root)).install(hooks)
+    return lambda: HookService(str(root)).install(hooks)
+
+
+# ------------------------------------------------------------------------ bdd
+
+
+def bdd_paging() -> Callable[[], object]:
+    """Every page of the shipped feature file, in order, as an agent walks it."""
+    root = project()
+    shutil.copy(FEATURE, root / "agent_bdd.feature")
+    service = BddService(str(root))
+    total = service.get_scenario(1)["total_pages"]
+
+    def walk() -> None:
+        for page in range(1, total + 1):
+            service.get_scenario(page)
+
+    return walk
+
+
+CASES: dict[str, Callable[[], Callable[[], object]]] = {
+    "load.cold": load_cold,
+    "load.warm": load_warm,
+    "get_context.cold": get_context_cold,
+    "get_context.warm": get_context_warm,
+    "get_resource.cold": get_resource_cold,
+    "get_resource.warm": get_resource_warm,
+    "check_integrity.cold": check_integrity_cold,
+    "check_integrity.warm": check_integrity_warm,
+    **{
+        f"sync.{target.key}.{state}": (
+            lambda ide=target.key, warm=(state == "warm"): _sync(ide, warm)
+        )
+        for target in SYNC_TARGETS
+        for state in ("cold", "warm")
+    },
+    "hook_install.cold": hook_install_cold,
+    "hook_install.warm": hook_install_warm,
+    "bdd.paging": bdd_paging,
+}